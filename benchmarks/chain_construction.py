@@ -0,0 +1,67 @@
+"""
+Per-call chain construction overhead: building `prompt | llm.with_structured_output(Model)`
+on every call (as the chains used to) against looking the prebuilt chain up in
+the registry. No requests are sent.
+
+    python -m benchmarks.chain_construction --repeat 200
+"""
+
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+# Importing the chain modules registers every chain
+import core.chains.preprocess  # noqa: E402,F401
+import core.chains.guidelines_chain  # noqa: E402,F401
+import core.chains.general_cohort_chain.slides  # noqa: E402,F401
+import core.chains.general_cohort_chain.reasoning_slides  # noqa: E402,F401
+from core.chains.registry import chain_registry  # noqa: E402
+
+
+def build_per_call(spec):
+    if spec["schema"] is not None:
+        return spec["prompt"] | spec["llm"].with_structured_output(spec["schema"])
+    return spec["prompt"] | spec["llm"] | spec["parser"]
+
+
+def time_per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(repeat):
+    chains = {}
+    for name in chain_registry.names():
+        spec = chain_registry.spec(name)
+        chain_registry.get(name)
+        rebuild = time_per_call(lambda: build_per_call(spec), repeat)
+        lookup = time_per_call(lambda: chain_registry.get(name), repeat)
+        chains[name] = {
+            "rebuild_us": round(rebuild * 1e6, 1),
+            "registry_us": round(lookup * 1e6, 3),
+        }
+    rebuild_total = sum(chain["rebuild_us"] for chain in chains.values())
+    lookup_total = sum(chain["registry_us"] for chain in chains.values())
+    return {
+        "repeat": repeat,
+        "chains": chains,
+        "rebuild_us_all_chains": round(rebuild_total, 1),
+        "registry_us_all_chains": round(lookup_total, 3),
+        "saved_ms_per_report": round((rebuild_total - lookup_total) / 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Throughput of the report pipeline as the number of simultaneous reports grows.
+
+For each concurrency level N (default 1 -> 500) it starts N pipelines at once
+against a stand-in LLM, either the in-process fake Responses API or an
+already running one (--base-url, which keeps the server's threads out of this
+process), and measures:
+
+    reports per minute, p50 / p95 / p99 report latency
+    event-loop lag (how late a 50 ms ticker wakes up while reports run)
+    memory per in-flight report (peak RSS over the level's starting RSS, or with
+    --tracemalloc the traced Python allocations, which is exact but much slower)
+    LLM governor queueing (LLM_MAX_IN_FLIGHT and LLM_RPM_* / LLM_TPM_* apply)
+
+Results go to outputs/benchmarks/concurrency_scaling_<timestamp>.json, plus a
+PNG of the curves next to it. The plot needs matplotlib, which is only a
+benchmark dependency:
+
+    pip install -r benchmarks/requirements.txt
+
+    python -m benchmarks.concurrency_scaling --levels 1 10 50 100 500 --latency-ms 800
+    LLM_MAX_IN_FLIGHT=128 python -m benchmarks.concurrency_scaling --log-level INFO
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.fake_openai_server import FakeResponsesConfig, FakeResponsesServer
+from benchmarks.latency_matrix import (
+    OUTPUT_DIR,
+    SAMPLE_INPUTS,
+    git_commit,
+    isolate_latency_log,
+)
+
+LEVELS = (1, 5, 10, 25, 50, 100, 200, 500)
+LAG_INTERVAL = 0.05
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def current_rss():
+    """Resident set size in bytes (Linux), None elsewhere"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class LoopLagMonitor:
+    """
+    Measures how late a periodic sleep wakes up, i.e. how long the loop was blocked,
+    and samples the peak RSS while it runs
+    """
+
+    def __init__(self, interval=LAG_INTERVAL):
+        self.interval = interval
+        self.lags = []
+        self.task = None
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+
+    async def tick(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+            rss = current_rss()
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss, rss)
+
+    def __enter__(self):
+        self.task = asyncio.get_running_loop().create_task(self.tick())
+        return self
+
+    def __exit__(self, *exc_info):
+        self.task.cancel()
+
+    def stats(self):
+        return {
+            "lag_ms_p50": round(percentile(self.lags, 0.50) * 1000, 2),
+            "lag_ms_p99": round(percentile(self.lags, 0.99) * 1000, 2),
+            "lag_ms_max": round(max(self.lags, default=0.0) * 1000, 2),
+        }
+
+
+async def timed_report(pipeline, inputs):
+    """Seconds one report took, or the error it failed with"""
+    dag = pipeline.build_report_pipeline(
+        inputs["ignite_api_data"],
+        inputs["quicksight_data"],
+        inputs["zylo_v6_data"],
+        inputs["zylo_v6_post_content"],
+        inputs["msp_data"],
+        inputs["guidelines"],
+        use_preprocess_cache=False,
+    )
+    token = pipeline.run_usage_var.set(dag.usage)
+    start = time.perf_counter()
+    try:
+        await dag.run()
+    except Exception as e:
+        return None, str(e)
+    finally:
+        pipeline.run_usage_var.reset(token)
+    return time.perf_counter() - start, None
+
+
+def governor_waits(governor, admitted_before):
+    """p95 admission wait per model over the calls admitted since admitted_before"""
+    waits = {}
+    with governor.lock:
+        for model, admitted in governor.admitted.items():
+            new = admitted - admitted_before.get(model, 0)
+            if new > 0:
+                waits[model] = round(percentile(list(governor.waits[model])[-new:], 0.95), 3)
+    return waits
+
+
+async def run_level(pipeline, governor, inputs, concurrency, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+    admitted_before = dict(governor.admitted)
+    with LoopLagMonitor() as lag:
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(timed_report(pipeline, inputs) for _ in range(concurrency))
+        )
+        wall = time.perf_counter() - start
+
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        growth = peak - baseline
+    elif lag.start_rss is not None:
+        growth = lag.peak_rss - lag.start_rss
+    else:
+        growth = None
+    memory = {}
+    if growth is not None:
+        memory = {
+            "peak_mb": round(growth / 1024**2, 2),
+            "kb_per_report": round(growth / 1024 / concurrency, 1),
+        }
+
+    latencies = [seconds for seconds, error in outcomes if error is None]
+    errors = [error for _, error in outcomes if error is not None]
+    return {
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "reports_per_minute": round(len(latencies) / wall * 60, 2),
+        "latency_p50": round(percentile(latencies, 0.50), 3),
+        "latency_p95": round(percentile(latencies, 0.95), 3),
+        "latency_p99": round(percentile(latencies, 0.99), 3),
+        "latency_mean": round(statistics.mean(latencies), 3) if latencies else 0.0,
+        "failed": len(errors),
+        "first_error": errors[0] if errors else None,
+        **lag.stats(),
+        **memory,
+        "governor_p95_wait": governor_waits(governor, admitted_before),
+    }
+
+
+async def run_levels(levels, trace_memory):
+    # Chain modules create their chat models at import, after OPENAI_BASE_URL is set
+    pipeline = importlib.import_module("src.pipeline")
+    llm_cache = importlib.import_module("core.llm_cache")
+    governor = importlib.import_module("core.llm_governor").governor
+    inputs = {"guidelines": importlib.import_module("constants").guidelines, **SAMPLE_INPUTS}
+    # Identical inputs would otherwise be answered from the response cache
+    llm_cache.set_response_cache(llm_cache.NullResponseCache())
+    latency_dir = tempfile.TemporaryDirectory(prefix="concurrency_scaling_")
+    isolate_latency_log(latency_dir.name)
+    await importlib.import_module("core.llm_client").prewarm_connections()
+    # Import-time and first-call setup should not count against the first level
+    await timed_report(pipeline, inputs)
+
+    results = []
+    for concurrency in levels:
+        result = await run_level(pipeline, governor, inputs, concurrency, trace_memory)
+        results.append(result)
+        print(
+            f"{concurrency:>4} reports: {result['reports_per_minute']:>8.1f}/min  "
+            f"p50 {result['latency_p50']:.2f}s  p99 {result['latency_p99']:.2f}s  "
+            f"lag p99 {result['lag_ms_p99']:.1f}ms  failed {result['failed']}"
+        )
+    latency_dir.cleanup()
+    return results
+
+
+def plot(levels, output):
+    """Throughput, latency, loop lag and memory against concurrency, if matplotlib exists"""
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print(
+            "matplotlib is not installed, skipping the plot "
+            "(pip install -r benchmarks/requirements.txt)"
+        )
+        return None
+
+    concurrency = [level["concurrency"] for level in levels]
+    fig, axes = plt.subplots(2, 2, figsize=(12, 8))
+    axes[0][0].plot(concurrency, [level["reports_per_minute"] for level in levels], marker="o")
+    axes[0][0].set_title("Reports per minute")
+    for key in ("latency_p50", "latency_p95", "latency_p99"):
+        axes[0][1].plot(concurrency, [level[key] for level in levels], marker="o", label=key)
+    axes[0][1].set_title("Report latency (s)")
+    axes[0][1].legend()
+    for key in ("lag_ms_p50", "lag_ms_p99", "lag_ms_max"):
+        axes[1][0].plot(concurrency, [level[key] for level in levels], marker="o", label=key)
+    axes[1][0].set_title("Event-loop lag (ms)")
+    axes[1][0].legend()
+    axes[1][1].plot(
+        concurrency, [level.get("kb_per_report", 0) for level in levels], marker="o"
+    )
+    axes[1][1].set_title("Memory per in-flight report (KB)")
+    for ax in axes.flat:
+        ax.set_xscale("log")
+        ax.set_xlabel("Concurrent reports")
+        ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    path = output.with_suffix(".png")
+    fig.savefig(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--levels", nargs="+", type=int, default=list(LEVELS))
+    parser.add_argument("--base-url", help="Use an already running fake server")
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--jitter-ms", type=float, default=250.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="Measure memory with tracemalloc instead of RSS (exact, but slows reports down)",
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=args.log_level,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    server = None
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+    else:
+        config = FakeResponsesConfig(
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed
+        )
+        server = FakeResponsesServer(config).start()
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+
+    started_at = datetime.now()
+    try:
+        levels = asyncio.run(run_levels(args.levels, args.tracemalloc))
+    finally:
+        if server is not None:
+            server.stop()
+
+    best = max(levels, key=lambda level: level["reports_per_minute"])
+    result = {
+        "benchmark": "concurrency_scaling",
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "config": {
+            "base_url": os.environ["OPENAI_BASE_URL"],
+            "in_process_server": server is not None,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "memory": "tracemalloc" if args.tracemalloc else "rss",
+            "log_level": args.log_level,
+            "llm_max_in_flight": int(os.getenv("LLM_MAX_IN_FLIGHT", 32)),
+        },
+        "saturates_at": best["concurrency"],
+        "levels": levels,
+    }
+    output = args.output or OUTPUT_DIR / f"concurrency_scaling_{started_at:%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    plot_path = plot(levels, output)
+    print(
+        f"Peak throughput at {best['concurrency']} concurrent reports "
+        f"({best['reports_per_minute']:.1f}/min), results written to {output}"
+        + (f" and {plot_path}" if plot_path else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Connection setup cost per report: a fresh HTTP client per call (what every
+ChatOpenAI / Streamlit rerun used to pay) against the shared, prewarmed pool.
+
+Times DNS + TCP connect + TLS handshake for each request with httpx's trace
+hook, against OPENAI_BASE_URL (or --base-url, e.g. the local fake server).
+
+    python -m benchmarks.connect_time --calls-per-report 14 --reports 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+from core.llm_client import api_base_url, get_client_factory
+
+# preprocess (4) + category tie-break (1) + slides (7) + reasoning (2) + guidelines (1)
+CALLS_PER_REPORT = 15
+
+
+async def timed_request(client, url, headers):
+    """Seconds spent opening a connection for one request (0.0 when one was reused)"""
+    started = {}
+    durations = {}
+
+    async def trace(event_name, info):
+        step, _, phase = event_name.rpartition(".")
+        if phase == "started":
+            started[step] = time.perf_counter()
+        elif phase == "complete" and step in started:
+            durations[step] = time.perf_counter() - started[step]
+
+    start = time.perf_counter()
+    await client.get(url, headers=headers, extensions={"trace": trace})
+    total = time.perf_counter() - start
+    connect = sum(
+        seconds
+        for step, seconds in durations.items()
+        if step in ("connection.connect_tcp", "connection.start_tls")
+    )
+    return connect, total
+
+
+async def fresh_client_report(url, headers, calls):
+    results = []
+    for _ in range(calls):
+        async with httpx.AsyncClient() as client:
+            results.append(await timed_request(client, url, headers))
+    return results
+
+
+async def pooled_report(url, headers, calls):
+    client = get_client_factory().async_client
+    return [await timed_request(client, url, headers) for _ in range(calls)]
+
+
+def summarize(samples):
+    connects = [connect for connect, _ in samples]
+    totals = [total for _, total in samples]
+    return {
+        "connect_ms_per_call": round(statistics.mean(connects) * 1000, 2),
+        "request_ms_per_call": round(statistics.mean(totals) * 1000, 2),
+        "connections_opened": sum(1 for connect in connects if connect > 0),
+    }
+
+
+async def run(base_url, calls_per_report, reports):
+    url = f"{base_url}/models"
+    headers = {"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '')}"}
+
+    fresh = []
+    for _ in range(reports):
+        fresh.extend(await fresh_client_report(url, headers, calls_per_report))
+
+    prewarm_seconds = await get_client_factory().prewarm(base_url=base_url)
+    pooled = []
+    for _ in range(reports):
+        pooled.extend(await pooled_report(url, headers, calls_per_report))
+
+    fresh_summary = summarize(fresh)
+    pooled_summary = summarize(pooled)
+    saving = (
+        fresh_summary["connect_ms_per_call"] - pooled_summary["connect_ms_per_call"]
+    ) * calls_per_report
+    return {
+        "base_url": base_url,
+        "calls_per_report": calls_per_report,
+        "reports": reports,
+        "prewarm_ms": round(prewarm_seconds * 1000, 2),
+        "fresh_client": fresh_summary,
+        "pooled_client": pooled_summary,
+        "connect_ms_saved_per_report": round(saving, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default=api_base_url())
+    parser.add_argument("--calls-per-report", type=int, default=CALLS_PER_REPORT)
+    parser.add_argument("--reports", type=int, default=3)
+    args = parser.parse_args()
+    result = asyncio.run(run(args.base_url.rstrip("/"), args.calls_per_report, args.reports))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Local stand-in for the subset of the OpenAI Responses API that
+ChatOpenAI(use_responses_api=True) uses, for load and latency tests that must not
+spend quota:
+
+    POST /v1/responses   structured requests get a schema-valid fixture for the
+                         requested json_schema, plain ones (the guidelines chain)
+                         an empty JSON array
+    GET  /v1/models      used by connection prewarming
+    GET  /_stats         requests, injected errors and sampled latency per chain
+
+Latency is sampled per request (fixed, uniform, normal or lognormal around
+--latency-ms, or replayed per chain from a recorded outputs/chain_latency.jsonl),
+and 500s, 429s (with retry-after) and schema-invalid outputs can be injected at
+configurable rates. The chain is read from the request's prompt_cache_key.
+
+    python -m benchmarks.fake_openai_server --port 8765 --latency-ms 800 --rate-limit-rate 0.02
+
+Point the app at it through configuration alone:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake streamlit run main.py
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from core.schema_fixtures import fixture_from_schema
+
+logger = logging.getLogger(__name__)
+
+DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+
+def load_recorded_latencies(path):
+    """Seconds per chain from a LatencyTracker log, leaving out timed-out calls"""
+    latencies = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not entry.get("timed_out") and entry.get("seconds", 0) > 0:
+                latencies[entry["chain"]].append(entry["seconds"])
+    return dict(latencies)
+
+
+class FakeResponsesConfig:
+    """How the fake server behaves, every rate is a probability per request"""
+
+    def __init__(
+        self,
+        latency_ms=500.0,
+        jitter_ms=150.0,
+        distribution="lognormal",
+        recorded_latencies=None,
+        latency_scale=1.0,
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        retry_after=1.0,
+        invalid_rate=0.0,
+        seed=None,
+    ):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown distribution '{distribution}', expected one of {DISTRIBUTIONS}"
+            )
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.distribution = distribution
+        self.recorded_latencies = recorded_latencies or {}
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.invalid_rate = invalid_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample_latency(self, chain):
+        """Seconds to wait before answering a request of `chain`"""
+        with self.lock:
+            recorded = self.recorded_latencies.get(chain)
+            if recorded:
+                seconds = self.random.choice(recorded)
+            elif self.distribution == "fixed":
+                seconds = self.latency_ms / 1000
+            elif self.distribution == "uniform":
+                seconds = self.random.uniform(
+                    self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms
+                ) / 1000
+            elif self.distribution == "normal":
+                seconds = self.random.gauss(self.latency_ms, self.jitter_ms) / 1000
+            else:
+                # Same mean and spread as the normal, with the long right tail real APIs show
+                mean = max(self.latency_ms, 1e-9)
+                sigma = math.sqrt(math.log(1 + (self.jitter_ms / mean) ** 2))
+                mu = math.log(mean) - sigma**2 / 2
+                seconds = self.random.lognormvariate(mu, sigma) / 1000
+        return max(0.0, seconds * self.latency_scale)
+
+    def roll(self, rate):
+        if rate <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < rate
+
+
+def estimate_tokens(value):
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return len(text) // 4 + 1
+
+
+def response_body(request, text):
+    input_tokens = estimate_tokens(request.get("input", ""))
+    output_tokens = estimate_tokens(text)
+    reasoning_tokens = output_tokens if request.get("reasoning") else 0
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": request.get("model", "gpt-4.1"),
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "text": request.get("text") or {"format": {"type": "text"}},
+        "reasoning": request.get("reasoning"),
+        "temperature": request.get("temperature"),
+        "error": None,
+        "incomplete_details": None,
+        "instructions": None,
+        "metadata": {},
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens + reasoning_tokens,
+            "output_tokens_details": {"reasoning_tokens": reasoning_tokens},
+            "total_tokens": input_tokens + output_tokens + reasoning_tokens,
+        },
+    }
+
+
+def output_for(request, invalid=False):
+    """Fixture text for the request's requested output format"""
+    text_format = (request.get("text") or {}).get("format") or {}
+    if text_format.get("type") != "json_schema":
+        # Only the guidelines chain asks for free text, a JSON array of slide changes
+        return "not json" if invalid else "[]"
+    if invalid:
+        return json.dumps({"unexpected": True})
+    return json.dumps(fixture_from_schema(text_format["schema"]), ensure_ascii=False)
+
+
+class FakeResponsesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def send_json(self, status, data, headers=None):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            models = [{"id": "gpt-4.1", "object": "model"}]
+            self.send_json(200, {"object": "list", "data": models})
+        elif self.path == "/_stats":
+            self.send_json(200, self.server.stats())
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            error = {"message": str(e), "type": "invalid_request_error"}
+            self.send_json(400, {"error": error})
+            return
+        if not self.path.rstrip("/").endswith("/responses"):
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        config = self.server.config
+        chain = request.get("prompt_cache_key") or request.get("model", "unknown")
+        if config.roll(config.rate_limit_rate):
+            self.server.count(chain, "rate_limited")
+            self.send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                headers={"retry-after": str(config.retry_after)},
+            )
+            return
+
+        seconds = config.sample_latency(chain)
+        time.sleep(seconds)
+        if config.roll(config.error_rate):
+            self.server.count(chain, "errors", seconds)
+            error = {"message": "Injected server error", "type": "server_error"}
+            self.send_json(500, {"error": error})
+            return
+
+        invalid = config.roll(config.invalid_rate)
+        self.server.count(chain, "invalid" if invalid else "ok", seconds)
+        self.send_json(200, response_body(request, output_for(request, invalid)))
+
+
+class FakeResponsesServer(ThreadingHTTPServer):
+    """Threaded fake API, start() serves it from a background thread"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), FakeResponsesHandler)
+        self.config = config or FakeResponsesConfig()
+        self.stats_lock = threading.Lock()
+        self.counts = defaultdict(lambda: defaultdict(float))
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def handle_error(self, request, client_address):
+        # Clients drop requests they no longer need (hedged or cancelled calls)
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    def count(self, chain, outcome, seconds=0.0):
+        with self.stats_lock:
+            self.counts[chain]["requests"] += 1
+            self.counts[chain][outcome] += 1
+            self.counts[chain]["latency"] += seconds
+
+    def stats(self):
+        with self.stats_lock:
+            return {chain: dict(counts) for chain, counts in self.counts.items()}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI Responses API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=150.0)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal")
+    parser.add_argument(
+        "--recorded",
+        type=Path,
+        help="Replay per-chain latencies from a chain_latency.jsonl log",
+    )
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--invalid-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    config = FakeResponsesConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        distribution=args.distribution,
+        recorded_latencies=load_recorded_latencies(args.recorded) if args.recorded else None,
+        latency_scale=args.latency_scale,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        invalid_rate=args.invalid_rate,
+        seed=args.seed,
+    )
+    server = FakeResponsesServer(config, args.host, args.port)
+    logger.info(f"Fake Responses API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
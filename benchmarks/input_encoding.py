@@ -0,0 +1,267 @@
+"""
+Prompt tokens per chain with structured inputs rendered as Python reprs (the old
+behaviour) versus the compact encoding from core.serialization, plus parity checks.
+
+Inputs are built from a fixture report (a QuickSight table, Zylo deliveries and
+posts parsed and processed the way the pipeline does, and schema fixtures for the
+slides the reasoning chains read), or from a stored run's inputs.json (--inputs).
+
+Parity is checked in two ways:
+    lossless   every structured input decodes back from its encoding unchanged
+    --live     each chain is run with both encodings against the configured API
+               (OPENAI_BASE_URL / OPENAI_API_KEY), comparing schema validity and how
+               many numbers in the output can be found in the input
+
+    python -m benchmarks.input_encoding
+    python -m benchmarks.input_encoding --weeks 26 --live
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks.latency_matrix import OUTPUT_DIR, git_commit
+from core import serialization
+from core.schema_fixtures import fixture_from_schema
+from core.token_budget import TOKENIZER_ENCODING, prompt_tokens
+
+ENCODINGS = ("repr", "toon")
+# Chains that read the pasted source text rather than the parsed values
+PREPROCESS_CHAINS = (
+    "business_profile",
+    "social_stats",
+    "post_requests",
+    "delivery_dates",
+    "post_content",
+)
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def fixture_sources(weeks, seed=7):
+    """Raw QuickSight / Zylo inputs in the formats users paste, `weeks` weeks long"""
+    metrics = importlib.import_module("core.pydantic_class.preprocess_structure").SocialStats
+    start = date(2025, 6, 2)
+    labels = [(start + timedelta(weeks=week)).isoformat() for week in range(weeks)]
+    rows = ["| Metric | " + " | ".join(labels) + " |", "|---" * (weeks + 1) + "|"]
+    for index, metric in enumerate(metrics.model_fields):
+        values = []
+        for week in range(weeks):
+            value = (seed * (index + 3) * (week + 11)) % 997
+            if "ctr" in metric:
+                values.append(f"{value / 100:.2f}%")
+            elif (index + week) % 9 == 0:
+                values.append("-")
+            else:
+                values.append(f"{value:,}")
+        title = metric.replace("_", " ").title()
+        rows.append(f"| {title} | " + " | ".join(values) + " |")
+
+    deliveries = ["| Post Type | Date |", "|---|---|"] + [
+        f"| {'Social Post' if week % 3 else 'On Demand Post'} | {labels[week]} |"
+        for week in range(weeks)
+    ]
+    posts = [
+        f"{(start + timedelta(weeks=week)):%B} {week % 28 + 1} - "
+        f'"Week {week + 1} special: fresh sourdough, seasonal pies and coffee." (with image)'
+        for week in reversed(range(weeks))
+    ]
+    return {
+        "ignite_api_data": json.dumps(
+            {"business_name": "Sample Bakery", "industry": "Food", "location": "Austin, TX"}
+        ),
+        "quicksight_data": "\n".join(rows),
+        "zylo_v6_data": "\n".join(deliveries),
+        "zylo_v6_post_content": "\n".join(posts),
+        "msp_data": "Monthly social plan",
+    }
+
+
+def preprocessed(sources):
+    """What the preprocess stage makes of these inputs when every source parses locally"""
+    parsers = importlib.import_module("src.input_parsers")
+    process_data = importlib.import_module("src.preprocess_data_for_report").process_data
+    social_stats = parsers.parse_quicksight_table(sources["quicksight_data"]) or {}
+    return process_data(
+        {
+            "business_info": json.loads(sources["ignite_api_data"] or "{}"),
+            "about_this_business": "Neighbourhood bakery",
+            "social_stats": {
+                metric: series for metric, series in social_stats.items() if series["periods"]
+            },
+            "delivery_dates": parsers.parse_zylo_delivery_table(sources["zylo_v6_data"]) or [],
+            "recent_post_content": parsers.parse_zylo_post_content(
+                sources["zylo_v6_post_content"]
+            )
+            or [],
+        }
+    )
+
+
+def chain_inputs(registry, sources, new_response, slides):
+    """input_data for every registered chain, keyed by chain name"""
+    values = {
+        "quicksight_data": new_response["social_stats"],
+        "social_stats": new_response["social_stats"],
+        "ignite_payload": sources["ignite_api_data"],
+        "ignite_data": sources["ignite_api_data"],
+        "zylo_delivery_data": new_response["delivery_dates"],
+        "zylo_post_content": new_response["recent_post_content"],
+        "preprocessed_input": new_response,
+        "other_analysis": slides,
+        "report": slides,
+        "guidelines": importlib.import_module("constants").guidelines,
+    }
+    inputs = {}
+    for name in sorted(registry.specs):
+        source = sources if name in PREPROCESS_CHAINS else values
+        prompt = registry.spec(name)["prompt"]
+        inputs[name] = {key: source.get(key, "") for key in prompt.input_variables}
+    return inputs
+
+
+def slide_fixtures(registry, pipeline):
+    return {
+        name: fixture_from_schema(registry.spec(name)["schema"].model_json_schema())
+        for name in pipeline.get_all_slide_configs()
+        if registry.spec(name)["schema"] is not None
+    }
+
+
+def token_reduction(registry, inputs):
+    chains = {}
+    for name, input_data in inputs.items():
+        prompt = registry.spec(name)["prompt"]
+        tokens = {
+            encoding: prompt_tokens(prompt, input_data, encoding) for encoding in ENCODINGS
+        }
+        saved = tokens["repr"] - tokens["toon"]
+        chains[name] = {
+            "encoding": serialization.chain_encoding(name),
+            "repr_tokens": tokens["repr"],
+            "toon_tokens": tokens["toon"],
+            "saved_tokens": saved,
+            "reduction": round(saved / tokens["repr"], 3) if tokens["repr"] else 0.0,
+        }
+    return chains
+
+
+def lossless(inputs):
+    """Structured inputs that don't decode back to the value they were encoded from"""
+    failures = []
+    for name, input_data in inputs.items():
+        for key, value in input_data.items():
+            if isinstance(value, str):
+                continue
+            expected = json.loads(json.dumps(value, default=str))
+            if serialization.decode(serialization.encode(value)) != expected:
+                failures.append(f"{name}.{key}")
+    return failures
+
+
+def numbers_in(value):
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return {float(number) for number in NUMBER_PATTERN.findall(text.replace(",", ""))}
+
+
+async def live_parity(inputs, chains):
+    """Each chain's output under both encodings: did it validate, and how grounded it is"""
+    ainvoke_chain = importlib.import_module("core.chains.registry").ainvoke_chain
+    llm_cache = importlib.import_module("core.llm_cache")
+    llm_cache.set_response_cache(llm_cache.NullResponseCache())
+    parity = {}
+    for name in chains:
+        input_numbers = numbers_in(inputs[name])
+        parity[name] = {}
+        for encoding in ENCODINGS:
+            os.environ[f"LLM_INPUT_ENCODING_{name.upper()}"] = encoding
+            try:
+                output = await ainvoke_chain(name, inputs[name])
+            except Exception as e:
+                parity[name][encoding] = {"valid": False, "error": str(e)[:300]}
+                continue
+            cited = numbers_in(output)
+            parity[name][encoding] = {
+                "valid": True,
+                "numbers_cited": len(cited),
+                "grounded": round(len(cited & input_numbers) / len(cited), 3) if cited else 1.0,
+            }
+        os.environ.pop(f"LLM_INPUT_ENCODING_{name.upper()}")
+    return parity
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=13, help="Weeks of fixture data")
+    parser.add_argument("--inputs", type=Path, help="inputs.json of a stored run")
+    parser.add_argument("--live", action="store_true", help="Also run the chains (costs quota)")
+    parser.add_argument("--chains", nargs="+", help="Chains to run with --live")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    pipeline = importlib.import_module("src.pipeline")
+    registry = importlib.import_module("core.chains.registry").chain_registry
+    sources = fixture_sources(args.weeks)
+    if args.inputs:
+        with open(args.inputs, encoding="utf-8") as f:
+            stored = json.load(f)
+        sources = {field: stored.get(field) or "" for field in sources}
+
+    new_response = preprocessed(sources)
+    inputs = chain_inputs(registry, sources, new_response, slide_fixtures(registry, pipeline))
+    chains = token_reduction(registry, inputs)
+    failures = lossless(inputs)
+
+    for name, stats in sorted(chains.items(), key=lambda item: -item[1]["saved_tokens"]):
+        print(
+            f"{name:<28} {stats['repr_tokens']:>7} -> {stats['toon_tokens']:>7} tokens "
+            f"({stats['reduction']:.1%} fewer)"
+            + ("" if stats["encoding"] == "toon" else f", sent as {stats['encoding']}")
+        )
+    print("Lossless: " + ("all inputs round-trip" if not failures else ", ".join(failures)))
+
+    started_at = datetime.now()
+    parity = None
+    if args.live:
+        live_chains = args.chains or [
+            name for name, stats in chains.items() if stats["saved_tokens"]
+        ]
+        parity = asyncio.run(live_parity(inputs, live_chains))
+
+    total_repr = sum(stats["repr_tokens"] for stats in chains.values())
+    total_toon = sum(stats["toon_tokens"] for stats in chains.values())
+    result = {
+        "benchmark": "input_encoding",
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "config": {
+            "inputs": str(args.inputs) if args.inputs else f"fixture ({args.weeks} weeks)",
+            "tokenizer": TOKENIZER_ENCODING,
+        },
+        "total": {
+            "repr_tokens": total_repr,
+            "toon_tokens": total_toon,
+            "reduction": round(1 - total_toon / total_repr, 3) if total_repr else 0.0,
+        },
+        "chains": chains,
+        "lossless_failures": failures,
+        "live_parity": parity,
+    }
+    output = args.output or OUTPUT_DIR / f"input_encoding_{started_at:%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(
+        f"All chains: {total_repr} -> {total_toon} prompt tokens "
+        f"({result['total']['reduction']:.1%} fewer), results written to {output}"
+    )
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
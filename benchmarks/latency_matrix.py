@@ -0,0 +1,268 @@
+"""
+End-to-end latency of the report pipeline for every cohort x trend category plan.
+
+Runs the full pipeline headlessly against the in-process fake Responses API
+(benchmarks/fake_openai_server.py), with per-chain latencies replayed from a
+recorded chain_latency.jsonl when one is given (--recorded) or sampled around
+--latency-ms otherwise. The cohort and category nodes still run, but their result
+is overridden so each plan from get_slide_functions is exercised.
+
+For every combination it reports wall time, the critical path, and LLM calls and
+tokens per pipeline stage, and writes everything to a JSON file
+(outputs/benchmarks/latency_matrix_<timestamp>.json by default) so runs can be compared.
+
+    python -m benchmarks.latency_matrix --repeat 3 --recorded outputs/chain_latency.jsonl
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.fake_openai_server import (
+    FakeResponsesConfig,
+    FakeResponsesServer,
+    load_recorded_latencies,
+)
+
+COHORTS = ("1", "2", "5", "6a", "6b", "7a", "7b", "8")
+CATEGORIES = ("uptrend", "downtrend")
+OUTPUT_DIR = Path("outputs") / "benchmarks"
+
+# Minimal inputs with every source present, see --inputs for a stored run's inputs.json
+SAMPLE_INPUTS = {
+    "ignite_api_data": json.dumps(
+        {"business_name": "Sample Bakery", "industry": "Food", "location": "Austin, TX"}
+    ),
+    "quicksight_data": (
+        "| period_type | period_label | metric | raw_value |\n"
+        "|---|---|---|---|\n"
+        "| week | 2025-09-01 | facebook_posts | 4 |\n"
+        "| week | 2025-09-08 | facebook_posts | 6 |\n"
+    ),
+    "zylo_v6_data": "Social Post | 2025-09-02 | Resolved\nSocial Post | 2025-09-09 | Resolved",
+    "zylo_v6_post_content": "Fresh sourdough every Friday!",
+    "msp_data": "Monthly social plan",
+}
+
+# Chains run inside a pipeline node other than the one sharing their name
+CHAIN_STAGES = {
+    "business_profile": "preprocess",
+    "social_stats": "preprocess",
+    "delivery_dates": "preprocess",
+    "post_content": "preprocess",
+    "ads_score": "cohort",
+    "guidelines": "report",
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def isolate_latency_log(directory):
+    """
+    Record chain latencies under `directory` instead of the app's LATENCY_LOG, and
+    forget the samples loaded from it, so fake-server timings never set the p95
+    production calls are hedged at (and production timings don't hedge benchmark calls)
+    """
+    tracker = importlib.import_module("core.latency").latency_tracker
+    with tracker.lock:
+        tracker.log_path = Path(directory) / "chain_latency.jsonl"
+        tracker.durations.clear()
+        tracker.counts.clear()
+
+
+def stage_for(chain, slide_names):
+    if chain in slide_names:
+        return f"slide:{chain}"
+    return CHAIN_STAGES.get(chain, chain)
+
+
+def forced(func, value):
+    """Run a node as usual (so its calls are timed) but return `value`"""
+
+    async def node(results):
+        result = await func(results)
+        if isinstance(value, dict) and isinstance(result, dict):
+            return {**result, **value}
+        return value
+
+    return node
+
+
+async def run_combination(pipeline, inputs, cohort, category):
+    dag = pipeline.build_report_pipeline(
+        inputs["ignite_api_data"],
+        inputs["quicksight_data"],
+        inputs["zylo_v6_data"],
+        inputs["zylo_v6_post_content"],
+        inputs["msp_data"],
+        inputs["guidelines"],
+        # Preprocess is measured on every run, and fake snapshots stay out of the cache
+        use_preprocess_cache=False,
+    )
+    dag.nodes["cohort"]["func"] = forced(dag.nodes["cohort"]["func"], cohort)
+    dag.nodes["category"]["func"] = forced(
+        dag.nodes["category"]["func"], {"category": category}
+    )
+
+    token = pipeline.run_usage_var.set(dag.usage)
+    start = time.perf_counter()
+    try:
+        results = await dag.run()
+    finally:
+        pipeline.run_usage_var.reset(token)
+    wall = time.perf_counter() - start
+
+    slide_names = set(pipeline.get_all_slide_configs())
+    stages = {}
+    for record in dag.usage.report()["calls"]:
+        stage = stages.setdefault(
+            stage_for(record["chain"], slide_names),
+            {"llm_calls": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+        )
+        stage["llm_calls"] += 1
+        for field in ("input_tokens", "output_tokens", "total_tokens"):
+            stage[field] += record[field]
+
+    critical_path = dag.critical_path()
+    last_step = critical_path[-1] if critical_path else {"start": 0.0, "duration": 0.0}
+    return {
+        "wall_seconds": round(wall, 3),
+        "critical_path_seconds": round(last_step["start"] + last_step["duration"], 3),
+        "critical_path": critical_path,
+        "slides": sorted(results["slides"]),
+        "llm_calls": sum(stage["llm_calls"] for stage in stages.values()),
+        "total_tokens": sum(stage["total_tokens"] for stage in stages.values()),
+        "stages": dict(sorted(stages.items())),
+    }
+
+
+def summarize(runs):
+    walls = sorted(run["wall_seconds"] for run in runs)
+    last = runs[-1]
+    return {
+        "wall_seconds_median": round(statistics.median(walls), 3),
+        "wall_seconds_max": walls[-1],
+        "critical_path_seconds_median": round(
+            statistics.median(run["critical_path_seconds"] for run in runs), 3
+        ),
+        "critical_path": " -> ".join(step["name"] for step in last["critical_path"]),
+        "slides": last["slides"],
+        "llm_calls": last["llm_calls"],
+        "total_tokens": last["total_tokens"],
+        "stages": last["stages"],
+        "runs": runs,
+    }
+
+
+async def run_matrix(inputs, cohorts, categories, repeat, warmup):
+    # Chain modules create their chat models at import, after OPENAI_BASE_URL is set
+    pipeline = importlib.import_module("src.pipeline")
+    llm_cache = importlib.import_module("core.llm_cache")
+    pipeline_inputs = {"guidelines": importlib.import_module("constants").guidelines, **inputs}
+    # Every run has to reach the (fake) API
+    llm_cache.set_response_cache(llm_cache.NullResponseCache())
+    latency_dir = tempfile.TemporaryDirectory(prefix="latency_matrix_")
+    isolate_latency_log(latency_dir.name)
+
+    # Like the app: pooled connections opened up front, first-call setup paid once
+    await importlib.import_module("core.llm_client").prewarm_connections()
+    for _ in range(warmup):
+        await run_combination(pipeline, pipeline_inputs, cohorts[0], categories[0])
+
+    matrix = {}
+    for cohort in cohorts:
+        for category in categories:
+            runs = [
+                await run_combination(pipeline, pipeline_inputs, cohort, category)
+                for _ in range(repeat)
+            ]
+            matrix[f"{cohort}/{category}"] = summarize(runs)
+            print(
+                f"cohort {cohort:>2} {category:<9} "
+                f"wall {matrix[f'{cohort}/{category}']['wall_seconds_median']:.2f}s "
+                f"calls {runs[-1]['llm_calls']}"
+            )
+    latency_dir.cleanup()
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="Unrecorded runs first")
+    parser.add_argument("--cohorts", nargs="+", default=list(COHORTS))
+    parser.add_argument("--categories", nargs="+", default=list(CATEGORIES))
+    parser.add_argument("--recorded", type=Path, help="chain_latency.jsonl to replay")
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--jitter-ms", type=float, default=250.0)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--inputs", type=Path, help="inputs.json of a stored run")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    inputs = SAMPLE_INPUTS
+    if args.inputs:
+        with open(args.inputs, encoding="utf-8") as f:
+            stored = json.load(f)
+        inputs = {field: stored.get(field) or "" for field in SAMPLE_INPUTS}
+
+    config = FakeResponsesConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        recorded_latencies=load_recorded_latencies(args.recorded) if args.recorded else None,
+        latency_scale=args.latency_scale,
+        seed=args.seed,
+    )
+    with FakeResponsesServer(config) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        started_at = datetime.now()
+        matrix = asyncio.run(
+            run_matrix(inputs, args.cohorts, args.categories, args.repeat, args.warmup)
+        )
+        server_stats = server.stats()
+
+    result = {
+        "benchmark": "latency_matrix",
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "config": {
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "recorded": str(args.recorded) if args.recorded else None,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "latency_scale": args.latency_scale,
+            "seed": args.seed,
+            "inputs": str(args.inputs) if args.inputs else "sample",
+            "hedging": os.getenv("LLM_HEDGING", "1") != "0",
+        },
+        "slowest": max(matrix, key=lambda combo: matrix[combo]["wall_seconds_median"]),
+        "matrix": matrix,
+        "fake_server": server_stats,
+    }
+    output = args.output or OUTPUT_DIR / f"latency_matrix_{started_at:%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Slowest plan: {result['slowest']}, results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import asyncio
+import functools
+import json
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+
+import openai
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from core.schema_fixtures import fixture_from_schema
+from core.usage import call_record, record_call, run_usage_var, usage_from_response_body
+
+logger = logging.getLogger(__name__)
+
+BATCH_DIR = Path("outputs") / "batch_requests"
+
+# Set while chains should queue their structured-output requests instead of calling the API
+batch_collector = ContextVar("batch_collector", default=None)
+
+MESSAGE_ROLES = {SystemMessage: "system", HumanMessage: "user", AIMessage: "assistant"}
+
+
+@functools.lru_cache(maxsize=None)
+def text_format_for(schema):
+    """Strict json_schema text format for a pydantic class, as the SDK sends it"""
+    function = openai.pydantic_function_tool(schema)["function"]
+    return {
+        "type": "json_schema",
+        "name": function["name"],
+        "schema": function["parameters"],
+        "strict": True,
+    }
+
+
+def build_request_body(llm, prompt, schema, input_data, cache_key=None):
+    """Responses API request body equivalent to `prompt | llm.with_structured_output(schema)`"""
+    messages = prompt.format_messages(**input_data)
+    body = {
+        "model": llm.model_name,
+        "input": [
+            {"role": MESSAGE_ROLES.get(type(message), "user"), "content": message.content}
+            for message in messages
+        ],
+        "text": {"format": text_format_for(schema)},
+    }
+    if getattr(llm, "reasoning_effort", None):
+        body["reasoning"] = {"effort": llm.reasoning_effort}
+    elif llm.temperature is not None:
+        body["temperature"] = llm.temperature
+    if cache_key:
+        body["prompt_cache_key"] = cache_key
+    return body
+
+
+def output_text(response_body):
+    """Concatenated output_text of a Responses API response body"""
+    return "".join(
+        content.get("text", "")
+        for item in response_body.get("output", [])
+        if item.get("type") == "message"
+        for content in item.get("content", [])
+        if content.get("type") == "output_text"
+    )
+
+
+class BatchRequestCollector:
+    """Queues structured-output requests and resolves them from one batch job per flush"""
+
+    def __init__(self, service, workdir=BATCH_DIR):
+        self.service = service
+        self.workdir = Path(workdir)
+        self.pending = {}
+        self.last_submit = time.monotonic()
+
+    async def submit(self, llm, prompt, schema, input_data, cache_key=None):
+        custom_id = f"req-{uuid.uuid4().hex}"
+        future = asyncio.get_running_loop().create_future()
+        self.pending[custom_id] = {
+            "body": build_request_body(llm, prompt, schema, input_data, cache_key),
+            "schema": schema,
+            "future": future,
+            # Results are ingested outside the submitting report's context
+            "chain": cache_key or schema.__name__,
+            "run_usage": run_usage_var.get(),
+            "submitted_at": time.perf_counter(),
+        }
+        self.last_submit = time.monotonic()
+        return await future
+
+    async def flush(self):
+        requests, self.pending = self.pending, {}
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        batch_name = uuid.uuid4().hex[:12]
+        input_path = self.workdir / f"{batch_name}_input.jsonl"
+        output_path = self.workdir / f"{batch_name}_output.jsonl"
+
+        with open(input_path, "w", encoding="utf-8") as f:
+            for custom_id, request in requests.items():
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/responses",
+                    "body": request["body"],
+                }
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        logger.info(f"Submitting batch {batch_name} with {len(requests)} requests")
+
+        try:
+            await self.service.run(input_path, output_path)
+            self.ingest(output_path, requests)
+        except Exception as e:
+            for request in requests.values():
+                if not request["future"].done():
+                    request["future"].set_exception(e)
+            return
+
+        for custom_id, request in requests.items():
+            if not request["future"].done():
+                request["future"].set_exception(
+                    RuntimeError(f"No result for {custom_id} in batch {batch_name}")
+                )
+
+    def ingest(self, output_path, requests):
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                request = requests.get(result.get("custom_id"))
+                if request is None or request["future"].done():
+                    continue
+                response = result.get("response") or {}
+                body = response.get("body") or {}
+                failed = result.get("error") or response.get("status_code") != 200
+                record_call(
+                    call_record(
+                        request["chain"],
+                        body.get("model") or request["body"]["model"],
+                        usage_from_response_body(body.get("usage")),
+                        time.perf_counter() - request["submitted_at"],
+                        error=str(result.get("error") or body) if failed else None,
+                        batch=True,
+                    ),
+                    request["run_usage"],
+                )
+                if failed:
+                    error = result.get("error") or response.get("body")
+                    request["future"].set_exception(RuntimeError(f"Batch request failed: {error}"))
+                    continue
+                try:
+                    parsed = request["schema"].model_validate_json(
+                        output_text(response["body"])
+                    )
+                    request["future"].set_result(json.loads(parsed.model_dump_json()))
+                except Exception as e:
+                    request["future"].set_exception(e)
+
+
+class OpenAIBatchService:
+    """Submits a request file to the OpenAI Batch API and waits for its results"""
+
+    def __init__(self, client=None, poll_interval=30, completion_window="24h"):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    async def run(self, input_path, output_path):
+        client = self.client or openai.AsyncOpenAI()
+        with open(input_path, "rb") as f:
+            input_file = await client.files.create(file=f, purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/responses",
+            completion_window=self.completion_window,
+        )
+        logger.info(f"Batch {batch.id} submitted")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(self.poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+            logger.info(f"Batch {batch.id}: {batch.status} {batch.request_counts}")
+
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+
+        # Successful and failed requests come back in separate files
+        with open(output_path, "wb") as f:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    content = await client.files.content(file_id)
+                    f.write(content.content)
+
+
+class LocalBatchService:
+    """
+    Stand-in for the Batch API: reads the request file and writes a result file in
+    the same format, answering each request with responder(body) (a JSON-serializable
+    value). Defaults to a schema-valid fixture for the requested output schema.
+    """
+
+    def __init__(self, responder=None):
+        self.responder = responder or (
+            lambda body: fixture_from_schema(body["text"]["format"]["schema"])
+        )
+
+    async def run(self, input_path, output_path):
+        with open(input_path, encoding="utf-8") as src, open(
+            output_path, "w", encoding="utf-8"
+        ) as dst:
+            for line in src:
+                request = json.loads(line)
+                text = json.dumps(self.responder(request["body"]), ensure_ascii=False)
+                result = {
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "request_id": uuid.uuid4().hex,
+                        "body": {
+                            "object": "response",
+                            "model": request["body"]["model"],
+                            "status": "completed",
+                            "output": [
+                                {
+                                    "type": "message",
+                                    "role": "assistant",
+                                    "content": [{"type": "output_text", "text": text}],
+                                }
+                            ],
+                        },
+                    },
+                    "error": None,
+                }
+                dst.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+async def gather_in_batch(*aws, service=None, workdir=BATCH_DIR, settle_seconds=1.0):
+    """
+    asyncio.gather, except every request the coroutines make to a chain registered
+    with batch=True is queued and sent as one batch job once no new request has
+    arrived for settle_seconds. Repeats for as many rounds as the coroutines need.
+    Jobs run in the background, so requests made while one is pending go out in the
+    next job instead of waiting for it to finish.
+    """
+    collector = BatchRequestCollector(service or OpenAIBatchService(), workdir)
+    token = batch_collector.set(collector)
+    try:
+        # Tasks copy the current context, so they all see the collector
+        tasks = [asyncio.ensure_future(aw) for aw in aws]
+    finally:
+        batch_collector.reset(token)
+
+    flushes = set()
+    try:
+        while not all(task.done() for task in tasks):
+            # Like gather, fail as soon as one coroutine fails: the others may be
+            # waiting on it (workers on a feed that never sends their sentinel)
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+            quiet_for = time.monotonic() - collector.last_submit
+            if collector.pending and quiet_for >= settle_seconds:
+                flush = asyncio.ensure_future(collector.flush())
+                flushes.add(flush)
+                flush.add_done_callback(flushes.discard)
+            await asyncio.sleep(0.05)
+    finally:
+        for task in [*tasks, *flushes]:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, *flushes, return_exceptions=True)
+
+    return [task.result() for task in tasks]
@@ -1,10 +1,10 @@
 from typing import Annotated, List
 from pydantic import BaseModel, Field
 
-from langchain_openai import ChatOpenAI
+from core.llm_client import get_chat_model
 from dotenv import load_dotenv
-import json
 
+from core.chains.registry import register_chain, ainvoke_chain
 from core.prompts.general_cohort_prompts.reasoning_slides import (
     quick_action_prompt,
     closing_statement_prompt,
@@ -64,28 +64,23 @@ class ClosingStatement(BaseModel):
     ]
 
 
-llm = ChatOpenAI(
-    temperature=0, model="gpt-5.1", reasoning_effort="medium", use_responses_api=True
-)
+llm = get_chat_model(temperature=0, model="gpt-5.1", reasoning_effort="medium")
+
+register_chain("quick_action", llm, quick_action_prompt, QuickActionsForYouSlide, batch=True)
+register_chain("closing_statement", llm, closing_statement_prompt, ClosingStatement, batch=True)
 
 
 async def quick_action_reasoning_chain(preprocessed_input, other_analysis):
-    llmr = llm.with_structured_output(QuickActionsForYouSlide)
-    achain = quick_action_prompt | llmr
     input_data = {
         "preprocessed_input": preprocessed_input,
         "other_analysis": other_analysis,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("quick_action", input_data)
 
 
 async def closing_statement_chain(preprocessed_input, other_analysis):
-    llmr = llm.with_structured_output(ClosingStatement)
-    achain = closing_statement_prompt | llmr
     input_data = {
         "preprocessed_input": preprocessed_input,
         "other_analysis": other_analysis,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("closing_statement", input_data)
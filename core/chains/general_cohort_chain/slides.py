@@ -1,6 +1,5 @@
-from langchain_openai import ChatOpenAI
+from core.llm_client import get_chat_model
 from dotenv import load_dotenv
-import json
 
 from core.prompts.general_cohort_prompts.slides import (
     business_info_extraction_prompt,
@@ -36,107 +35,119 @@ from core.pydantic_class.general_cohort_report.slide_growth_at_glance import (
 from core.pydantic_class.general_cohort_report.slide_what_drove_these_results import (
     WhatDroveTheseResultsReport,
 )
+from core.chains.registry import register_chain, ainvoke_chain
 import logging
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-llm = ChatOpenAI(model="gpt-4.1", temperature=0, use_responses_api=True, max_retries=3)
+llm = get_chat_model(model="gpt-4.1", temperature=0, max_retries=3)
+
+register_chain("intro_slide", llm, business_info_extraction_prompt, MarketingReport, batch=True)
+register_chain(
+    "here_is_what_we_delivered",
+    llm,
+    here_is_what_we_delivered_prompt,
+    DeliveryTimelineSlide,
+    batch=True,
+)
+register_chain(
+    "how_your_ads_performed",
+    llm,
+    how_your_ads_performed_prompt,
+    AdsPerformanceReport,
+    batch=True,
+)
+register_chain("action_plan_next_month", llm, action_plan_prompt, ActionPlanReport, batch=True)
+register_chain(
+    "areas_that_need_attention",
+    llm,
+    areas_needing_attention_prompt,
+    AreasNeedingAttentionReport,
+    batch=True,
+)
+register_chain(
+    "performance_summary",
+    llm,
+    performance_summary_prompt,
+    PerformanceOverviewReport,
+    batch=True,
+)
+register_chain("big_wins_this_month", llm, big_wins_prompt, BigWinsReport, batch=True)
+register_chain("growth_at_glance", llm, growth_at_glance_prompt, GrowthAtGlanceReport, batch=True)
+register_chain(
+    "what_drove_results",
+    llm,
+    what_drove_results_prompt,
+    WhatDroveTheseResultsReport,
+    batch=True,
+)
 
 
 async def slide1_introduction_chain(ignite_payload, quicksight_data):
-    llmr = llm.with_structured_output(MarketingReport)
-    achain = business_info_extraction_prompt | llmr
     input_data = {
         "quicksight_data": quicksight_data,
         "ignite_payload": ignite_payload,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("intro_slide", input_data)
 
 
 async def here_is_what_we_delivered_chain(zylo_v6_data_json, zylo_v6_post_content):
-    llmr = llm.with_structured_output(DeliveryTimelineSlide)
-    achain = here_is_what_we_delivered_prompt | llmr
     input_data = {
         "zylo_delivery_data": zylo_v6_data_json,
         "zylo_post_content": zylo_v6_post_content,
     }
-    response = await achain.ainvoke(input_data)
-    response = json.loads(response.model_dump_json())
-
-    return response
+    return await ainvoke_chain("here_is_what_we_delivered", input_data)
 
 
 # In core/chains/general_cohort_chain/slides.py
 
 
 async def how_your_ads_performed_chain(quicksight_data):
-    llmr = llm.with_structured_output(AdsPerformanceReport)
-    achain = how_your_ads_performed_prompt | llmr
     input_data = {
         "quicksight_data": quicksight_data,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("how_your_ads_performed", input_data)
 
 
 async def action_plan_next_month_chain(quicksight_data):
-    llmr = llm.with_structured_output(ActionPlanReport)
-    achain = action_plan_prompt | llmr
     input_data = {
         "quicksight_data": quicksight_data,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("action_plan_next_month", input_data)
 
 
 async def areas_needing_attention_chain(quicksight_data):
-    llmr = llm.with_structured_output(AreasNeedingAttentionReport)
-    achain = areas_needing_attention_prompt | llmr
     input_data = {
         "quicksight_data": quicksight_data,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("areas_that_need_attention", input_data)
 
 
 async def performence_summary_chain(quicksight_data):
-    llmr = llm.with_structured_output(PerformanceOverviewReport)
-    achain = performance_summary_prompt | llmr
     input_data = {
         "quicksight_data": quicksight_data,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("performance_summary", input_data)
 
 
 async def big_wins_chain(quicksight_data):
-    llmr = llm.with_structured_output(BigWinsReport)
-    achain = big_wins_prompt | llmr
     input_data = {
         "quicksight_data": quicksight_data,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("big_wins_this_month", input_data)
 
 
 async def growth_at_glance_chain(quicksight_data):
-    llmr = llm.with_structured_output(GrowthAtGlanceReport)
-    achain = growth_at_glance_prompt | llmr
     input_data = {
         "quicksight_data": quicksight_data,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("growth_at_glance", input_data)
 
 
 async def what_drove_results_chain(quicksight_data, ignite_payload):
-    llmr = llm.with_structured_output(WhatDroveTheseResultsReport)
-    achain = what_drove_results_prompt | llmr
     input_data = {
         "quicksight_data": quicksight_data,
         "ignite_data": ignite_payload,
     }
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("what_drove_results", input_data)
@@ -1,13 +1,24 @@
-from langchain_openai import ChatOpenAI
+from core.llm_client import get_chat_model
 from langchain_core.output_parsers import JsonOutputParser
 from dotenv import load_dotenv
+import json
 import logging
 from core.prompts.guidelines_prompts import report_validation_prompt
+from core.chains.registry import register_chain, ainvoke_chain
 
 load_dotenv()
 
 
-llm = ChatOpenAI(temperature=0, model="gpt-4.1", use_responses_api=True, max_retries=3)
+llm = get_chat_model(temperature=0, model="gpt-4.1", max_retries=3)
+
+register_chain("guidelines", llm, report_validation_prompt, parser=JsonOutputParser())
+
+
+def render_guidelines(guidelines):
+    """Byte-identical text for the same guidelines, so they stay in the cached prompt prefix"""
+    if isinstance(guidelines, str):
+        return guidelines
+    return json.dumps(guidelines, indent=2, sort_keys=True, ensure_ascii=False)
 
 
 def update_report_with_changes(final_report, changes, verbose=True):
@@ -76,9 +87,11 @@ def update_report_with_changes(final_report, changes, verbose=True):
 async def changes_after_checking_guidelines(guidelines, final_report, max_retries=3):
     for attempt in range(max_retries):
         try:
-            achain = report_validation_prompt | llm | JsonOutputParser()
-            input_data = {"report": final_report, "guidelines": guidelines}
-            response = await achain.ainvoke(input_data)
+            input_data = {
+                "report": final_report,
+                "guidelines": render_guidelines(guidelines),
+            }
+            response = await ainvoke_chain("guidelines", input_data)
             return response
         except Exception as e:
             if attempt == max_retries - 1:
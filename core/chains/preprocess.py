@@ -1,18 +1,27 @@
-from langchain_openai import ChatOpenAI
+from core.llm_client import get_chat_model
 from dotenv import load_dotenv
-import json
+import asyncio
 
 
 from core.prompts.preprocess import (
-    data_structuring_prompt,
+    business_profile_prompt,
+    social_stats_prompt,
+    post_requests_prompt,
+    delivery_dates_prompt,
+    post_content_prompt,
     trend_analysis_prompt,
     ads_presence_prompt,
 )
 from core.pydantic_class.preprocess_structure import (
-    BusinessSnapshot,
+    BusinessProfile,
+    SocialStats,
+    PostRequests,
+    DeliveryDates,
+    RecentPostContent,
     CategoryIdentification,
     AdsScore,
 )
+from core.chains.registry import register_chain, ainvoke_chain
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,39 +29,111 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 
-llm = ChatOpenAI(model="gpt-4.1", temperature=0, use_responses_api=True, max_retries=3)
+llm = get_chat_model(model="gpt-4.1", temperature=0, max_retries=3)
+
+register_chain("business_profile", llm, business_profile_prompt, BusinessProfile)
+register_chain("social_stats", llm, social_stats_prompt, SocialStats)
+register_chain("post_requests", llm, post_requests_prompt, PostRequests)
+register_chain("delivery_dates", llm, delivery_dates_prompt, DeliveryDates)
+register_chain("post_content", llm, post_content_prompt, RecentPostContent)
+register_chain("category", llm, trend_analysis_prompt, CategoryIdentification)
+register_chain("ads_score", llm, ads_presence_prompt, AdsScore)
+
+
+def has_content(data):
+    return bool(data and str(data).strip())
+
+
+async def business_profile_chain(ignite_api_data):
+    input_data = {"ignite_api_data": ignite_api_data}
+    return await ainvoke_chain("business_profile", input_data)
+
+
+async def social_stats_chain(quick_sight_data, msp_data):
+    input_data = {"quicksight_data": quick_sight_data, "msp_data": msp_data}
+    return await ainvoke_chain("social_stats", input_data)
+
+
+async def post_requests_chain(ignite_api_data):
+    # Ignite is the source of the on-demand / ongoing post request counts
+    input_data = {"ignite_api_data": ignite_api_data}
+    return await ainvoke_chain("post_requests", input_data)
+
+
+async def delivery_dates_chain(zylo_v6_data):
+    input_data = {"zylo_v6_data": zylo_v6_data}
+    response = await ainvoke_chain("delivery_dates", input_data)
+    return response["delivery_dates"]
+
+
+async def post_content_chain(zylo_v6_post_content):
+    input_data = {"zylo_v6_post_content": zylo_v6_post_content}
+    response = await ainvoke_chain("post_content", input_data)
+    return response["recent_post_content"]
+
+
+async def empty_result(value):
+    return value
 
 
 async def preprocess_chain(
     ignite_api_data, quick_sight_data, zylo_v6_data, msp_data, zylo_v6_post_content
 ):
-    llmr = llm.with_structured_output(BusinessSnapshot)
-    achain = data_structuring_prompt | llmr
+    """
+    Structures every source with its own small extraction call, run concurrently,
+    and assembles the results into the BusinessSnapshot shape.
+    Sources that are empty skip their call entirely, so the full SocialStats call
+    only runs when QuickSight or MSP text still needs the model.
+    """
     logger.info(f"Zylo post content \n {zylo_v6_post_content}")
-    input_data = {
-        "quicksight_data": quick_sight_data,
-        "ignite_api_data": ignite_api_data,
-        "zylo_v6_data": zylo_v6_data,
-        "msp_data": msp_data,
-        "zylo_v6_post_content": zylo_v6_post_content,
+    empty_profile = {"business_info": {}, "about_this_business": None}
+    empty_stats = {field: {"periods": []} for field in SocialStats.model_fields}
+
+    empty_requests = {field: {"periods": []} for field in PostRequests.model_fields}
+
+    (
+        profile,
+        social_stats,
+        post_requests,
+        delivery_dates,
+        recent_post_content,
+    ) = await asyncio.gather(
+        business_profile_chain(ignite_api_data)
+        if has_content(ignite_api_data)
+        else empty_result(empty_profile),
+        social_stats_chain(quick_sight_data, msp_data)
+        if has_content(quick_sight_data) or has_content(msp_data)
+        else empty_result(empty_stats),
+        post_requests_chain(ignite_api_data)
+        if has_content(ignite_api_data)
+        else empty_result(empty_requests),
+        delivery_dates_chain(zylo_v6_data)
+        if has_content(zylo_v6_data)
+        else empty_result([]),
+        post_content_chain(zylo_v6_post_content)
+        if has_content(zylo_v6_post_content)
+        else empty_result(None),
+    )
+
+    response = {
+        "business_info": profile["business_info"],
+        "about_this_business": profile["about_this_business"],
+        "social_stats": {
+            **social_stats,
+            **{metric: series for metric, series in post_requests.items() if series["periods"]},
+        },
+        "delivery_dates": delivery_dates,
+        "recent_post_content": recent_post_content,
     }
-    response = await achain.ainvoke(input_data)
-    response = json.loads(response.model_dump_json())
     logger.info(f"Response from Chain \n {response}")
     return response
 
 
 async def category_chain(social_stats):
-    llmr = llm.with_structured_output(CategoryIdentification)
-    achain = trend_analysis_prompt | llmr
     input_data = {"social_stats": social_stats}
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("category", input_data)
 
 
 async def ads_score_chain(quicksight_data):
-    llmr = llm.with_structured_output(AdsScore)
-    achain = ads_presence_prompt | llmr
     input_data = {"quicksight_data": quicksight_data}
-    response = await achain.ainvoke(input_data)
-    return json.loads(response.model_dump_json())
+    return await ainvoke_chain("ads_score", input_data)
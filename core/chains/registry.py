@@ -0,0 +1,201 @@
+import json
+import logging
+import threading
+
+from core.chains.batch_backend import batch_collector
+from core.llm_cache import (
+    DEFAULT_TTL,
+    bypass_cache_var,
+    cache_hits_var,
+    chain_ttl,
+    get_response_cache,
+    response_cache_key,
+)
+from core.llm_governor import governed_ainvoke
+from core.model_routing import QUALITY_ERRORS, chain_route, model_label, routing_stats
+from core.serialization import chain_encoding, serialize_inputs
+from core.token_budget import enforce_token_budget
+from core.usage import UsageCallbackHandler, http_attempts_var
+
+logger = logging.getLogger(__name__)
+
+
+class ChainRegistry:
+    """
+    Every LLM chain, keyed by name (the slide name for slide chains).
+    Chains are registered with their model, prompt and output schema (or parser)
+    when their module is imported, and the runnable is built once on first use
+    instead of running with_structured_output / `prompt | llm` on every call.
+    Requests carry the chain name as prompt_cache_key, so calls sharing a static
+    prompt prefix are routed to the same provider cache.
+    cache / cache_ttl control the local response cache for the chain.
+    batch marks chains whose requests may wait for a Batch API job inside gather_in_batch.
+    Each chain runs on the route from core.model_routing: its cheaper first tier,
+    if it has one, then the model it was registered with.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.specs = {}
+        self.runnables = {}
+
+    def register(
+        self,
+        name,
+        llm,
+        prompt,
+        schema=None,
+        parser=None,
+        cache=True,
+        cache_ttl=DEFAULT_TTL,
+        batch=False,
+    ):
+        if name in self.specs:
+            raise ValueError(f"Chain '{name}' is already registered")
+        route = chain_route(name, llm)
+        routing_stats.set_route(name, route)
+        self.specs[name] = {
+            "llm": route[0],
+            "route": route,
+            "prompt": prompt,
+            "schema": schema,
+            "parser": parser,
+            "cache": cache,
+            "cache_ttl": cache_ttl,
+            "batch": batch and schema is not None,
+        }
+
+    def spec(self, name):
+        try:
+            return self.specs[name]
+        except KeyError:
+            raise KeyError(f"No chain registered as '{name}'") from None
+
+    def get(self, name, tier=0):
+        """Runnable of the chain on the tier-th model of its route"""
+        runnable = self.runnables.get((name, tier))
+        if runnable is not None:
+            return runnable
+        spec = self.spec(name)
+        llm = spec["route"][tier]
+        with self.lock:
+            if (name, tier) not in self.runnables:
+                if spec["schema"] is not None:
+                    runnable = spec["prompt"] | llm.with_structured_output(
+                        spec["schema"], prompt_cache_key=name
+                    )
+                else:
+                    runnable = spec["prompt"] | llm.bind(prompt_cache_key=name)
+                    if spec["parser"] is not None:
+                        runnable = runnable | spec["parser"]
+                self.runnables[(name, tier)] = runnable
+            return self.runnables[(name, tier)]
+
+    def build_all(self):
+        """Build every registered chain (on every model of its route) up front"""
+        for name, spec in self.specs.items():
+            for tier in range(len(spec["route"])):
+                self.get(name, tier)
+        logger.info(f"Built {len(self.runnables)} chains")
+
+    def names(self):
+        return list(self.specs)
+
+
+chain_registry = ChainRegistry()
+
+
+def register_chain(
+    name, llm, prompt, schema=None, parser=None, cache=True, cache_ttl=DEFAULT_TTL, batch=False
+):
+    chain_registry.register(
+        name,
+        llm,
+        prompt,
+        schema=schema,
+        parser=parser,
+        cache=cache,
+        cache_ttl=cache_ttl,
+        batch=batch,
+    )
+
+
+async def ainvoke_chain(name, input_data):
+    """
+    Run a registered chain, answering from the response cache when the same model,
+    prompt, schema and (canonicalized) inputs were seen within the chain's TTL.
+    Inputs are first trimmed to the chain's token budget (core.token_budget), then
+    structured inputs are encoded with the chain's input encoding (core.serialization).
+    Structured chains return a dict, and inside gather_in_batch the ones registered
+    with batch=True are queued for the next batch job instead of being sent right away.
+    """
+    spec = chain_registry.spec(name)
+    input_data = enforce_token_budget(name, spec["prompt"], input_data)
+    input_data = serialize_inputs(input_data, chain_encoding(name))
+    ttl = chain_ttl(name, spec["cache_ttl"]) if spec["cache"] else 0
+    cache = get_response_cache() if ttl > 0 else None
+    key = None
+    if cache is not None:
+        key = response_cache_key(
+            name, spec["llm"], spec["prompt"], spec["schema"], input_data, spec["parser"]
+        )
+        if not bypass_cache_var.get():
+            cached = cache.get(name, key)
+            if cached is not None:
+                hits = cache_hits_var.get()
+                if hits is not None:
+                    hits.append(name)
+                return cached
+
+    response = await invoke_routed(name, spec, input_data)
+    if cache is not None:
+        cache.set(name, key, response, ttl)
+    return response
+
+
+async def invoke_routed(name, spec, input_data):
+    """
+    Try the chain on each model of its route in turn, moving on only when the
+    response fails local validation (schema or parser), and record which model served it.
+    """
+    route = spec["route"]
+    for tier, llm in enumerate(route):
+        try:
+            response = await invoke_uncached(name, spec, input_data, tier)
+        except QUALITY_ERRORS as e:
+            if tier == len(route) - 1:
+                routing_stats.failed(name)
+                raise
+            routing_stats.escalated(name)
+            logger.warning(
+                f"{name} output from {model_label(llm)} failed validation, "
+                f"escalating to {model_label(route[tier + 1])}: {str(e)[:200]}"
+            )
+            continue
+        routing_stats.served(name, llm)
+        return response
+
+
+async def invoke_uncached(name, spec, input_data, tier=0):
+    """Send the chain's request: queued for a batch job or through the governor,
+    recording its tokens, latency and retries under the chain name"""
+    llm = spec["route"][tier]
+    collector = batch_collector.get()
+    if collector is not None and spec["batch"]:
+        return await collector.submit(
+            llm, spec["prompt"], spec["schema"], input_data, cache_key=name
+        )
+    usage = UsageCallbackHandler(name)
+    token = http_attempts_var.set(usage.attempts)
+    try:
+        response = await governed_ainvoke(
+            chain_registry.get(name, tier),
+            input_data,
+            llm.model_name,
+            config={"callbacks": [usage]},
+        )
+    finally:
+        http_attempts_var.reset(token)
+    if spec["schema"] is not None:
+        return json.loads(response.model_dump_json())
+    return response
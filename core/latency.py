@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from dotenv import load_dotenv
+
+from core.chains.batch_backend import batch_collector
+from core.llm_cache import cache_hits_var
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# Every chain call is appended here so timeouts can be tuned from real runs
+LATENCY_LOG = Path("outputs") / "chain_latency.jsonl"
+
+# Seconds before a chain is abandoned, override with LLM_TIMEOUT_<CHAIN>
+# (e.g. LLM_TIMEOUT_BIG_WINS=45)
+DEFAULT_TIMEOUT = 90
+CHAIN_TIMEOUTS = {
+    "quick_action": 240,
+    "closing_statement": 240,
+}
+
+# Hedge once a call outlives the p95 of at least this many earlier calls
+MIN_SAMPLES_FOR_HEDGE = 10
+SAMPLES_PER_CHAIN = 200
+# Only the newest part of the log is read at startup, and the file is cut back
+# to it once it grows past twice that
+LOG_TAIL_BYTES = 2 * 1024**2
+
+
+def chain_timeout(name):
+    key = f"LLM_TIMEOUT_{name.upper().replace('-', '_').replace(':', '_')}"
+    return float(os.getenv(key, CHAIN_TIMEOUTS.get(name, DEFAULT_TIMEOUT)))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+class LatencyTracker:
+    """
+    Observed durations, timeouts and hedges per chain name.
+    Seeded from LATENCY_LOG so the p95 used for hedging survives restarts.
+    """
+
+    def __init__(self, log_path=LATENCY_LOG):
+        self.log_path = Path(log_path)
+        self.lock = threading.Lock()
+        self.durations = defaultdict(lambda: deque(maxlen=SAMPLES_PER_CHAIN))
+        self.counts = defaultdict(lambda: {"calls": 0, "timeouts": 0, "hedged": 0, "hedge_wins": 0})
+        self.load()
+
+    def tail(self):
+        """The log's newest LOG_TAIL_BYTES, trimming the file to them when it is too long"""
+        size = self.log_path.stat().st_size
+        with open(self.log_path, "rb") as f:
+            if size > LOG_TAIL_BYTES:
+                f.seek(size - LOG_TAIL_BYTES)
+                # Skip the partial line the seek landed in
+                f.readline()
+            data = f.read()
+        if size > 2 * LOG_TAIL_BYTES:
+            try:
+                tmp_path = self.log_path.with_suffix(".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, self.log_path)
+            except OSError as e:
+                logger.warning(f"Could not trim latency log: {str(e)}")
+        return data.decode("utf-8", errors="replace").splitlines()
+
+    def load(self):
+        if not self.log_path.exists():
+            return
+        for line in self.tail():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not entry.get("timed_out"):
+                self.durations[entry["chain"]].append(entry["seconds"])
+
+    def p95(self, name):
+        with self.lock:
+            samples = list(self.durations[name])
+        if len(samples) < MIN_SAMPLES_FOR_HEDGE:
+            return None
+        return percentile(samples, 0.95)
+
+    def record(self, name, seconds, timed_out=False, hedged=False, hedge_won=False):
+        with self.lock:
+            counts = self.counts[name]
+            counts["calls"] += 1
+            counts["timeouts"] += timed_out
+            counts["hedged"] += hedged
+            counts["hedge_wins"] += hedge_won
+            if not timed_out:
+                self.durations[name].append(seconds)
+            try:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    entry = {
+                        "chain": name,
+                        "seconds": round(seconds, 3),
+                        "timed_out": timed_out,
+                        "hedged": hedged,
+                        "hedge_won": hedge_won,
+                        "at": time.time(),
+                    }
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write latency log: {str(e)}")
+
+    def stats(self):
+        with self.lock:
+            names = set(self.counts) | set(self.durations)
+            stats = {}
+            for name in sorted(names):
+                samples = list(self.durations[name])
+                stats[name] = {
+                    **self.counts[name],
+                    "timeout": chain_timeout(name),
+                    "p50": round(percentile(samples, 0.5), 2) if samples else None,
+                    "p95": round(percentile(samples, 0.95), 2) if samples else None,
+                }
+        return stats
+
+
+latency_tracker = LatencyTracker()
+
+
+async def run_with_deadline(name, make_call, timeout=None, hedge=None):
+    """
+    Await make_call() (a zero-argument coroutine factory) with a per-chain timeout.
+    If the call outlives the chain's observed p95, one duplicate request is fired,
+    the first successful response wins and the other is cancelled.
+    Raises TimeoutError once the deadline passes.
+    Calls answered from the response cache are not recorded, they would drag the
+    p95 towards zero and make every later cache miss hedge almost immediately.
+    """
+    # Batch jobs take hours by design and are never duplicated
+    if batch_collector.get() is not None:
+        return await make_call()
+
+    timeout = chain_timeout(name) if timeout is None else timeout
+    if hedge is None:
+        hedge = os.getenv("LLM_HEDGING", "1") != "0"
+    hedge_after = latency_tracker.p95(name) if hedge else None
+
+    start = time.perf_counter()
+    deadline = start + timeout
+    # Tasks copy the current context, so both calls append to this list
+    cache_hits = []
+    cache_hits_token = cache_hits_var.set(cache_hits)
+    primary = asyncio.create_task(make_call())
+    hedge_task = None
+    pending = {primary}
+    error = None
+
+    try:
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            wait_for = remaining
+            if hedge_task is None and hedge_after is not None:
+                wait_for = min(remaining, max(hedge_after - (time.perf_counter() - start), 0))
+            done, pending = await asyncio.wait(
+                pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            for task in done:
+                if task.exception() is None:
+                    if not cache_hits:
+                        latency_tracker.record(
+                            name,
+                            time.perf_counter() - start,
+                            hedged=hedge_task is not None,
+                            hedge_won=task is hedge_task,
+                        )
+                    return task.result()
+                error = task.exception()
+
+            if not done and hedge_task is None and hedge_after is not None:
+                logger.info(f"Hedging {name} after {hedge_after:.1f}s (p95)")
+                hedge_task = asyncio.create_task(make_call())
+                pending.add(hedge_task)
+    finally:
+        cache_hits_var.reset(cache_hits_token)
+        for task in (primary, hedge_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+    if error is not None and not pending:
+        raise error
+
+    latency_tracker.record(
+        name, time.perf_counter() - start, timed_out=True, hedged=hedge_task is not None
+    )
+    logger.warning(f"{name} timed out after {timeout:.1f}s")
+    raise TimeoutError(f"{name} timed out after {timeout:.1f}s")
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+CACHE_PATH = Path("cache") / "llm_responses.sqlite3"
+
+# Bump when the shape of cached values changes
+LLM_CACHE_VERSION = "1"
+
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Set while fresh responses are wanted (e.g. regenerating rejected slides),
+# lookups are skipped but new responses are still stored
+bypass_cache_var = ContextVar("bypass_llm_cache", default=False)
+# Chains answered from the cache are appended to the list set here, so callers
+# timing a call (run_with_deadline) can tell it never reached the API
+cache_hits_var = ContextVar("llm_cache_hits", default=None)
+
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 20_000))
+MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 512 * 1024**2))
+
+
+def cache_enabled():
+    return os.getenv("LLM_CACHE", "1") != "0"
+
+
+def chain_ttl(name, default=DEFAULT_TTL):
+    """Seconds a chain's responses stay valid, override with LLM_CACHE_TTL_<CHAIN> (0 disables)"""
+    key = f"LLM_CACHE_TTL_{name.upper().replace('-', '_').replace(':', '_')}"
+    return int(os.getenv(key, default))
+
+
+def canonicalize(value):
+    """Same value for inputs that only differ in whitespace, line endings or key order"""
+    if isinstance(value, str):
+        lines = value.replace("\r\n", "\n").replace("\r", "\n").strip().split("\n")
+        return "\n".join(line.rstrip() for line in lines)
+    if isinstance(value, dict):
+        return {str(key): canonicalize(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    return value
+
+
+def sha256_json(value):
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def prompt_hash(prompt):
+    return sha256_json(
+        [getattr(message, "prompt", message).template for message in prompt.messages]
+    )
+
+
+def schema_hash(schema):
+    return sha256_json(schema.model_json_schema()) if schema is not None else None
+
+
+def response_cache_key(name, llm, prompt, schema, input_data, parser=None):
+    return sha256_json(
+        {
+            "version": LLM_CACHE_VERSION,
+            "chain": name,
+            "model": llm.model_name,
+            "temperature": llm.temperature,
+            "reasoning_effort": getattr(llm, "reasoning_effort", None),
+            "prompt": prompt_hash(prompt),
+            "schema": schema_hash(schema),
+            "parser": type(parser).__name__ if parser is not None else None,
+            "input": canonicalize(input_data),
+        }
+    )
+
+
+class SQLiteResponseCache:
+    """
+    Chain responses in one SQLite file, keyed by response_cache_key.
+    Entries expire after their chain's TTL, and the least recently used ones are
+    dropped once the entry or byte bound is exceeded.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.counts = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    chain TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+            self.conn.commit()
+
+    def get(self, name, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                self.counts[name]["misses"] += 1
+                return None
+            self.conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.conn.commit()
+            self.counts[name]["hits"] += 1
+        return json.loads(row[0])
+
+    def set(self, name, key, value, ttl):
+        encoded = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, name, encoded, len(encoded), now, now, now + ttl),
+            )
+            self.evict()
+            self.conn.commit()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until both bounds hold"""
+        self.conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        count, total_bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total_bytes -= size
+
+    def clear(self, name=None):
+        with self.lock:
+            if name is None:
+                self.conn.execute("DELETE FROM responses")
+            else:
+                self.conn.execute("DELETE FROM responses WHERE chain = ?", (name,))
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            return {name: dict(counts) for name, counts in self.counts.items()}
+
+
+class NullResponseCache:
+    """Cache that never stores anything, e.g. for benchmarks that must hit the API"""
+
+    def get(self, name, key):
+        return None
+
+    def set(self, name, key, value, ttl):
+        pass
+
+    def stats(self):
+        return {}
+
+
+response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global response_cache
+    with _response_cache_lock:
+        if response_cache is None:
+            response_cache = SQLiteResponseCache() if cache_enabled() else NullResponseCache()
+        return response_cache
+
+
+def set_response_cache(cache):
+    """Swap the backend, any object with get(name, key) / set(name, key, value, ttl) / stats()"""
+    global response_cache
+    with _response_cache_lock:
+        response_cache = cache
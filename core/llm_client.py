@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+
+import httpx
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+
+from core.usage import http_attempts_var
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# One keep-alive pool for every LLM call, tune with LLM_POOL_* env vars
+POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", 100))
+POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", 32))
+# Long enough that connections survive the gap between pipeline stages
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", 120))
+PREWARM_CONNECTIONS = int(os.getenv("LLM_POOL_PREWARM", 8))
+
+HTTP_TIMEOUT = httpx.Timeout(float(os.getenv("LLM_HTTP_TIMEOUT", 600)), connect=10.0)
+PREWARM_TIMEOUT = 5.0
+
+
+def pool_limits():
+    return httpx.Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def api_base_url():
+    return os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+
+
+def count_attempt(request):
+    """Counts every request the OpenAI client sends, including its own retries"""
+    attempts = http_attempts_var.get()
+    if attempts is not None:
+        attempts["count"] += 1
+
+
+async def acount_attempt(request):
+    count_attempt(request)
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """
+    Async connections belong to the event loop that opened them, and Streamlit
+    runs each session on its own loop. Keeps one keep-alive pool per loop
+    behind a single client so every chat model can share it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.transports = weakref.WeakKeyDictionary()
+
+    def for_current_loop(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            transport = self.transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(limits=pool_limits())
+                self.transports[loop] = transport
+        return transport
+
+    async def handle_async_request(self, request):
+        return await self.for_current_loop().handle_async_request(request)
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            transport = self.transports.pop(loop, None)
+        if transport is not None:
+            await transport.aclose()
+
+
+class LLMClientFactory:
+    """Shared HTTP clients and one ChatOpenAI per distinct model configuration"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sync_client = httpx.Client(
+            limits=pool_limits(),
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True,
+            event_hooks={"request": [count_attempt]},
+        )
+        self.async_client = httpx.AsyncClient(
+            transport=LoopLocalTransport(),
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True,
+            event_hooks={"request": [acount_attempt]},
+        )
+        self.chat_models = {}
+        # Event loop -> when its pool was last prewarmed
+        self.warmed_at = weakref.WeakKeyDictionary()
+
+    def chat_model(self, **params):
+        key = tuple(sorted((name, repr(value)) for name, value in params.items()))
+        with self.lock:
+            if key not in self.chat_models:
+                self.chat_models[key] = ChatOpenAI(
+                    use_responses_api=True,
+                    http_client=self.sync_client,
+                    http_async_client=self.async_client,
+                    **params,
+                )
+            return self.chat_models[key]
+
+    async def prewarm(self, connections=PREWARM_CONNECTIONS, base_url=None):
+        """
+        Open `connections` keep-alive connections on the current loop's pool so the
+        first chains of a report skip DNS, TCP and TLS setup. No-op while the last
+        prewarm on this loop is younger than the keep-alive expiry.
+        Returns the seconds spent, or 0.0 if the pool was still warm.
+        """
+        loop = asyncio.get_running_loop()
+        if time.monotonic() - self.warmed_at.get(loop, float("-inf")) < POOL_KEEPALIVE_EXPIRY:
+            return 0.0
+        self.warmed_at[loop] = time.monotonic()
+
+        start = time.perf_counter()
+        headers = {"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '')}"}
+        try:
+            results = await asyncio.gather(
+                *(
+                    self.async_client.get(
+                        f"{base_url or api_base_url()}/models",
+                        headers=headers,
+                        timeout=PREWARM_TIMEOUT,
+                    )
+                    for _ in range(connections)
+                ),
+                return_exceptions=True,
+            )
+        except asyncio.CancelledError:
+            # Cut short (e.g. a background prewarm outlived its report), try again next time
+            self.warmed_at.pop(loop, None)
+            raise
+        errors = [result for result in results if isinstance(result, Exception)]
+        seconds = time.perf_counter() - start
+        if errors:
+            logger.warning(f"Prewarming LLM connections failed: {str(errors[0])}")
+        else:
+            logger.info(f"Prewarmed {connections} LLM connections in {seconds:.2f}s")
+        return seconds
+
+
+_factory = None
+_factory_lock = threading.Lock()
+
+
+def get_client_factory():
+    """Process-wide LLMClientFactory"""
+    global _factory
+    with _factory_lock:
+        if _factory is None:
+            _factory = LLMClientFactory()
+        return _factory
+
+
+def get_chat_model(**params):
+    """ChatOpenAI (Responses API) on the shared connection pool, one per configuration"""
+    return get_client_factory().chat_model(**params)
+
+
+async def prewarm_connections(connections=PREWARM_CONNECTIONS):
+    return await get_client_factory().prewarm(connections)
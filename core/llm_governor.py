@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# Requests and tokens per minute for each model, override with LLM_RPM_<MODEL> /
+# LLM_TPM_<MODEL> (e.g. LLM_TPM_GPT_4_1=800000)
+DEFAULT_MODEL_LIMITS = {
+    "gpt-4.1": {"rpm": 500, "tpm": 450_000},
+    "gpt-4.1-mini": {"rpm": 500, "tpm": 2_000_000},
+    "gpt-5.1": {"rpm": 500, "tpm": 450_000},
+}
+FALLBACK_LIMITS = {"rpm": 500, "tpm": 200_000}
+
+SLOT_POLL_SECONDS = 0.02
+
+
+def env_limit(model, kind, default):
+    key = f"LLM_{kind.upper()}_{model.upper().replace('-', '_').replace('.', '_')}"
+    return int(os.getenv(key, default))
+
+
+def estimate_prompt_tokens(prompt, input_data):
+    """Rough prompt size (~4 characters per token) of a rendered prompt template"""
+    try:
+        text = prompt.format(**input_data)
+    except Exception:
+        text = str(input_data)
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Refills `per_minute` units per minute. Callers reserve their amount up front and
+    sleep off any deficit, so waiters are served in arrival order without polling.
+    Thread-safe, since Streamlit sessions each run their own event loop.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount):
+        """Take `amount` and return how long the caller must wait before using it"""
+        # A single request bigger than the whole bucket would never fit
+        amount = min(float(amount), self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.available = min(
+                self.capacity, self.available + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.available -= amount
+            return max(0.0, -self.available) / self.rate
+
+    def release(self, amount):
+        """Give back a reservation that was never used"""
+        amount = min(float(amount), self.capacity)
+        with self.lock:
+            self.available = min(self.capacity, self.available + amount)
+
+    async def acquire(self, amount):
+        wait = self.reserve(amount)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # A cancelled waiter must not keep later callers waiting for its share
+                self.release(amount)
+                raise
+
+
+class LLMGovernor:
+    """
+    Process-wide admission control for every LLM call.
+    Caps requests in flight across all models and keeps per-model request
+    and token budgets, admitting a call once its estimated prompt tokens fit.
+    """
+
+    def __init__(self, model_limits=None, max_in_flight=None):
+        self.model_limits = {**DEFAULT_MODEL_LIMITS, **(model_limits or {})}
+        self.max_in_flight = max_in_flight or int(os.getenv("LLM_MAX_IN_FLIGHT", 32))
+        self.slots = threading.BoundedSemaphore(self.max_in_flight)
+        self.lock = threading.Lock()
+        self.request_buckets = {}
+        self.token_buckets = {}
+        self.queued = 0
+        self.in_flight = 0
+        self.waits = defaultdict(lambda: deque(maxlen=1000))
+        self.admitted = defaultdict(int)
+
+    async def acquire_slot(self):
+        # threading primitive so the cap holds across every event loop in the process
+        while not self.slots.acquire(blocking=False):
+            await asyncio.sleep(SLOT_POLL_SECONDS)
+
+    def buckets_for(self, model):
+        with self.lock:
+            return self.create_buckets(model)
+
+    def create_buckets(self, model):
+        if model not in self.request_buckets:
+            limits = self.model_limits.get(model, FALLBACK_LIMITS)
+            self.request_buckets[model] = TokenBucket(
+                env_limit(model, "rpm", limits["rpm"])
+            )
+            self.token_buckets[model] = TokenBucket(
+                env_limit(model, "tpm", limits["tpm"])
+            )
+        return self.request_buckets[model], self.token_buckets[model]
+
+    @asynccontextmanager
+    async def admit(self, model, estimated_tokens):
+        request_bucket, token_bucket = self.buckets_for(model)
+
+        with self.lock:
+            self.queued += 1
+        queued_at = time.perf_counter()
+        try:
+            await self.acquire_slot()
+            request_acquired = False
+            try:
+                await request_bucket.acquire(1)
+                request_acquired = True
+                await token_bucket.acquire(estimated_tokens)
+            except BaseException:
+                # The call never goes out, so it must not use up a request either
+                if request_acquired:
+                    request_bucket.release(1)
+                self.slots.release()
+                raise
+        finally:
+            with self.lock:
+                self.queued -= 1
+
+        wait = time.perf_counter() - queued_at
+        with self.lock:
+            self.waits[model].append(wait)
+            self.admitted[model] += 1
+            self.in_flight += 1
+        if wait > 1:
+            logger.info(f"LLM governor held {model} call for {wait:.2f}s")
+
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            self.slots.release()
+
+    def metrics(self):
+        per_model = {}
+        with self.lock:
+            waits_by_model = {model: list(waits) for model, waits in self.waits.items()}
+        for model, waits in waits_by_model.items():
+            ordered = sorted(waits)
+            per_model[model] = {
+                "admitted": self.admitted[model],
+                "avg_wait": sum(ordered) / len(ordered),
+                "p95_wait": ordered[int(0.95 * (len(ordered) - 1))],
+                "max_wait": ordered[-1],
+            }
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "models": per_model,
+        }
+
+
+governor = LLMGovernor()
+
+
+async def governed_ainvoke(achain, input_data, model, config=None):
+    """ainvoke a `prompt | llm` chain once the shared governor admits it"""
+    prompt = getattr(achain, "first", None)
+    estimated_tokens = estimate_prompt_tokens(prompt, input_data) if prompt else 1
+    async with governor.admit(model, estimated_tokens):
+        return await achain.ainvoke(input_data, config=config)
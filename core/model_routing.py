@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from dotenv import load_dotenv
+from langchain_core.exceptions import OutputParserException
+from pydantic import ValidationError
+
+from core.llm_client import get_chat_model
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# Cheaper / faster model configurations chains can be routed to first
+MODEL_TIERS = {
+    "mini": {"model": "gpt-4.1-mini", "temperature": 0, "max_retries": 3},
+    "reasoning-low": {"model": "gpt-5.1", "temperature": 0, "reasoning_effort": "low"},
+}
+
+# First tier per chain. A chain whose output fails local validation on its first
+# tier is escalated to the model it was registered with. Override with
+# LLM_ROUTE_<CHAIN>=<tier>, or LLM_ROUTE_<CHAIN>=registered to skip the first tier.
+CHAIN_ROUTES = {
+    # Schema-bound extraction
+    "business_profile": "mini",
+    "social_stats": "mini",
+    "post_requests": "mini",
+    "delivery_dates": "mini",
+    "post_content": "mini",
+    "intro_slide": "mini",
+    "here_is_what_we_delivered": "mini",
+    "growth_at_glance": "mini",
+    # Reasoning chains try low effort before medium
+    "quick_action": "reasoning-low",
+    "closing_statement": "reasoning-low",
+}
+
+REGISTERED_TIER = "registered"
+
+# Raised when a response does not parse into the chain's schema / parser output
+QUALITY_ERRORS = (ValidationError, OutputParserException, json.JSONDecodeError)
+
+
+def chain_tier(name):
+    key = f"LLM_ROUTE_{name.upper().replace('-', '_').replace(':', '_')}"
+    return os.getenv(key, CHAIN_ROUTES.get(name, REGISTERED_TIER))
+
+
+def chain_route(name, llm):
+    """Models to try in order for a chain: its routed tier (if any), then `llm`"""
+    tier = chain_tier(name)
+    if tier == REGISTERED_TIER:
+        return [llm]
+    if tier not in MODEL_TIERS:
+        raise ValueError(f"Unknown model tier '{tier}' for chain '{name}'")
+    routed = get_chat_model(**MODEL_TIERS[tier])
+    return [routed] if routed is llm else [routed, llm]
+
+
+def model_label(llm):
+    effort = getattr(llm, "reasoning_effort", None)
+    return f"{llm.model_name} ({effort})" if effort else llm.model_name
+
+
+class RoutingStats:
+    """Which model served each chain's calls and how often the first tier was escalated"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.served_by = defaultdict(lambda: defaultdict(int))
+        self.escalations = defaultdict(int)
+        self.failures = defaultdict(int)
+
+    def set_route(self, name, route):
+        with self.lock:
+            self.routes[name] = [model_label(llm) for llm in route]
+
+    def served(self, name, llm):
+        with self.lock:
+            self.served_by[name][model_label(llm)] += 1
+
+    def escalated(self, name):
+        with self.lock:
+            self.escalations[name] += 1
+
+    def failed(self, name):
+        with self.lock:
+            self.failures[name] += 1
+
+    def stats(self):
+        with self.lock:
+            names = set(self.served_by) | set(self.escalations) | set(self.failures)
+            chains = {}
+            for name in sorted(names):
+                calls = sum(self.served_by[name].values()) + self.failures[name]
+                chains[name] = {
+                    "route": " -> ".join(self.routes.get(name, [])),
+                    "calls": calls,
+                    "served_by": dict(self.served_by[name]),
+                    "escalations": self.escalations[name],
+                    "escalation_rate": (
+                        round(self.escalations[name] / calls, 3) if calls else 0.0
+                    ),
+                    "failed": self.failures[name],
+                }
+        return chains
+
+
+routing_stats = RoutingStats()
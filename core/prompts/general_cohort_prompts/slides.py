@@ -68,6 +68,9 @@ Extract the business information required for the MarketingReport Pydantic model
 
 Use QuickSight as the primary source and Ignite payload only as fallback.
 
+Return ONLY the JSON output in the structure defined above.
+The data follows.
+
 QuickSight Data:
 <quicksight_data>
 {quicksight_data}
@@ -77,8 +80,6 @@ Ignite Payload:
 <ignite_payload>
 {ignite_payload}
 </ignite_payload>
-
-Return ONLY the JSON output in the structure defined above.
 """
 
 business_info_extraction_prompt = ChatPromptTemplate.from_messages([
@@ -217,11 +218,7 @@ VOICE AND TONE REMINDERS:
 """
 
 how_your_ads_performed_user_prompt = """
-Analyze the following advertising data and create clear performance summaries:
-
-<quick_sight_data>
-{quicksight_data}
-</quick_sight_data>
+Analyze the advertising data at the end of this message and create clear performance summaries.
 
 As you analyze this data, think through:
 1. What platform and time period am I looking at?
@@ -240,6 +237,10 @@ Remember:
 - Strictly observe all character limits
 - Order chronologically by period
 - Include a helpful "What Does It Mean?" summary that synthesizes the overall pattern and provides actionable guidance
+
+<quick_sight_data>
+{quicksight_data}
+</quick_sight_data>
 """
 
 how_your_ads_performed_prompt = ChatPromptTemplate.from_messages([
@@ -441,11 +442,7 @@ Before finalizing, ask yourself: Does this plan feel like it was written for THI
 """
 
 action_plan_user_prompt = """
-Analyze the following performance data and create an actionable plan for next month:
-
-<quick_sight_data>
-{quicksight_data}
-</quick_sight_data>
+Analyze the performance data at the end of this message and create an actionable plan for next month.
 
 Based on this data:
 1. First, take a moment to understand the story this data is telling—what's working, what's struggling, and why that might be happening
@@ -463,6 +460,10 @@ Remember:
 - Be practical and encouraging in tone
 - Strictly observe all character limits
 - Prioritize by impact (biggest opportunities first)
+
+<quick_sight_data>
+{quicksight_data}
+</quick_sight_data>
 """
 
 action_plan_prompt = ChatPromptTemplate.from_messages([
@@ -736,11 +737,7 @@ When writing the Summary Insight:
 """
 
 areas_needing_attention_user_prompt = """
-Analyze the following performance data and identify areas needing attention:
-
-<quick_sight_data>
-{quicksight_data}
-</quick_sight_data>
+Analyze the performance data at the end of this message and identify areas needing attention.
 
 **Before producing your final output, work through your analysis like this:**
 
@@ -793,6 +790,10 @@ Remember:
 - Extract exact numerical values from the data
 - Strictly observe all character limits
 - Your analysis should feel human, reasoned, and genuinely helpful
+
+<quick_sight_data>
+{quicksight_data}
+</quick_sight_data>
 """
 
 areas_needing_attention_prompt = ChatPromptTemplate.from_messages([
@@ -926,11 +927,7 @@ CRITICAL RULES:
 """
 
 performance_summary_user_prompt = """
-Analyze the following performance data and create a performance overview report:
-
-<quick_sight_data>
-{quicksight_data}
-</quick_sight_data>
+Analyze the performance data at the end of this message and create a performance overview report.
 
 Walk through this analysis step by step, thinking like a marketing strategist would:
 
@@ -982,6 +979,10 @@ Walk through this analysis step by step, thinking like a marketing strategist wo
 - Is your footer note telling a coherent story, not just listing facts?
 
 Produce your output with this reasoning reflected in how you frame each insight.
+
+<quick_sight_data>
+{quicksight_data}
+</quick_sight_data>
 """
 
 
@@ -1098,11 +1099,7 @@ CRITICAL RULES:
 """
 
 big_wins_user_prompt = """
-Analyze the following performance data and identify the big wins - areas showing significant positive growth:
-
-<quick_sight_data>
-{quicksight_data}
-</quick_sight_data>
+Analyze the performance data at the end of this message and identify the big wins - areas showing significant positive growth.
 
 Work through this analysis step by step:
 
@@ -1147,6 +1144,10 @@ Final checks:
 - Did you catch the "Start > 0, End = Null" cases?
 - Are character limits respected?
 - Is the tone positive?
+
+<quick_sight_data>
+{quicksight_data}
+</quick_sight_data>
 """
 
 big_wins_prompt = ChatPromptTemplate.from_messages([
@@ -1255,11 +1256,7 @@ CRITICAL RULES:
 """
 
 growth_at_glance_user_prompt = """
-Analyze the following performance data and create a performance comparison table:
-
-<quick_sight_data>
-{quicksight_data}
-</quick_sight_data>
+Analyze the performance data at the end of this message and create a performance comparison table.
 
 Walk through this analysis step by step:
 
@@ -1314,6 +1311,10 @@ Remember:
 - Always include + or - in change_percentage - neutral presentation lets the reader draw conclusions
 - Use appropriate period labels based on granularity
 - The goal is a table that someone can glance at and immediately understand what improved, what declined, and by how much
+
+<quick_sight_data>
+{quicksight_data}
+</quick_sight_data>
 """
 
 growth_at_glance_prompt = ChatPromptTemplate.from_messages([
@@ -1371,7 +1372,7 @@ CONTENT REQUIREMENTS
 """
 
 what_drove_results_user_prompt = """
-You are now given the data to analyze.
+The data to analyze is at the end of this message.
 
 Step 1: Analyze the data below deepy. Identify the narrative arc.
 Step 2: Write your <reasoning_trace> to show how you connected the data points.
@@ -1435,7 +1436,13 @@ STEP-BY-STEP GENERATION LOGIC:
 """
 
 here_is_what_we_delivered_user_prompt = """
-Generate the delivery timeline based on the following data:
+Generate the delivery timeline based on the delivery logs and content descriptions at the end of this message.
+
+**Execution Steps:**
+1. Split the total timeframe into 4 chronological blocks.
+2. For each block, identify the dominant post type based on the mapping rules (Ongoing Social Posts, On-Demand Social Posts, or Facebook Ads).
+3. Select a specific content theme from `<content_descriptions>` that occurred during that block.
+4. Generate the response ensuring no character limits are exceeded.
 
 <delivery_logs>
 {zylo_delivery_data}
@@ -1444,12 +1451,6 @@ Generate the delivery timeline based on the following data:
 <content_descriptions>
 {zylo_post_content}
 </content_descriptions>
-
-**Execution Steps:**
-1. Split the total timeframe into 4 chronological blocks.
-2. For each block, identify the dominant post type based on the mapping rules (Ongoing Social Posts, On-Demand Social Posts, or Facebook Ads).
-3. Select a specific content theme from `<content_descriptions>` that occurred during that block.
-4. Generate the response ensuring no character limits are exceeded.
 """
 
 here_is_what_we_delivered_prompt = ChatPromptTemplate.from_messages([
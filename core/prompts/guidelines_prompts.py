@@ -129,16 +129,12 @@ REMEMBER: These examples illustrate the OUTPUT STRUCTURE only. Generate your act
 """
 report_validation_user_prompt = """
 YOUR TASK:
-Review the report below against ONLY the guidelines provided. Do NOT assume any rules that are not explicitly stated in the guidelines.
+Review the report at the end of this message against ONLY the guidelines provided. Do NOT assume any rules that are not explicitly stated in the guidelines.
 GUIDELINES TO CHECK AGAINST:
 Read these carefully. These are the ONLY rules you should check for:
 <guidelines>
 {guidelines}
 </guidelines>
-REPORT TO VALIDATE:
-<report>
-{report}
-</report>
 INSTRUCTIONS:
 
 Read the guidelines thoroughly - these are your ONLY compliance rules
@@ -165,7 +161,12 @@ Return valid JSON array only
 Make sure you find issues in multiple slides then return list of multiple slides problem, if only one slide then that only and if there is no violation then return empty list [].
 Return back the whole slide content while returning back only specific to that slide after updating the violation of guidelines section with proper content.
 - Finally very importantly make sure you dont increase the character or word length of the content. Try to keep it exactly same or maybe just a little less. Strictly dont increase the character count of the content if you need to regeerate.
-Return your findings as a JSON array:
+Return your findings as a JSON array.
+
+REPORT TO VALIDATE:
+<report>
+{report}
+</report>
 """
 report_validation_prompt = ChatPromptTemplate.from_messages([
     ("system", report_validation_system_prompt),
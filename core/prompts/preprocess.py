@@ -3,19 +3,10 @@ from langchain_core.prompts import ChatPromptTemplate
 
 data_structuring_system_prompt = """
 You are a data transformation specialist. Your job is to extract and structure business 
-performance data from multiple sources into a standardized format.
+performance data from a single source into a standardized format.
 
-You will receive data from four different sources:
-1. QuickSight data - containing business metrics and analytics
-2. Zylo V6 data - containing social media and advertising performance
-3. MSP data - containing additional marketing and performance metrics
-4. Ignite API data - containing delivery and resolution information
-
-Additionally, you may receive:
-5. Zylo V6 Post Content - containing recent social media post content from the business
-
-Your task is to carefully extract relevant information from these sources and structure 
-them according to the exact schema requirements. Follow these principles:
+Your task is to carefully extract relevant information from the source you are given and 
+structure it according to the exact schema requirements. Follow these principles:
 
 **Data Extraction Rules:**
 - Extract values exactly as they appear in the source data
@@ -24,84 +15,49 @@ them according to the exact schema requirements. Follow these principles:
 - Do not invent or assume data that isn't present
 - Match field names carefully to their corresponding source data
 
-**Time Period Handling:**
-- Identify whether the data is weekly, monthly, or yearly
-- For each metric, create a list of time periods with:
-  - `period_type`: "week", "month", or "year"
-  - `period_label`: Human-readable label (e.g., "Aug", "Sep", "Oct" for months; "Week 1", "Week 2" for weeks; "2024", "2025" for years)
-  - `value`: The actual metric value as a string
-- Maintain chronological order in the periods list
-- If data spans multiple time granularities, use the most specific one available
-
-**URL and Link Handling:**
-- Ensure URLs include proper protocols (https://)
-- Validate social media URLs match expected patterns
-- Business URLs should be complete and functional
-
-**Metrics and Statistics:**
-- Preserve numeric precision for metrics like CTR, CPC, CPM
-- Store all metric values as strings to maintain original formatting
-- Handle percentage values appropriately (preserve % or decimal format as given)
-- Handle comma-separated numbers (e.g., "3,536") as-is
-
-**Delivery Data:**
-- Extract all delivery items with their types
-- Capture ISO 8601 formatted timestamps for resolved field
-- Maintain chronological order if present in source
-
-**Post Content Handling:**
-- If zylo_v6_post_content is provided, extract the content from each post
-- Remove any dates from the content entries
-- Structure as a list of content strings (e.g., "Content 1: ...", "Content 2: ...")
-- If zylo_v6_post_content is not provided or empty, return null for this field
-
-Return a valid JSON object matching the BusinessSnapshot schema structure.
+Return only a valid JSON object matching the requested schema.
 """
 
-data_structuring_user_prompt = """
-Please structure the following data sources into the BusinessSnapshot format:
+business_profile_user_prompt = """
+Extract the business profile from the Ignite API data at the end of this message.
 
-**QuickSight Data:**
-<quicksight_data>
-{quicksight_data}
-</quicksight_data>
+## REQUIRED OUTPUT FIELDS AND DEFINITIONS:
 
-**Zylo V6 Data:**
-<zylo_v6_data>
-{zylo_v6_data}
-</zylo_v6_data>
+- `business_name`: Official registered name of the business
+- `business_url`: Complete website URL including protocol (e.g., https://example.com)
+- `facebook`: Full Facebook page URL for the business
+- `instagram`: Full Instagram profile URL for the business
+- `about_this_business`: A comprehensive description of what the business does, its focus, and services
 
-**MSP Data:**
-<msp_data>
-{msp_data}
-</msp_data>
+**URL and Link Handling:**
+- Ensure URLs include proper protocols (https://)
+- Validate social media URLs match expected patterns
+- Business URLs should be complete and functional
 
 **Ignite API Data:**
 <ignite_api_data>
 {ignite_api_data}
 </ignite_api_data>
+"""
 
-**Zylo V6 Post Content:**
-<zylo_v6_post_content>
-{zylo_v6_post_content}
-</zylo_v6_post_content>
-Generate  recent_post_content from here above zylo_v6_post_content if it exists
-
-## REQUIRED OUTPUT FIELDS AND DEFINITIONS:
+social_stats_user_prompt = """
+Structure the performance data at the end of this message into the SocialStats format.
 
-**Business Information:**
-- `business_name`: Official registered name of the business
-- `business_url`: Complete website URL including protocol (e.g., https://example.com)
-- `facebook`: Full Facebook page URL for the business
-- `instagram`: Full Instagram profile URL for the business
-- `about_this_business`: A comprehensive description of what the business does, its focus, and services
-
-**Time Series Performance Metrics:**
+**Time Period Handling:**
+- Identify whether the data is weekly, monthly, or yearly
+- For each metric, create a list of time periods with:
+  - `period_type`: "week", "month", or "year"
+  - `period_label`: Human-readable label (e.g., "Aug", "Sep", "Oct" for months; "Week 1", "Week 2" for weeks; "2024", "2025" for years)
+  - `value`: The actual metric value as a string (or null if unavailable)
+- Maintain chronological order in the periods list
+- If data spans multiple time granularities, use the most specific one available
+- Use an empty periods list for metrics that are not present in the data
 
-Each metric below should be structured as a `TimeSeriesStats` object containing a list of periods. Each period has:
-- `period_type`: "week", "month", or "year"
-- `period_label`: Descriptive label (e.g., "Aug", "Week 1", "2024")
-- `value`: The metric value as a string (or null if unavailable)
+**Metrics and Statistics:**
+- Preserve numeric precision for metrics like CTR, CPC, CPM
+- Store all metric values as strings to maintain original formatting
+- Handle percentage values appropriately (preserve % or decimal format as given)
+- Handle comma-separated numbers (e.g., "3,536") as-is
 
 *Facebook Metrics:*
 - `facebook_posts`: Number of posts published on Facebook per period
@@ -135,45 +91,6 @@ Each metric below should be structured as a `TimeSeriesStats` object containing
 - `on_demand_post_requests`: Number of one-time/ad-hoc content requests per period
 - `ongoing_post_requests`: Number of recurring/scheduled content requests per period
 
-**Delivery Information:**
-- `delivery_dates`: List of all content deliveries, each containing:
-  - `social_post_type`: Type or category of the social media post delivered
-  - `resolved`: ISO 8601 timestamp when the post was completed/delivered (e.g., "2025-10-20T14:30:00Z")
-
-**Recent Post Content:**
-- `recent_post_content`: A list of recent social media post content strings
-  - If zylo_v6_post_content data is detected/provided, extract and return a list of content entries
-  - Remove any dates from the content (e.g., "November 20 at 6:30 PM - " should be removed)
-  - Format each entry as: "Content 1: [post text]", "Content 2: [post text]", etc.
-  - If zylo_v6_post_content is not provided, empty, or contains no valid content, return null
-
-## EXTRACTION GUIDELINES:
-
-**From QuickSight Data:**
-- Business name, URL, and descriptive information
-- Google Search/Maps metrics
-- Google Ads performance data
-
-**From Zylo V6 Data:**
-- Facebook and Instagram social metrics
-- Facebook Ads performance
-- Post counts and engagement metrics
-
-**From MSP Data:**
-- Additional marketing metrics
-- Supplementary performance data
-- Cross-platform analytics
-
-**From Ignite API Data:**
-- Delivery items with post types
-- Resolution timestamps
-- On-demand and ongoing request counts
-
-**From Zylo V6 Post Content:**
-- Recent social media post text/captions
-- Strip dates and timestamps from content
-- Preserve the actual post content/message
-
 ## TIME PERIOD STRUCTURE EXAMPLE:
 
 For monthly data (Aug, Sep, Oct):
@@ -187,51 +104,93 @@ For monthly data (Aug, Sep, Oct):
   }}
 }}
 
-For weekly data:
-{{
-  "facebook_posts": {{
-    "periods": [
-      {{"period_type": "week", "period_label": "Week 1", "value": "5"}},
-      {{"period_type": "week", "period_label": "Week 2", "value": "7"}}
-    ]
-  }}
-}}
+**QuickSight Data:**
+<quicksight_data>
+{quicksight_data}
+</quicksight_data>
+
+**MSP Data:**
+<msp_data>
+{msp_data}
+</msp_data>
+"""
+
+post_requests_user_prompt = """
+Extract the content request counts from the Ignite API data at the end of this message.
+
+- `on_demand_post_requests`: Number of one-time/ad-hoc content requests per period
+- `ongoing_post_requests`: Number of recurring/scheduled content requests per period
+- For each period use `period_type` ("week", "month" or "year"), a human-readable
+  `period_label` and the count as a string in `value`, in chronological order
+- Use an empty periods list when the data has no such requests
+
+**Ignite API Data:**
+<ignite_api_data>
+{ignite_api_data}
+</ignite_api_data>
+"""
+
+delivery_dates_user_prompt = """
+Extract every delivery entry from the Zylo V6 data at the end of this message.
+
+- `delivery_dates`: List of all content deliveries, each containing:
+  - `social_post_type`: Type or category of the social media post delivered
+  - `resolved`: ISO 8601 timestamp when the post was completed/delivered (e.g., "2025-10-20T14:30:00Z")
+- Extract all delivery items with their types
+- Maintain chronological order if present in source
+
+**Zylo V6 Data:**
+<zylo_v6_data>
+{zylo_v6_data}
+</zylo_v6_data>
+"""
+
+post_content_user_prompt = """
+Extract the recent social media post content from the Zylo V6 post content at the end of this message.
+
+- `recent_post_content`: A list of recent social media post content strings
+  - Remove any dates from the content (e.g., "November 20 at 6:30 PM - " should be removed)
+  - Format each entry as: "Content 1: [post text]", "Content 2: [post text]", etc.
+  - If the content contains no valid posts, return null
 
 ## RECENT POST CONTENT STRUCTURE EXAMPLE:
 
-If zylo_v6_post_content contains posts:
 {{
   "recent_post_content": [
     "Content 1: Comfort and dignity return to daily life when care is shaped around personal needs. Our in-home nursing and caregiver support brings trust and gentle guidance to your f...",
-    "Content 2: Flexible home care is possible with our transparent pricing starting at $27 per hour. We help families plan confidently, regardless of insurance. Let's talk about how w...",
-    "Content 3: Baltimore families receive care shaped by local knowledge and deep community roots. Our team understands your needs and traditions, offering support that feels truly fa..."
+    "Content 2: Flexible home care is possible with our transparent pricing starting at $27 per hour. We help families plan confidently, regardless of insurance. Let's talk about how w..."
   ]
 }}
 
-If zylo_v6_post_content is not provided or empty:
-{{
-  "recent_post_content": null
-}}
+**Zylo V6 Post Content:**
+<zylo_v6_post_content>
+{zylo_v6_post_content}
+</zylo_v6_post_content>
+"""
 
-## VALIDATION CHECKLIST:
+business_profile_prompt = ChatPromptTemplate.from_messages([
+    ("system", data_structuring_system_prompt),
+    ("human", business_profile_user_prompt),
+])
 
-✓ All required fields are present (even if null)
-✓ Time series data correctly structured with period_type, period_label, and value
-✓ All periods in chronological order
-✓ Period types are consistent within each metric ("week", "month", or "year")
-✓ URLs are complete with protocols
-✓ Timestamps are in ISO 8601 format
-✓ Numeric metrics preserved as strings with original formatting
-✓ No data fabrication - use null for missing values
-✓ JSON structure matches BusinessSnapshot schema exactly
-✓ recent_post_content is a list of strings with dates removed, or null if not available
+social_stats_prompt = ChatPromptTemplate.from_messages([
+    ("system", data_structuring_system_prompt),
+    ("human", social_stats_user_prompt),
+])
 
-Extract and structure the data now, returning only the complete JSON object.
-"""
+post_requests_prompt = ChatPromptTemplate.from_messages([
+    ("system", data_structuring_system_prompt),
+    ("human", post_requests_user_prompt),
+])
 
-data_structuring_prompt = ChatPromptTemplate.from_messages([
+delivery_dates_prompt = ChatPromptTemplate.from_messages([
     ("system", data_structuring_system_prompt),
-    ("human", data_structuring_user_prompt),
+    ("human", delivery_dates_user_prompt),
+])
+
+post_content_prompt = ChatPromptTemplate.from_messages([
+    ("system", data_structuring_system_prompt),
+    ("human", post_content_user_prompt),
 ])
 
 
@@ -351,11 +310,7 @@ You are a data validator. Analyze QuickSight data to score advertising presence.
 """
 
 ads_presence_user_prompt = """
-Analyze the QuickSight data and determine the ads presence score:
-
-<quicksight_data>
-{quicksight_data}
-</quicksight_data>
+Analyze the QuickSight data at the end of this message and determine the ads presence score.
 
 **Steps:**
 1. Scan ALL fields - identify ONLY those containing "Facebook Ads" or "Facebook Ad" (ignore "Facebook Posts", "Facebook Likes", etc.)
@@ -378,6 +333,10 @@ Analyze the QuickSight data and determine the ads presence score:
 **Note:** These are reference examples only. The actual data may contain different field names. The key rule is: ONLY count fields that explicitly contain "Ads" or "Ad" after "Facebook" or "Google".
 
 Return JSON: {{"score": <1|2|5>, "reason": "<explanation>", "flag": <0|1>}}
+
+<quicksight_data>
+{quicksight_data}
+</quicksight_data>
 """
 
 ads_presence_prompt = ChatPromptTemplate.from_messages([
@@ -98,6 +98,35 @@ class BusinessSnapshot(BaseModel):
     )
 
 
+class BusinessProfile(BaseModel):
+    business_info: BusinessInfo = Field(..., description="Basic business information.")
+    about_this_business: str | None = Field(
+        None, description="High-level description of the business."
+    )
+
+
+class PostRequests(BaseModel):
+    on_demand_post_requests: TimeSeriesStats = Field(
+        ..., description="On-demand post requests."
+    )
+    ongoing_post_requests: TimeSeriesStats = Field(
+        ..., description="Ongoing content requests."
+    )
+
+
+class DeliveryDates(BaseModel):
+    delivery_dates: list[DeliveryItem] = Field(
+        ..., description="All delivery/resolution entries."
+    )
+
+
+class RecentPostContent(BaseModel):
+    recent_post_content: list[str] | None = Field(
+        None,
+        description="List of recent social media post content strings with dates removed. Returns null if no post content is available.",
+    )
+
+
 class CategoryIdentification(BaseModel):
     category: str
     reason_selected: str
@@ -0,0 +1,65 @@
+def resolve_ref(schema, root):
+    ref = schema.get("$ref")
+    if not ref:
+        return schema
+    node = root
+    for part in ref.lstrip("#/").split("/"):
+        node = node[part]
+    return node
+
+
+def fixture_from_schema(schema, root=None, name=""):
+    """
+    Build a minimal value that validates against a JSON schema
+    (the strict schemas produced for the pydantic report classes).
+    Respects required fields, enums, min/max items and max lengths.
+    """
+    root = root or schema
+    schema = resolve_ref(schema, root)
+
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [resolve_ref(option, root) for option in schema[key]]
+            # Prefer a real value over null so downstream code gets something to show
+            non_null = [option for option in options if option.get("type") != "null"]
+            return fixture_from_schema((non_null or options)[0], root, name)
+    if "allOf" in schema:
+        return fixture_from_schema(schema["allOf"][0], root, name)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "default" in schema and schema["default"] is not None:
+        return schema["default"]
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+
+    if schema_type == "object":
+        properties = schema.get("properties", {})
+        required = schema.get("required", list(properties))
+        return {
+            key: fixture_from_schema(properties[key], root, key)
+            for key in required
+            if key in properties
+        }
+    if schema_type == "array":
+        count = max(schema.get("minItems", 1), 1)
+        if "maxItems" in schema:
+            count = min(count, schema["maxItems"])
+        return [fixture_from_schema(schema.get("items", {}), root, name) for _ in range(count)]
+    if schema_type == "integer":
+        value = schema.get("minimum", 1)
+        return min(value, schema["maximum"]) if "maximum" in schema else value
+    if schema_type == "number":
+        return 1.0
+    if schema_type == "boolean":
+        return True
+    if schema_type == "null":
+        return None
+
+    # Numeric-looking strings for metric values so process_data can parse them
+    text = "12" if name in ("value", "raw_value") else f"Sample {name or 'text'}"
+    max_length = schema.get("maxLength")
+    return text[:max_length] if max_length else text
@@ -0,0 +1,309 @@
+import json
+import logging
+import math
+import os
+import re
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# How structured (non-string) chain inputs are written into prompts:
+#   repr  the Python repr the prompts have always received (default)
+#   toon  compact, canonical TOON-style text, opt in per chain once
+#         `python -m benchmarks.input_encoding --live` shows the same output quality
+INPUT_ENCODINGS = ("toon", "repr")
+INPUT_ENCODING = os.getenv("LLM_INPUT_ENCODING", "repr")
+# Chains kept on another encoding, override with LLM_INPUT_ENCODING_<CHAIN>.
+# The guidelines chain returns slides that must mirror the report's structure key for key
+CHAIN_ENCODINGS = {"guidelines": "repr"}
+
+INDENT = "  "
+DELIMITER = ","
+
+BARE_KEY = re.compile(r"[A-Za-z_][A-Za-z0-9_.]*")
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+# Characters that would make an unquoted string ambiguous to read back
+SPECIAL = set(',:"\\[]{}\n\r\t')
+LITERALS = {"null": None, "true": True, "false": False}
+
+
+def encode_key(key):
+    key = str(key)
+    return key if BARE_KEY.fullmatch(key) else json.dumps(key, ensure_ascii=False)
+
+
+def encode_primitive(value):
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return "null"
+        if value.is_integer() and abs(value) < 1e16:
+            return str(int(value))
+        return repr(value)
+    text = value if isinstance(value, str) else str(value)
+    if (
+        not text
+        or text != text.strip()
+        or text.startswith("- ")
+        or text in LITERALS
+        or NUMBER.fullmatch(text)
+        or any(char in SPECIAL for char in text)
+    ):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+def is_primitive(value):
+    return not isinstance(value, (dict, list, tuple))
+
+
+def table_fields(items):
+    """Shared keys of a list of flat dicts with identical keys, else None"""
+    if not items or not all(isinstance(item, dict) and item for item in items):
+        return None
+    fields = sorted(items[0], key=str)
+    for item in items:
+        if sorted(item, key=str) != fields or not all(is_primitive(v) for v in item.values()):
+            return None
+    return fields
+
+
+def encode_array(prefix, items, depth):
+    """Lines of a list whose header starts with prefix ("key" or "" for list items)"""
+    items = list(items)
+    pad = INDENT * depth
+    if all(is_primitive(item) for item in items):
+        row = DELIMITER.join(encode_primitive(item) for item in items)
+        return [f"{pad}{prefix}[{len(items)}]:" + (f" {row}" if items else "")]
+
+    fields = table_fields(items)
+    if fields:
+        header = DELIMITER.join(encode_key(field) for field in fields)
+        lines = [f"{pad}{prefix}[{len(items)}]{{{header}}}:"]
+        for item in items:
+            row = DELIMITER.join(encode_primitive(item[field]) for field in fields)
+            lines.append(f"{INDENT * (depth + 1)}{row}")
+        return lines
+
+    lines = [f"{pad}{prefix}[{len(items)}]:"]
+    for item in items:
+        lines.extend(encode_list_item(item, depth + 1))
+    return lines
+
+
+def encode_list_item(item, depth):
+    pad = INDENT * depth
+    if is_primitive(item):
+        return [f"{pad}- {encode_primitive(item)}"]
+    if isinstance(item, dict):
+        if not item:
+            return [f"{pad}- {{}}"]
+        # First field on the hyphen line, the rest aligned under it
+        lines = encode_object(item, depth + 1)
+        lines[0] = f"{pad}- {lines[0][len(pad) + len(INDENT):]}"
+        return lines
+    lines = encode_array("", item, depth)
+    lines[0] = f"{pad}- {lines[0][len(pad):]}"
+    return lines
+
+
+def encode_object(value, depth):
+    pad = INDENT * depth
+    lines = []
+    for key in sorted(value, key=str):
+        child = value[key]
+        if isinstance(child, dict):
+            lines.append(f"{pad}{encode_key(key)}:")
+            lines.extend(encode_object(child, depth + 1))
+        elif isinstance(child, (list, tuple)):
+            lines.extend(encode_array(encode_key(key), child, depth))
+        else:
+            lines.append(f"{pad}{encode_key(key)}: {encode_primitive(child)}")
+    return lines
+
+
+def encode(value):
+    """
+    Canonical compact text for a JSON-like value, a subset of TOON:
+    objects as indented `key: value` lines with sorted keys, lists of flat records
+    as one `key[N]{field,...}:` header followed by a row of values per record,
+    lists of primitives inline as `key[N]: a,b,c`. Strings are only quoted when
+    they could be misread. The same value always encodes to the same text.
+    """
+    if isinstance(value, dict):
+        return "\n".join(encode_object(value, 0))
+    if isinstance(value, (list, tuple)):
+        return "\n".join(encode_array("", value, 0))
+    return encode_primitive(value)
+
+
+def chain_encoding(name):
+    key = f"LLM_INPUT_ENCODING_{name.upper().replace('-', '_').replace(':', '_')}"
+    return os.getenv(key, CHAIN_ENCODINGS.get(name, INPUT_ENCODING))
+
+
+def serialize_inputs(input_data, encoding=None):
+    """
+    input_data as rendered into a prompt: strings (raw source text) pass through,
+    dicts, lists and other values are encoded with the configured input encoding
+    """
+    encoding = encoding or INPUT_ENCODING
+    if encoding not in INPUT_ENCODINGS:
+        raise ValueError(
+            f"Unknown input encoding '{encoding}', expected one of {INPUT_ENCODINGS}"
+        )
+    if encoding == "repr":
+        return input_data
+    return {
+        key: value if isinstance(value, str) else encode(value)
+        for key, value in input_data.items()
+    }
+
+
+# Reading encoded text back, used to check the encoding is lossless
+
+
+def split_row(text):
+    """Values of a delimited row, keeping delimiters inside quoted strings"""
+    values, current, quoted, escaped = [], [], False, False
+    for char in text:
+        if quoted:
+            current.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                quoted = False
+        elif char == '"':
+            quoted = True
+            current.append(char)
+        elif char == DELIMITER:
+            values.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    values.append("".join(current))
+    return values
+
+
+def decode_primitive(token):
+    token = token.strip()
+    if token.startswith('"'):
+        return json.loads(token)
+    if token in LITERALS:
+        return LITERALS[token]
+    if NUMBER.fullmatch(token):
+        return float(token) if any(char in token for char in ".eE") else int(token)
+    return token
+
+
+def split_key(text):
+    """(key, rest) when text starts with a key followed by ':' or '[', else None"""
+    if text.startswith('"'):
+        end = 1
+        while end < len(text):
+            if text[end] == "\\":
+                end += 2
+                continue
+            if text[end] == '"':
+                break
+            end += 1
+        key, rest = json.loads(text[: end + 1]), text[end + 1 :]
+    else:
+        match = BARE_KEY.match(text)
+        if not match:
+            return None
+        key, rest = match.group(), text[match.end() :]
+    if rest.startswith(":") or rest.startswith("["):
+        return key, rest
+    return None
+
+
+ARRAY_HEADER = re.compile(r"\[(\d+)\](?:\{(.*)\})?:(?: (.*))?$")
+
+
+class Decoder:
+    def __init__(self, text):
+        self.lines = [line for line in text.split("\n") if line.strip()]
+        self.position = 0
+
+    def depth(self, index):
+        line = self.lines[index]
+        return (len(line) - len(line.lstrip(" "))) // len(INDENT)
+
+    def has_child(self, depth):
+        return self.position < len(self.lines) and self.depth(self.position) > depth
+
+    def array(self, header, depth):
+        match = ARRAY_HEADER.match(header)
+        if not match:
+            raise ValueError(f"Malformed array header '{header}'")
+        count, fields, inline = int(match.group(1)), match.group(2), match.group(3)
+        if fields is not None:
+            keys = [decode_primitive(field) for field in split_row(fields)]
+            rows = []
+            for _ in range(count):
+                row = split_row(self.lines[self.position].strip())
+                self.position += 1
+                rows.append(dict(zip(keys, (decode_primitive(value) for value in row))))
+            return rows
+        if inline is not None or not self.has_child(depth):
+            return [decode_primitive(value) for value in split_row(inline)] if count else []
+        return [self.list_item(depth + 1) for _ in range(count)]
+
+    def list_item(self, depth):
+        line = self.lines[self.position].strip()
+        if not line.startswith("-"):
+            raise ValueError(f"Expected a list item, got '{line}'")
+        rest = line[1:].strip()
+        if rest == "{}":
+            self.position += 1
+            return {}
+        if rest.startswith("["):
+            self.position += 1
+            return self.array(rest, depth)
+        if split_key(rest):
+            # Read the hyphen line as the first field of an object one level deeper
+            self.lines[self.position] = INDENT * (depth + 1) + rest
+            return self.object(depth + 1)
+        self.position += 1
+        return decode_primitive(rest)
+
+    def object(self, depth):
+        value = {}
+        while self.position < len(self.lines) and self.depth(self.position) == depth:
+            line = self.lines[self.position].strip()
+            parsed = split_key(line)
+            if parsed is None:
+                raise ValueError(f"Expected 'key: value', got '{line}'")
+            key, rest = parsed
+            self.position += 1
+            if rest.startswith("["):
+                value[key] = self.array(rest, depth)
+            elif rest == ":":
+                value[key] = self.object(depth + 1) if self.has_child(depth) else {}
+            else:
+                value[key] = decode_primitive(rest[1:])
+        return value
+
+
+def decode(text):
+    """The value encode() wrote as text"""
+    decoder = Decoder(text)
+    if not decoder.lines:
+        return {}
+    first = decoder.lines[0].strip()
+    if first.startswith("["):
+        decoder.position = 1
+        return decoder.array(first, 0)
+    if len(decoder.lines) == 1 and split_key(first) is None:
+        return decode_primitive(first)
+    return decoder.object(0)
@@ -0,0 +1,278 @@
+import base64
+import copy
+import functools
+import hashlib
+import logging
+import os
+from collections import defaultdict
+
+import tiktoken
+from tiktoken_ext.openai_public import ENDOFPROMPT, ENDOFTEXT
+from dotenv import load_dotenv
+
+from core.serialization import chain_encoding, serialize_inputs
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# Encoding of gpt-4.1, gpt-4.1-mini and gpt-5.1, read from the copy in the repo so
+# counts (and so trimming and response cache keys) never depend on a download
+TOKENIZER_ENCODING = "o200k_base"
+TOKENIZER_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "tokenizer", "o200k_base.tiktoken"
+)
+TOKENIZER_SHA256 = "446a9538cb6c348e3516120d7c08b09f57c36495e2acfffe59a5bf8b0cfb1a2d"
+# As in tiktoken_ext.openai_public.o200k_base
+TOKENIZER_PATTERN = "|".join(
+    [
+        r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+"""
+        r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+        r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*"""
+        r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+        r"""\p{N}{1,3}""",
+        r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+        r"""\s*[\r\n]+""",
+        r"""\s+(?!\S)""",
+        r"""\s+""",
+    ]
+)
+TOKENIZER_SPECIAL_TOKENS = {ENDOFTEXT: 199999, ENDOFPROMPT: 200018}
+# Per-message framing the API adds around each message's content
+TOKENS_PER_MESSAGE = 4
+
+# Prompt tokens a chain may send, override with LLM_TOKEN_BUDGET_<CHAIN>
+DEFAULT_TOKEN_BUDGET = 24_000
+TOKEN_BUDGETS = {
+    "quick_action": 32_000,
+    "closing_statement": 32_000,
+    "guidelines": 40_000,
+}
+
+# Inputs holding Zylo posts, newest first
+POST_KEYS = ("recent_post_content", "zylo_post_content", "zylo_v6_post_content")
+# Pasted tables with one metric per row and one period per column, oldest first
+PERIOD_TABLE_KEYS = ("quicksight_data",)
+# Pasted source data that may be cut line by line as a last resort
+RAW_TEXT_KEYS = (
+    "zylo_v6_data",
+    "zylo_delivery_data",
+    "zylo_v6_post_content",
+    "zylo_post_content",
+    "msp_data",
+)
+MIN_PERIODS = 2
+
+
+def chain_budget(name):
+    key = f"LLM_TOKEN_BUDGET_{name.upper().replace('-', '_').replace(':', '_')}"
+    return int(os.getenv(key, TOKEN_BUDGETS.get(name, DEFAULT_TOKEN_BUDGET)))
+
+
+def load_ranks(path=TOKENIZER_FILE):
+    """BPE ranks of a .tiktoken file, checked against the published o200k_base hash"""
+    try:
+        with open(path, "rb") as f:
+            contents = f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Tokenizer file {path} is missing from the checkout") from None
+    if hashlib.sha256(contents).hexdigest() != TOKENIZER_SHA256:
+        raise ValueError(f"Tokenizer file {path} doesn't match the {TOKENIZER_ENCODING} hash")
+    ranks = {}
+    for line in contents.splitlines():
+        if line:
+            token, rank = line.split()
+            ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding():
+    """The o200k_base tokenizer, built from TOKENIZER_FILE without touching the network"""
+    return tiktoken.Encoding(
+        name=TOKENIZER_ENCODING,
+        pat_str=TOKENIZER_PATTERN,
+        mergeable_ranks=load_ranks(),
+        special_tokens=TOKENIZER_SPECIAL_TOKENS,
+    )
+
+
+def count_tokens(text):
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def prompt_tokens(prompt, input_data, encoding=None):
+    """Tokens of the prompt as it will be sent, rendered with (encoded) input_data"""
+    return sum(
+        count_tokens(str(message.content)) + TOKENS_PER_MESSAGE
+        for message in prompt.format_messages(**serialize_inputs(input_data, encoding))
+    )
+
+
+def period_value(period):
+    value = period.get("raw_value", period.get("value"))
+    try:
+        return float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return None
+
+
+def walk(value, visit, key=None):
+    """Rebuild value bottom-up, letting visit(key, node) replace any node"""
+    if isinstance(value, dict):
+        value = {child_key: walk(child, visit, child_key) for child_key, child in value.items()}
+    elif isinstance(value, list):
+        value = [walk(child, visit, key) for child in value]
+    return visit(key, value)
+
+
+def drop_zero_periods(input_data):
+    """Periods whose value is 0 or missing, keeping each metric's first and last period"""
+    removed = 0
+
+    def visit(key, node):
+        nonlocal removed
+        if key != "periods" or not isinstance(node, list) or len(node) <= MIN_PERIODS:
+            return node
+        kept = [
+            period
+            for index, period in enumerate(node)
+            if index in (0, len(node) - 1)
+            or not isinstance(period, dict)
+            or period_value(period)
+        ]
+        removed += len(node) - len(kept)
+        return kept
+
+    return walk(input_data, visit), removed
+
+
+def drop_oldest_posts(input_data):
+    """The older half of every post list (posts are listed newest first)"""
+    removed = 0
+
+    def visit(key, node):
+        nonlocal removed
+        if key not in POST_KEYS or not isinstance(node, list) or len(node) <= 1:
+            return node
+        keep = (len(node) + 1) // 2
+        removed += len(node) - keep
+        return node[:keep]
+
+    return walk(input_data, visit), removed
+
+
+def drop_oldest_periods(input_data):
+    """The older half of every metric's periods, down to MIN_PERIODS"""
+    removed = 0
+
+    def visit(key, node):
+        nonlocal removed
+        if key != "periods" or not isinstance(node, list) or len(node) <= MIN_PERIODS:
+            return node
+        keep = max(MIN_PERIODS, (len(node) + 1) // 2)
+        removed += len(node) - keep
+        return node[-keep:]
+
+    return walk(input_data, visit), removed
+
+
+def drop_table_columns(text):
+    """The older half of every pipe table's period columns, down to MIN_PERIODS"""
+    lines, removed = [], 0
+    width = drop = None
+    for line in text.splitlines():
+        if not line.strip().startswith("|"):
+            width = None
+            lines.append(line)
+            continue
+        cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+        if width is None:
+            # Header row: the metric label, then one column per period
+            width, periods = len(cells), len(cells) - 1
+            drop = periods - max(MIN_PERIODS, (periods + 1) // 2) if periods > MIN_PERIODS else 0
+            removed += drop
+        if drop and len(cells) == width:
+            line = "| " + " | ".join(cells[:1] + cells[1 + drop :]) + " |"
+        lines.append(line)
+    return "\n".join(lines), removed
+
+
+def drop_oldest_table_columns(input_data):
+    """The older half of the period columns of pasted metric tables, keeping every metric"""
+    removed = 0
+    for key in PERIOD_TABLE_KEYS:
+        if isinstance(input_data.get(key), str):
+            text, dropped = drop_table_columns(input_data[key])
+            if dropped:
+                input_data = {**input_data, key: text}
+                removed += dropped
+    return input_data, removed
+
+
+def truncate_raw_text(input_data):
+    """The last half of the lines of the longest pasted source text"""
+    candidates = [
+        key
+        for key in RAW_TEXT_KEYS
+        if isinstance(input_data.get(key), str) and input_data[key].count("\n") >= 1
+    ]
+    if not candidates:
+        return input_data, 0
+    key = max(candidates, key=lambda candidate: (len(input_data[candidate]), candidate))
+    lines = input_data[key].splitlines()
+    keep = (len(lines) + 1) // 2
+    return {**input_data, key: "\n".join(lines[:keep])}, len(lines) - keep
+
+
+# Lowest-value inputs first, each step repeats until it has nothing left to cut
+TRIM_STEPS = (
+    ("zero-value periods", drop_zero_periods),
+    ("oldest posts", drop_oldest_posts),
+    ("oldest periods", drop_oldest_periods),
+    ("oldest table columns", drop_oldest_table_columns),
+    ("raw text lines", truncate_raw_text),
+)
+
+
+def enforce_token_budget(name, prompt, input_data):
+    """
+    input_data trimmed until the rendered prompt fits the chain's token budget.
+    Trimming only depends on the input, so the same input always gives the same
+    prompt (and the same response cache key). Returns input_data unchanged if it fits.
+    """
+    budget = chain_budget(name)
+    encoding = chain_encoding(name)
+    tokens = prompt_tokens(prompt, input_data, encoding)
+    if tokens <= budget:
+        return input_data
+
+    original_tokens = tokens
+    # Only inputs the prompt renders count, the rest are passed through untouched
+    rendered = set(prompt.input_variables)
+    trimmed = copy.deepcopy({key: value for key, value in input_data.items() if key in rendered})
+    cuts = defaultdict(int)
+    for label, step in TRIM_STEPS:
+        while tokens > budget:
+            trimmed, removed = step(trimmed)
+            if not removed:
+                break
+            cuts[label] += removed
+            tokens = prompt_tokens(prompt, trimmed, encoding)
+        if tokens <= budget:
+            break
+    trimmed = {**input_data, **trimmed}
+
+    cut_summary = ", ".join(f"{count} {label}" for label, count in cuts.items())
+    cut_summary = cut_summary or "nothing trimmable"
+    if tokens > budget:
+        logger.warning(
+            f"{name} prompt is {tokens} tokens after trimming ({cut_summary}), "
+            f"over its {budget} token budget"
+        )
+    else:
+        logger.info(
+            f"{name} prompt trimmed from {original_tokens} to {tokens} tokens "
+            f"(budget {budget}): cut {cut_summary}"
+        )
+    return trimmed
+
@@ -0,0 +1,258 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = (
+    "calls",
+    "errors",
+    "input_tokens",
+    "cached_tokens",
+    "output_tokens",
+    "reasoning_tokens",
+    "total_tokens",
+    "retries",
+    "latency",
+    "cost_usd",
+)
+
+# USD per 1M tokens (input, cached input, output), reasoning tokens bill as output
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-5.1": (1.25, 0.125, 10.00),
+}
+BATCH_DISCOUNT = 0.5
+
+USAGE_FILE_SUFFIX = ".usage.json"
+
+# Tracker of the report currently being generated, set by the pipeline
+run_usage_var = ContextVar("run_usage", default=None)
+
+# HTTP attempts of the chain call running in this context, counted by the shared client
+http_attempts_var = ContextVar("llm_http_attempts", default=None)
+
+
+def model_prices(model):
+    """Prices of a model, matching dated snapshots (gpt-4.1-2025-04-14) to their base name"""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model and model.startswith(name):
+            return MODEL_PRICES[name]
+    return None
+
+
+def call_cost(model, input_tokens, cached_tokens, output_tokens, batch=False):
+    prices = model_prices(model)
+    if prices is None:
+        return 0.0
+    input_price, cached_price, output_price = prices
+    cost = (
+        (input_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + output_tokens * output_price
+    ) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+def usage_from_response_body(usage):
+    """usage_metadata-shaped dict from the `usage` of a raw Responses API body"""
+    usage = usage or {}
+    return {
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "total_tokens": usage.get("total_tokens", 0),
+        "input_token_details": {
+            "cache_read": (usage.get("input_tokens_details") or {}).get("cached_tokens", 0)
+        },
+        "output_token_details": {
+            "reasoning": (usage.get("output_tokens_details") or {}).get("reasoning_tokens", 0)
+        },
+    }
+
+
+def call_record(name, model, usage, latency, retries=0, error=None, batch=False):
+    """One chain call: usage is a single model's usage_metadata (or None if it failed)"""
+    usage = usage or {}
+    input_tokens = usage.get("input_tokens", 0)
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    output_tokens = usage.get("output_tokens", 0)
+    return {
+        "chain": name,
+        "model": model,
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "input_tokens": input_tokens,
+        "cached_tokens": cached_tokens,
+        "output_tokens": output_tokens,
+        "reasoning_tokens": (usage.get("output_token_details") or {}).get("reasoning", 0) or 0,
+        "total_tokens": usage.get("total_tokens", input_tokens + output_tokens),
+        "latency": round(latency, 3),
+        "retries": retries,
+        "cost_usd": round(call_cost(model, input_tokens, cached_tokens, output_tokens, batch), 6),
+        "batch": batch,
+        "error": error,
+    }
+
+
+def derived_stats(totals):
+    """Ratios for one set of USAGE_FIELDS totals"""
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    totals["latency"] = round(totals["latency"], 3)
+    totals["cache_hit_ratio"] = (
+        round(totals["cached_tokens"] / totals["input_tokens"], 3)
+        if totals["input_tokens"]
+        else 0.0
+    )
+    totals["avg_latency"] = (
+        round(totals["latency"] / totals["calls"], 3) if totals["calls"] else 0.0
+    )
+    return totals
+
+
+class UsageTracker:
+    """
+    Tokens (prompt, cached, completion, reasoning), latency, retries and cost per
+    chain name. With keep_calls the individual call records are kept as well.
+    """
+
+    def __init__(self, keep_calls=True):
+        self.lock = threading.Lock()
+        self.keep_calls = keep_calls
+        self.calls = []
+        self.chains = defaultdict(lambda: dict.fromkeys(USAGE_FIELDS, 0))
+
+    def record(self, record):
+        with self.lock:
+            if self.keep_calls:
+                self.calls.append(record)
+            totals = self.chains[record["chain"]]
+            totals["calls"] += 1
+            totals["errors"] += 1 if record["error"] else 0
+            for field in USAGE_FIELDS[2:]:
+                totals[field] += record[field]
+
+    def stats(self):
+        """Totals per chain, most expensive first"""
+        with self.lock:
+            chains = {name: dict(totals) for name, totals in self.chains.items()}
+        return dict(
+            sorted(
+                ((name, derived_stats(totals)) for name, totals in chains.items()),
+                key=lambda item: item[1]["cost_usd"],
+                reverse=True,
+            )
+        )
+
+    def total(self):
+        with self.lock:
+            chains = [dict(totals) for totals in self.chains.values()]
+        total = dict.fromkeys(USAGE_FIELDS, 0)
+        for totals in chains:
+            for field in USAGE_FIELDS:
+                total[field] += totals[field]
+        return derived_stats(total)
+
+    def report(self):
+        """Everything written next to a report's JSON"""
+        with self.lock:
+            calls = list(self.calls)
+        return {"total": self.total(), "chains": self.stats(), "calls": calls}
+
+
+# Every chain call in the process
+usage_tracker = UsageTracker(keep_calls=False)
+
+
+def record_call(record, run_usage=None):
+    """Add a call record to the process totals and to the current report's tracker"""
+    usage_tracker.record(record)
+    run_usage = run_usage or run_usage_var.get()
+    if run_usage is not None:
+        run_usage.record(record)
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """
+    Records every chat model call made by one chain invocation, with the latency
+    from request to response and how many HTTP attempts the OpenAI client needed.
+    Set `attempts` as http_attempts_var around the call for the retry count.
+    """
+
+    run_inline = True
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        self.attempts = {"count": 0}
+        self.started = {}
+        self.models = {}
+
+    def retries(self):
+        retries = max(0, self.attempts["count"] - 1)
+        self.attempts["count"] = 0
+        return retries
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.started[run_id] = time.perf_counter()
+        self.models[run_id] = (kwargs.get("metadata") or {}).get("ls_model_name")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        latency = time.perf_counter() - self.started.pop(run_id, time.perf_counter())
+        model, usage = self.models.pop(run_id, None), None
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if message is not None and message.usage_metadata:
+                    model = message.response_metadata.get("model_name") or model
+                    usage = message.usage_metadata
+        record_call(call_record(self.name, model, usage, latency, self.retries()))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        latency = time.perf_counter() - self.started.pop(run_id, time.perf_counter())
+        model = self.models.pop(run_id, None)
+        record_call(
+            call_record(self.name, model, None, latency, self.retries(), error=str(error))
+        )
+
+
+def usage_path_for(output_path):
+    """<name>.usage.json next to <name>.json"""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}{USAGE_FILE_SUFFIX}")
+
+
+def write_usage(output_path, report):
+    path = usage_path_for(output_path)
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    except Exception as e:
+        logger.error(f"Could not write usage to {path}: {str(e)}")
+        return None
+    return path
+
+
+def aggregate_usage(paths):
+    """Merge the per-chain totals of several usage files, most expensive chain first"""
+    merged = UsageTracker(keep_calls=False)
+    reports = 0
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                chains = json.load(f)["chains"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Skipping usage file {path}: {str(e)}")
+            continue
+        reports += 1
+        with merged.lock:
+            for name, totals in chains.items():
+                for field in USAGE_FIELDS:
+                    merged.chains[name][field] += totals.get(field, 0)
+    return {"reports": reports, "total": merged.total(), "chains": merged.stats()}
@@ -5,14 +5,12 @@ import json
 import pandas as pd  # Added pandas for the table display
 from datetime import datetime
 from pathlib import Path
-from src.preprocess_data_for_report import return_preprocess_data, identify_cohort
-from src.slide_mapping import run_slide_generation
-from core.chains.preprocess import category_chain
-from core.chains.general_cohort_chain.reasoning_slides import (
-    quick_action_reasoning_chain,
-    closing_statement_chain,
-)
-from core.chains.guidelines_chain import return_updated_report_checking_guidelines
+from src.pipeline import run_report_pipeline, regenerate_slides, SKIPPED
+from src.run_store import failed_slide_names
+from core.llm_client import get_client_factory
+from core.chains.registry import chain_registry
+from core.usage import write_usage
+from src.slide_mapping import get_slide_functions
 
 # Configure logging
 LOG_DIR = Path("logs")
@@ -413,8 +411,8 @@ def calculate_char_counts(data, path=""):
     return report
 
 
-def save_json_response(data, filename_prefix):
-    """Save JSON response to a file with timestamp"""
+def save_json_response(data, filename_prefix, usage=None):
+    """Save JSON response to a file with timestamp, and its LLM usage next to it"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = OUTPUT_DIR / f"{filename_prefix}_{timestamp}.json"
 
@@ -422,31 +420,210 @@ def save_json_response(data, filename_prefix):
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         logger.info(f"Successfully saved {filename_prefix} to {filename}")
+        if usage is not None:
+            write_usage(filename, usage)
         return filename
     except Exception as e:
         logger.error(f"Error saving {filename_prefix}: {str(e)}")
         return None
 
 
-def merge_final_report(final_report, quick_action_response, closing_statement_response):
-    """Merge final report with quick action and closing statement"""
-    merged_report = final_report.copy()
+SLIDE_STATUS_LABELS = {
+    "pending": "⏳ Pending",
+    "ready": "✅ Ready",
+    "revised": "✏️ Revised by guidelines",
+}
 
-    # Add quick_action_for_you section
-    merged_report["quick_action_for_you"] = quick_action_response.get(
-        "quick_action", quick_action_response
-    )
+# Reasoning nodes and the report keys they end up under
+REASONING_REPORT_KEYS = {
+    "quick_action": "quick_action_for_you",
+    "closing_statement": "closing_statement",
+}
+
+
+def render_slide(placeholder, name, status, result=None, seconds=None):
+    """Draw one slide card: name, status, timing and content once available"""
+    with placeholder.container():
+        timing = f" · {seconds:.1f}s" if seconds is not None else ""
+        st.markdown(f"**{name}** — {SLIDE_STATUS_LABELS[status]}{timing}")
+        if result is not None:
+            with st.expander(f"{name} content", expanded=False):
+                st.json(result)
+
+
+def make_slide_renderer(slides_area):
+    """
+    Build an on_node_done callback that streams slides to the page as their
+    pipeline nodes finish, then marks the ones the guidelines check rewrote.
+    """
+    state = {"placeholders": {}, "finished": {}, "cohort": None, "category": None}
+
+    def show_plan():
+        plan = [
+            slide["name"]
+            for slide in get_slide_functions(
+                str(state["cohort"]), state["category"]["category"]
+            )
+        ] + list(REASONING_REPORT_KEYS.values())
+        with slides_area:
+            for name in plan:
+                state["placeholders"][name] = st.empty()
+                if name in state["finished"]:
+                    result, seconds = state["finished"][name]
+                    render_slide(state["placeholders"][name], name, "ready", result, seconds)
+                else:
+                    render_slide(state["placeholders"][name], name, "pending")
+
+    def on_node_done(node, result, seconds):
+        if node in ("cohort", "category"):
+            state[node] = result
+            if state["cohort"] is not None and state["category"] is not None:
+                show_plan()
+            return
+
+        if node.startswith("slide:") or node in REASONING_REPORT_KEYS:
+            if result is SKIPPED:
+                return
+            name = REASONING_REPORT_KEYS.get(node, node.removeprefix("slide:"))
+            state["finished"][name] = (result, seconds)
+            if name in state["placeholders"]:
+                render_slide(state["placeholders"][name], name, "ready", result, seconds)
+            return
+
+        if node == "report":
+            for name, (before, slide_seconds) in state["finished"].items():
+                if name in state["placeholders"] and result.get(name) != before:
+                    render_slide(
+                        state["placeholders"][name],
+                        name,
+                        "revised",
+                        result.get(name),
+                        slide_seconds,
+                    )
+
+    return on_node_done
+
+
+def show_results(results):
+    """Stage outputs, timings and the final report of a (re)generated run"""
+    new_response = results["preprocess"]["new_response"]
+    category = results["category"]
+    cohort = results["cohort"]
+    complete_report_without_checking_guidelines = results["report_before_guidelines"]
+    complete_report = results["report"]
+
+    with st.expander("📊 Preprocessed Input", expanded=False):
+        if new_response:
+            st.json(new_response)
+
+    with st.expander("📈 Category & Cohort Analysis", expanded=False):
+        if category:
+            st.subheader("Category (Uptrend or Downtrend)")
+            st.json(category)
+        if cohort:
+            st.subheader("Cohort Number")
+            st.text(cohort)
+
+    with st.expander("📈 Report before checking guidelines", expanded=False):
+        if complete_report_without_checking_guidelines:
+            st.json(complete_report_without_checking_guidelines)
+
+    with st.expander("⏱️ Pipeline critical path", expanded=False):
+        st.table(results["critical_path"])
+        st.subheader("LLM governor")
+        st.json(results["llm_governor"])
+        st.subheader("Chain latency, timeouts and hedges")
+        st.table(results["latency"])
+        st.subheader("Tokens, cost and prompt cache hits per chain")
+        st.json(results["usage"]["total"])
+        st.table(results["usage"]["chains"])
+        st.subheader("Response cache hits per chain (since startup)")
+        st.table(results["llm_cache"])
+        st.subheader("Model routing and escalations per chain (since startup)")
+        st.table(results["model_routing"])
+        if "speculation" in results:
+            st.subheader("Speculative slides")
+            st.json(results["speculation"])
+
+    # Display results with collapsible sections
+    st.success("✅ Analysis completed successfully!")
+
+    # Display Complete Merged Report
+    st.header("📋 Complete Report")
+    if complete_report:
+        st.json(complete_report)
+
+    # ------------------------------------------------------------------
+    # NEW SECTION: Character Count Analysis
+    # ------------------------------------------------------------------
+    with st.expander("📏 Character Count Analysis", expanded=False):
+        if complete_report:
+            # 1. Calculate the counts
+            char_data = calculate_char_counts(complete_report)
+
+            # 2. Create DataFrame
+            df_chars = pd.DataFrame(char_data)
+
+            # 3. Display interactive table
+            if not df_chars.empty:
+                st.dataframe(
+                    df_chars,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "Section": st.column_config.TextColumn(
+                            "Section Key", width="medium"
+                        ),
+                        "With Spaces": st.column_config.NumberColumn(
+                            "Chars (with spaces)", format="%d"
+                        ),
+                        "No Spaces": st.column_config.NumberColumn(
+                            "Chars (no spaces)", format="%d"
+                        ),
+                        "Content": st.column_config.TextColumn(
+                            "Content Preview", width="large"
+                        ),
+                    },
+                )
+            else:
+                st.info("No text content found to analyze.")
+        else:
+            st.warning("Report generation failed, no data to count.")
 
-    # Add closing_statement section
-    merged_report["closing_statement"] = closing_statement_response.get(
-        "closing_statement", closing_statement_response
-    )
 
-    return merged_report
+@st.cache_resource
+def llm_client_factory():
+    """Shared HTTP pool, chat models and chains, built once for every session and rerun"""
+    chain_registry.build_all()
+    return get_client_factory()
+
+
+def session_event_loop():
+    """
+    One event loop per browser session, reused across reruns so the keep-alive
+    connections opened on it survive between clicks.
+    """
+    if "event_loop" not in st.session_state:
+        st.session_state["event_loop"] = asyncio.new_event_loop()
+    return st.session_state["event_loop"]
+
+
+def run_in_session_loop(coro):
+    loop = session_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        # A rerun can interrupt the script mid-report, drop what it left behind
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
 
 
 async def main():
     st.title("Data Input Interface")
+    client_factory = llm_client_factory()
 
     # Create three columns for side-by-side layout
     col1, col2, col3, col4 = st.columns(4)
@@ -483,148 +660,74 @@ async def main():
         )
     msp_data = ""
 
+    speculative = st.checkbox(
+        "Speculative slide generation",
+        value=False,
+        help="Start the slides of both trend branches before the category is known. "
+        "Faster, but spends tokens on the branch that gets discarded.",
+    )
+
     # Analyze Button
     if st.button("Analyse"):
         logger.info("Analysis started")
+        # In the background, the page never waits on it. Only opens connections on a
+        # session's first report or after they have expired
+        asyncio.create_task(client_factory.prewarm())
 
-        # Variables to store intermediate results
-        new_response = None
-        social_stats = None
-        category = None
-        cohort = None
-        data = None
-        quick_action_response = None
-        closing_statement_response = None
-        complete_report = None
-
-        with st.spinner("Preprocessing Input"):
-            # Preprocessing
-            new_response, social_stats = await return_preprocess_data(
-                ignite_api_data=ignite_payload_data,
-                quicksight_data_declining=quicksight_data,
-                zylo_v6_data=zylov6_data,
-                zylo_v6_post_content=zylov6_post_content,
-            )
-            logger.info("Preprocessing completed successfully")
+        st.header("🧩 Slides")
+        slides_area = st.container()
 
-        with st.spinner("Identifying Cohort and Uptrend or Downtrend"):
-            # Category and Cohort Analysis
-            category_task = category_chain(social_stats)
-            cohort_task = identify_cohort(
-                quicksight_data=quicksight_data,
+        with st.spinner("Generating the report"):
+            # Every stage starts as soon as the inputs it needs are ready,
+            # slides are drawn into slides_area as each chain finishes
+            results = await run_report_pipeline(
                 ignite_api_data=ignite_payload_data,
+                quicksight_data=quicksight_data,
                 zylo_v6_data=zylov6_data,
-                social_stats=social_stats,
+                zylo_v6_post_content=zylov6_post_content,
                 msp_data=msp_data,
+                guidelines=guidelines,
+                speculative=speculative,
+                on_node_done=make_slide_renderer(slides_area),
             )
-
-            category, cohort = await asyncio.gather(category_task, cohort_task)
-            logger.info(f"Category: {category['category']}, Cohort: {cohort}")
-
-        with st.expander("📊 Preprocessed Input", expanded=False):
-            if new_response:
-                st.json(new_response)
-
-        with st.expander("📈 Category & Cohort Analysis", expanded=False):
-            if category:
-                st.subheader("Category (Uptrend or Downtrend)")
-                st.json(category)
-            if cohort:
-                st.subheader("Cohort Number")
-                st.text(cohort)
-
-        with st.spinner("Generating the Generic slides"):
-            # Report Generation
-            response = await run_slide_generation(
-                str(cohort),
-                category["category"],
-                ignite_payload_data,
-                quicksight_data,
-                zylov6_data,
-                social_stats,
-                new_response.get("delivery_dates"),
-                new_response.get("recent_post_content"),
-            )
-            data = response
-            logger.info("Report generation completed successfully")
-
-        with st.spinner("Generating the final slides with reasoning"):
-            # Final slides generation
-            (
-                quick_action_response,
-                closing_statement_response,
-            ) = await asyncio.gather(
-                quick_action_reasoning_chain(
-                    other_analysis=data, preprocessed_input=new_response
-                ),
-                closing_statement_chain(
-                    other_analysis=data, preprocessed_input=new_response
-                ),
+            logger.info(
+                f"Category: {results['category']['category']}, Cohort: {results['cohort']}"
             )
-
-            # Merge final report
-            complete_report_without_checking_guidelines = merge_final_report(
-                data, quick_action_response, closing_statement_response
-            )
-
             logger.info("Analysis completed successfully")
-
-        with st.expander("📈 Report before checking guidelines", expanded=False):
-            if complete_report_without_checking_guidelines:
-                st.json(complete_report_without_checking_guidelines)
-
-        with st.spinner(
-            "Checking Guidelines and returning the final report with reasoning"
-        ):
-            complete_report = await return_updated_report_checking_guidelines(
-                complete_report_without_checking_guidelines, guidelines=guidelines
+        save_json_response(results["report"], "report", usage=results["usage"])
+        # Kept across reruns so slides can be regenerated without rerunning everything
+        st.session_state["report_results"] = results
+
+    results = st.session_state.get("report_results")
+    if not results:
+        return
+
+    st.header("🔁 Regenerate slides")
+    st.caption(f"Run ID: {results['run_id']}")
+    selected = st.multiselect(
+        "Slides to regenerate",
+        options=list(results["slides"]),
+        default=failed_slide_names(results["slides"]),
+        help="Failed slides are preselected. Preprocessing and every other slide are "
+        "reused from the stored run, only the reasoning and guidelines stages rerun.",
+    )
+    if st.button("Regenerate selected slides", disabled=not selected):
+        asyncio.create_task(client_factory.prewarm())
+        st.header("🧩 Slides")
+        slides_area = st.container()
+        with st.spinner("Regenerating slides"):
+            results = await regenerate_slides(
+                results["run_id"],
+                slide_names=selected,
+                guidelines=guidelines,
+                on_node_done=make_slide_renderer(slides_area),
             )
+            logger.info(f"Regenerated {selected} of run {results['run_id']}")
+        save_json_response(results["report"], "report", usage=results["usage"])
+        st.session_state["report_results"] = results
 
-        # Display results with collapsible sections
-        st.success("✅ Analysis completed successfully!")
-
-        # Display Complete Merged Report
-        st.header("📋 Complete Report")
-        if complete_report:
-            st.json(complete_report)
-
-        # ------------------------------------------------------------------
-        # NEW SECTION: Character Count Analysis
-        # ------------------------------------------------------------------
-        with st.expander("📏 Character Count Analysis", expanded=False):
-            if complete_report:
-                # 1. Calculate the counts
-                char_data = calculate_char_counts(complete_report)
-
-                # 2. Create DataFrame
-                df_chars = pd.DataFrame(char_data)
-
-                # 3. Display interactive table
-                if not df_chars.empty:
-                    st.dataframe(
-                        df_chars,
-                        use_container_width=True,
-                        hide_index=True,
-                        column_config={
-                            "Section": st.column_config.TextColumn(
-                                "Section Key", width="medium"
-                            ),
-                            "With Spaces": st.column_config.NumberColumn(
-                                "Chars (with spaces)", format="%d"
-                            ),
-                            "No Spaces": st.column_config.NumberColumn(
-                                "Chars (no spaces)", format="%d"
-                            ),
-                            "Content": st.column_config.TextColumn(
-                                "Content Preview", width="large"
-                            ),
-                        },
-                    )
-                else:
-                    st.info("No text content found to analyze.")
-            else:
-                st.warning("Report generation failed, no data to count.")
+    show_results(results)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_in_session_loop(main())
@@ -0,0 +1,278 @@
+"""
+Headless batch report generation.
+
+Reads a JSONL job file, one business per line:
+
+    {"job_id": "...", "ignite_api_data": "...", "quicksight_data": "...",
+     "zylo_v6_data": "...", "zylo_v6_post_content": "...", "msp_data": ""}
+
+and runs the full report pipeline for every record with bounded concurrency.
+Each finished report is written to <output_dir>/<job_id>.json as soon as it
+completes and recorded in <output_dir>/checkpoint.jsonl, so rerunning the same
+command after a crash only generates the reports that are still missing.
+Every LLM call's tokens, latency, retries and cost go to <job_id>.usage.json, and
+<output_dir>/usage_summary.json totals them per chain over every report in the
+directory (earlier runs included), most expensive chain first.
+
+    python -m src.batch jobs.jsonl --output-dir outputs/batch --concurrency 8
+
+With --backend batch the slide and reasoning chains of every report in flight are
+queued and sent through the OpenAI Batch API (cheaper, no per-call rate budget,
+but results can take hours). --backend local-batch answers those requests with
+schema-valid fixtures instead, for testing the flow without the API.
+Preprocessing, category, ads score and guidelines calls still go out right away.
+Each report waits for two batch jobs in sequence, its slides then quick_action and
+closing_statement, each up to the 24h completion window. Only the --concurrency
+reports in flight share a job, so raise it to batch more reports per round.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+
+from constants import guidelines as default_guidelines
+from core.llm_client import prewarm_connections
+from core.chains.registry import chain_registry
+from core.usage import USAGE_FILE_SUFFIX, aggregate_usage, write_usage
+from core.chains.batch_backend import (
+    BATCH_DIR,
+    LocalBatchService,
+    OpenAIBatchService,
+    gather_in_batch,
+)
+from src.pipeline import run_report_pipeline
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+USAGE_SUMMARY_FILE = "usage_summary.json"
+INPUT_FIELDS = (
+    "ignite_api_data",
+    "quicksight_data",
+    "zylo_v6_data",
+    "zylo_v6_post_content",
+    "msp_data",
+)
+
+
+def safe_job_id(job_id):
+    """
+    job_id as a file name. Ids that had to be changed get a short hash of the
+    original, so distinct ids ("a/b", "a b") never share an output or checkpoint entry.
+    """
+    job_id = str(job_id)
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", job_id).strip("._") or "job"
+    if safe == job_id:
+        return safe
+    return f"{safe}-{hashlib.sha256(job_id.encode('utf-8')).hexdigest()[:8]}"
+
+
+def iter_jobs(jobs_path):
+    """Stream (job_id, record) pairs from the JSONL job file"""
+    with open(jobs_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping line {line_number} of {jobs_path}: {e}")
+                continue
+            job_id = safe_job_id(record.get("job_id") or f"line-{line_number}")
+            yield job_id, record
+
+
+def load_completed(output_dir):
+    """Job ids recorded as done in the checkpoint file whose output still exists"""
+    completed = set()
+    checkpoint = output_dir / CHECKPOINT_FILE
+    if not checkpoint.exists():
+        return completed
+    with open(checkpoint, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a half-written last line
+                continue
+            if entry.get("status") == "done" and (output_dir / entry["output"]).exists():
+                completed.add(entry["job_id"])
+    return completed
+
+
+def write_json_atomic(path, data):
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def append_checkpoint(output_dir, entry):
+    with open(output_dir / CHECKPOINT_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+async def generate_report(record, guidelines):
+    """The report JSON and the usage accounting of its LLM calls"""
+    inputs = {field: record.get(field) or "" for field in INPUT_FIELDS}
+    results = await run_report_pipeline(
+        ignite_api_data=inputs["ignite_api_data"],
+        quicksight_data=inputs["quicksight_data"],
+        zylo_v6_data=inputs["zylo_v6_data"],
+        zylo_v6_post_content=inputs["zylo_v6_post_content"],
+        msp_data=inputs["msp_data"],
+        guidelines=guidelines,
+    )
+    report = {
+        "cohort": results["cohort"],
+        "category": results["category"],
+        "preprocessed_input": results["preprocess"]["new_response"],
+        "report": results["report"],
+        "critical_path": results["critical_path"],
+    }
+    return report, results["usage"]
+
+
+BACKENDS = ("interactive", "batch", "local-batch")
+
+
+async def run_batch(
+    jobs_path,
+    output_dir,
+    concurrency=8,
+    guidelines=None,
+    backend="interactive",
+    settle_seconds=5.0,
+):
+    """
+    Generate a report for every job in jobs_path that isn't already checkpointed.
+    Returns a summary dict with done / failed / skipped counts.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    guidelines = guidelines or default_guidelines
+    completed = load_completed(output_dir)
+    summary = {"done": 0, "failed": 0, "skipped": 0}
+
+    # Bounded queue so a huge job file is never fully loaded into memory
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            job_id, record = item
+            start = time.perf_counter()
+            try:
+                result, usage = await generate_report(record, guidelines)
+                output_name = f"{job_id}.json"
+                write_json_atomic(output_dir / output_name, result)
+                write_usage(output_dir / output_name, usage)
+                append_checkpoint(
+                    output_dir,
+                    {
+                        "job_id": job_id,
+                        "status": "done",
+                        "output": output_name,
+                        "seconds": round(time.perf_counter() - start, 2),
+                    },
+                )
+                summary["done"] += 1
+                logger.info(f"Report {job_id} done in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                logger.error(f"Report {job_id} failed: {str(e)}")
+                append_checkpoint(
+                    output_dir, {"job_id": job_id, "status": "failed", "error": str(e)}
+                )
+                summary["failed"] += 1
+            finally:
+                queue.task_done()
+
+    async def feed():
+        seen = set()
+        try:
+            for job_id, record in iter_jobs(jobs_path):
+                if job_id in seen:
+                    logger.warning(f"Skipping duplicate job_id {record.get('job_id')!r}")
+                    summary["skipped"] += 1
+                    continue
+                if job_id in completed:
+                    summary["skipped"] += 1
+                    continue
+                seen.add(job_id)
+                await queue.put((job_id, record))
+        finally:
+            # Workers stop even when reading the job file fails
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    chain_registry.build_all()
+    workers = [worker() for _ in range(concurrency)]
+    if backend == "interactive":
+        await prewarm_connections(min(concurrency * 2, 32))
+        await asyncio.gather(feed(), *workers)
+    else:
+        service = LocalBatchService() if backend == "local-batch" else OpenAIBatchService()
+        await gather_in_batch(
+            feed(),
+            *workers,
+            service=service,
+            workdir=output_dir / BATCH_DIR.name,
+            settle_seconds=settle_seconds,
+        )
+
+    usage = aggregate_usage(sorted(output_dir.glob(f"*{USAGE_FILE_SUFFIX}")))
+    write_json_atomic(output_dir / USAGE_SUMMARY_FILE, usage)
+    top_chains = {name: totals["cost_usd"] for name, totals in list(usage["chains"].items())[:3]}
+    logger.info(f"Batch finished: {summary}")
+    logger.info(
+        f"LLM cost of all {usage['reports']} reports: ${usage['total']['cost_usd']:.2f}, "
+        f"most expensive chains: {top_chains}"
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate reports from a JSONL job file")
+    parser.add_argument("jobs", help="JSONL file with one business per line")
+    parser.add_argument("--output-dir", default="outputs/batch")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--backend", choices=BACKENDS, default="interactive")
+    parser.add_argument(
+        "--batch-settle",
+        type=float,
+        default=5.0,
+        help="Seconds without new requests before a batch job is submitted",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    summary = asyncio.run(
+        run_batch(
+            args.jobs,
+            args.output_dir,
+            args.concurrency,
+            backend=args.backend,
+            settle_seconds=args.batch_settle,
+        )
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import io
+import re
+import logging
+from datetime import datetime
+
+from core.pydantic_class.preprocess_structure import SocialStats
+
+logger = logging.getLogger(__name__)
+
+
+# QuickSight row labels that don't map 1:1 onto a SocialStats field name
+METRIC_ALIASES = {
+    "google_maps_impressions": "google_map_impressions",
+    "googlde_ads": "google_ads",
+    "googlde_ads_clicks": "google_ads_clicks",
+    "googlde_ads_cpm": "google_ads_cpm",
+    "googlde_ads_cpc": "google_ads_cpc",
+    "facebook_ad": "facebook_ads",
+    "google_ad": "google_ads",
+    "on_demand_posts": "on_demand_post_requests",
+    "on_demand_requests": "on_demand_post_requests",
+    "ongoing_posts": "ongoing_post_requests",
+    "ongoing_requests": "ongoing_post_requests",
+}
+
+MISSING_VALUES = {"", "-", "–", "—", "n/a", "na", "null", "none"}
+
+MONTH_PATTERN = re.compile(
+    r"^(jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?"
+    r"|sep(t(ember)?)?|oct(ober)?|nov(ember)?|dec(ember)?)\.?(\s+'?\d{2,4})?$",
+    re.IGNORECASE,
+)
+WEEK_PATTERN = re.compile(r"^(week|wk|w)\s*\d+|^\d{4}-\d{2}-\d{2}\b", re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"^(fy\s*)?\d{4}$", re.IGNORECASE)
+SEPARATOR_PATTERN = re.compile(r"^\|?[\s:\-|]+\|?$")
+
+# "November 20 at 6:30 PM - " / "November 2 - " prefixes on Zylo post content lines
+POST_DATE_PATTERN = re.compile(
+    r"^(january|february|march|april|may|june|july|august|september|october"
+    r"|november|december)\s+\d{1,2}(,?\s+\d{4})?"
+    r"(\s+at\s+\d{1,2}:\d{2}\s*([ap]\.?m\.?)?)?\s*[-–—]\s*",
+    re.IGNORECASE,
+)
+TRAILING_NOTE_PATTERN = re.compile(r'^(".*")\s*\([^()]*\)\s*$')
+
+
+def clean_term(text):
+    """Standardize terminology"""
+    if text is None:
+        return None
+    replacements = {
+        "OnGoing": "Ongoing Social Media Post",
+        "On Demand": "On-Demand Post",
+        "On-Demand Post": "On-Demand Post",
+        "Ongoing Social Post": "Ongoing Social Media Post",
+        "Ongoing Social Posts": "Ongoing Social Media Post",
+        "On-Demand Posts": "On-Demand Post",
+    }
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+    return text
+
+
+def iter_lines(data):
+    """Yield lines from a pasted blob or any iterable of lines (e.g. an open file)"""
+    if data is None:
+        return
+    if isinstance(data, str):
+        data = io.StringIO(data)
+    for line in data:
+        yield line.rstrip("\r\n")
+
+
+def split_table_row(line):
+    """Split a markdown pipe row into stripped cells"""
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def metric_key(label):
+    """Turn a QuickSight row label into a SocialStats field name"""
+    key = re.sub(r"[^a-z0-9]+", "_", label.lower()).strip("_")
+    return METRIC_ALIASES.get(key, key)
+
+
+def period_type_for(label):
+    """Detect whether a column header is a week, month or year label"""
+    label = label.strip()
+    if MONTH_PATTERN.match(label):
+        return "month"
+    if WEEK_PATTERN.match(label):
+        return "week"
+    if YEAR_PATTERN.match(label):
+        return "year"
+    return None
+
+
+def normalize_metric_value(value):
+    """
+    Normalize a QuickSight cell into the string form process_data expects.
+    Dashes / empty cells become None, commas, '$' and '%' are stripped.
+    Raises ValueError if the cell is not numeric.
+    """
+    value = value.strip()
+    if value.lower() in MISSING_VALUES:
+        return None
+    cleaned = value.replace(",", "").replace("$", "").replace("%", "").strip()
+    float(cleaned)
+    return cleaned
+
+
+def parse_quicksight_table(quicksight_data):
+    """
+    Parse the pasted QuickSight pipe table into the BusinessSnapshot.social_stats shape.
+
+    Returns a dict keyed by every SocialStats field ({"periods": [...]} each, empty when
+    the metric is not in the table), or None when the table can't be parsed reliably so
+    the caller can fall back to the LLM.
+    """
+    if not quicksight_data or not quicksight_data.strip():
+        return None
+
+    header = None
+    rows = []
+    for line in quicksight_data.splitlines():
+        line = line.strip()
+        if not line.startswith("|"):
+            if rows:
+                # Only the first table is taken, anything after it is not metric data
+                break
+            continue
+        if SEPARATOR_PATTERN.match(line):
+            continue
+        cells = split_table_row(line)
+        if header is None:
+            header = cells
+        else:
+            rows.append(cells)
+
+    if not header or len(header) < 2 or not rows:
+        return None
+
+    period_labels = header[1:]
+    period_types = [period_type_for(label) for label in period_labels]
+    if None in period_types:
+        logger.info(f"Unrecognised QuickSight period headers: {period_labels}")
+        return None
+
+    fields = SocialStats.model_fields
+    social_stats = {field: {"periods": []} for field in fields}
+    matched = 0
+
+    for cells in rows:
+        if len(cells) != len(header):
+            logger.info(f"Malformed QuickSight row: {cells}")
+            return None
+
+        key = metric_key(cells[0])
+        if key not in fields:
+            # Metrics like "Facebook Site Clicks" have no slot in the schema
+            continue
+
+        try:
+            values = [normalize_metric_value(cell) for cell in cells[1:]]
+        except ValueError:
+            logger.info(f"Non-numeric QuickSight value in row: {cells}")
+            return None
+
+        social_stats[key] = {
+            "periods": [
+                {
+                    "period_type": period_type,
+                    "period_label": label,
+                    "value": value,
+                }
+                for period_type, label, value in zip(
+                    period_types, period_labels, values
+                )
+            ]
+        }
+        matched += 1
+
+    if matched == 0:
+        return None
+
+    return social_stats
+
+
+def normalize_delivery_date(value):
+    """Return the delivery date as an ISO 8601 string, raises ValueError otherwise"""
+    value = value.strip()
+    try:
+        datetime.fromisoformat(value)
+        return value
+    except ValueError:
+        return datetime.strptime(value, "%m/%d/%Y").date().isoformat()
+
+
+def iter_delivery_items(zylo_v6_data):
+    """
+    Stream DeliveryItem dicts out of the Zylo v6 "| Post Type | Date |" table.
+    Raises ValueError on a row that doesn't have a post type and a valid date.
+    """
+    columns = None
+    for line in iter_lines(zylo_v6_data):
+        line = line.strip()
+        if not line.startswith("|") or SEPARATOR_PATTERN.match(line):
+            continue
+        cells = split_table_row(line)
+        if columns is None:
+            lowered = [cell.lower() for cell in cells]
+            if "post type" not in lowered or "date" not in lowered:
+                raise ValueError(f"Unrecognised Zylo header: {cells}")
+            columns = (lowered.index("post type"), lowered.index("date"))
+            continue
+
+        type_index, date_index = columns
+        if len(cells) <= max(columns) or not cells[type_index]:
+            raise ValueError(f"Malformed Zylo row: {cells}")
+        yield {
+            "social_post_type": clean_term(cells[type_index]),
+            "resolved": normalize_delivery_date(cells[date_index]),
+        }
+
+
+def parse_zylo_delivery_table(zylo_v6_data):
+    """
+    Parse the Zylo v6 delivery table into BusinessSnapshot.delivery_dates.
+    Returns [] for empty input and None if the table can't be parsed.
+    """
+    if not zylo_v6_data or not zylo_v6_data.strip():
+        return []
+    try:
+        items = list(iter_delivery_items(zylo_v6_data))
+    except ValueError as e:
+        logger.info(f"Falling back to LLM for Zylo deliveries: {e}")
+        return None
+    return items or None
+
+
+def clean_post_text(text):
+    """Drop the trailing "(with image ...)" note and the quotes around a single quoted post"""
+    text = text.strip()
+    match = TRAILING_NOTE_PATTERN.match(text)
+    if match:
+        text = match.group(1)
+    if text.count('"') == 2 and text.startswith('"') and text.endswith('"'):
+        text = text[1:-1]
+    return text.strip()
+
+
+def iter_post_contents(zylo_v6_post_content):
+    """
+    Stream post texts out of Zylo v6 content lines such as
+    'November 20 at 6:30 PM - "text..." (with image)', with the date prefix removed.
+    Lines that don't start with a date are continuations of the previous post.
+    """
+    current = None
+    for line in iter_lines(zylo_v6_post_content):
+        line = line.strip()
+        if not line:
+            continue
+        match = POST_DATE_PATTERN.match(line)
+        if match:
+            if current is not None:
+                yield clean_post_text(current)
+            current = line[match.end():]
+        elif current is not None:
+            current = f"{current} {line}"
+    if current is not None:
+        yield clean_post_text(current)
+
+
+def parse_zylo_post_content(zylo_v6_post_content):
+    """
+    Build BusinessSnapshot.recent_post_content ("Content 1: ...", "Content 2: ...").
+    Returns None for empty input and False if no dated post lines were found.
+    """
+    if not zylo_v6_post_content or not zylo_v6_post_content.strip():
+        return None
+    posts = [post for post in iter_post_contents(zylo_v6_post_content) if post]
+    if not posts:
+        return False
+    return [f"Content {index}: {post}" for index, post in enumerate(posts, 1)]
@@ -0,0 +1,509 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from src.preprocess_data_for_report import (
+    return_preprocess_data,
+    identify_cohort,
+    identify_category,
+    cohort_from_inputs,
+)
+from src.slide_mapping import (
+    get_slide_functions,
+    get_all_slide_configs,
+    build_data_map,
+    run_slide,
+)
+from core.chains.general_cohort_chain.reasoning_slides import (
+    quick_action_reasoning_chain,
+    closing_statement_chain,
+)
+from core.chains.guidelines_chain import return_updated_report_checking_guidelines
+from src.run_store import RunStore, SKIPPED_MARKER, failed_slide_names
+from core.llm_governor import governor
+from core.latency import latency_tracker, run_with_deadline
+from core.llm_cache import bypass_cache_var, get_response_cache
+from core.model_routing import routing_stats
+from core.usage import UsageTracker, run_usage_var
+
+logger = logging.getLogger(__name__)
+
+# Returned by slide nodes whose slide is not part of the final plan
+SKIPPED = object()
+
+# Per-task token usage for speculative slides, inherited by every chat model call
+slide_usage_var: ContextVar[UsageMetadataCallbackHandler | None] = ContextVar(
+    "slide_usage_callback", default=None
+)
+register_configure_hook(slide_usage_var, inheritable=True)
+
+
+class PipelineDAG:
+    """
+    Minimal dependency-driven executor.
+    Each node is an async function receiving the results of all finished nodes,
+    and starts as soon as every node it depends on has resolved.
+    on_node_done(name, result, seconds) is called as each node finishes.
+    run(seed) takes already known results (e.g. from a stored run) for nodes
+    that should not be run again.
+    """
+
+    def __init__(self, on_node_done=None):
+        self.on_node_done = on_node_done
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Awaitable[Any]],
+        deps: Sequence[str] = (),
+    ):
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError(f"Node '{name}' depends on unknown node '{dep}'")
+        self.nodes[name] = {"func": func, "deps": tuple(deps)}
+
+    async def run(self, seed: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        tasks = self.tasks
+        seed = seed or {}
+        self.started_at = time.perf_counter()
+
+        async def run_node(name, node):
+            if name in seed:
+                results[name] = seed[name]
+                if self.on_node_done is not None:
+                    self.on_node_done(name, results[name], 0.0)
+                return results[name]
+            if node["deps"]:
+                await asyncio.gather(*(tasks[dep] for dep in node["deps"]))
+            start = time.perf_counter()
+            try:
+                results[name] = await node["func"](results)
+            finally:
+                self.timings[name] = {
+                    "start": start - self.started_at,
+                    "end": time.perf_counter() - self.started_at,
+                }
+            if self.on_node_done is not None:
+                self.on_node_done(
+                    name, results[name], time.perf_counter() - start
+                )
+            return results[name]
+
+        # Nodes are declared after their dependencies, so insertion order is topological
+        for name, node in self.nodes.items():
+            tasks[name] = asyncio.create_task(run_node(name, node))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        logger.info(f"Pipeline critical path: {self.format_critical_path()}")
+        return results
+
+    def wait_for(self, name: str) -> asyncio.Task:
+        """Await another node from inside a running node without declaring it as a dep"""
+        return self.tasks[name]
+
+    def critical_path(self) -> List[Dict[str, Any]]:
+        """Walk back from the last node to finish through its latest-finishing dependency"""
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda node: self.timings[node]["end"])
+        path = []
+        while name is not None:
+            timing = self.timings[name]
+            path.append({
+                "name": name,
+                "start": round(timing["start"], 3),
+                "duration": round(timing["end"] - timing["start"], 3),
+            })
+            deps = [dep for dep in self.nodes[name]["deps"] if dep in self.timings]
+            name = max(deps, key=lambda dep: self.timings[dep]["end"]) if deps else None
+        return list(reversed(path))
+
+    def format_critical_path(self) -> str:
+        return " -> ".join(
+            f"{step['name']} ({step['duration']:.2f}s)" for step in self.critical_path()
+        )
+
+
+def merge_final_report(final_report, quick_action_response, closing_statement_response):
+    """Merge final report with quick action and closing statement"""
+    merged_report = final_report.copy()
+
+    # Add quick_action_for_you section
+    merged_report["quick_action_for_you"] = quick_action_response.get(
+        "quick_action", quick_action_response
+    )
+
+    # Add closing_statement section
+    merged_report["closing_statement"] = closing_statement_response.get(
+        "closing_statement", closing_statement_response
+    )
+
+    return merged_report
+
+
+def slide_deps(name: str, speculative: bool = False) -> List[str]:
+    """
+    The intro slide is in every plan, the delivery slide only depends on the cohort,
+    every other slide needs both cohort and category to know if it's in the plan.
+    In speculative mode no slide waits for the category.
+    """
+    if name == "intro_slide":
+        return ["preprocess"]
+    if name == "here_is_what_we_delivered" or speculative:
+        return ["preprocess", "cohort"]
+    return ["preprocess", "cohort", "category"]
+
+
+def total_tokens(usage_metadata: Dict[str, Dict[str, Any]]) -> int:
+    return sum(usage.get("total_tokens", 0) for usage in usage_metadata.values())
+
+
+async def run_slide_with_usage(config, data_map):
+    """run_slide with the token usage of every model call it made"""
+    handler = UsageMetadataCallbackHandler()
+    slide_usage_var.set(handler)
+    result = await run_slide(config, data_map)
+    return result, handler.usage_metadata
+
+
+def build_report_pipeline(
+    ignite_api_data,
+    quicksight_data,
+    zylo_v6_data,
+    zylo_v6_post_content,
+    msp_data,
+    guidelines,
+    speculative=False,
+    on_node_done=None,
+    use_preprocess_cache=True,
+) -> PipelineDAG:
+    """
+    speculative=True launches the slides of both trend branches once the cohort is
+    known, then cancels or discards the losing branch when the category arrives.
+    The tokens spent on discarded slides are tracked in dag.speculation.
+    use_preprocess_cache=False always runs preprocessing instead of reading (and
+    writing) the on-disk preprocess cache.
+    """
+    dag = PipelineDAG(on_node_done=on_node_done)
+    # Token usage of this report's chains, per chain name
+    dag.usage = UsageTracker()
+    slide_configs = get_all_slide_configs()
+    dag.speculation = {
+        "launched": [],
+        "discarded": [],
+        "cancelled": [],
+        "kept_tokens": 0,
+        "wasted_tokens": 0,
+    }
+
+    async def preprocess(results):
+        new_response, social_stats = await return_preprocess_data(
+            ignite_api_data=ignite_api_data,
+            quicksight_data_declining=quicksight_data,
+            zylo_v6_data=zylo_v6_data,
+            zylo_v6_post_content=zylo_v6_post_content,
+            msp_data=msp_data,
+            use_cache=use_preprocess_cache,
+        )
+        return {"new_response": new_response, "social_stats": social_stats}
+
+    async def category(results):
+        return await identify_category(results["preprocess"]["social_stats"])
+
+    async def cohort(results):
+        social_stats = results["preprocess"]["social_stats"] if "preprocess" in results else None
+        return await identify_cohort(
+            quicksight_data=quicksight_data,
+            ignite_api_data=ignite_api_data,
+            zylo_v6_data=zylo_v6_data,
+            social_stats=social_stats,
+            msp_data=msp_data,
+        )
+
+    def slide_data_map(results):
+        new_response = results["preprocess"]["new_response"]
+        return build_data_map(
+            ignite_api_data,
+            zylo_v6_data,
+            results["preprocess"]["social_stats"],
+            new_response.get("delivery_dates"),
+            new_response.get("recent_post_content"),
+        )
+
+    def slide_node(name, config):
+        async def generate(results):
+            if name == "here_is_what_we_delivered" and results["cohort"] not in (
+                "1",
+                "2",
+                "8",
+            ):
+                return SKIPPED
+            if "category" in slide_deps(name):
+                plan = get_slide_functions(
+                    str(results["cohort"]), results["category"]["category"]
+                )
+                if name not in {slide["name"] for slide in plan}:
+                    return SKIPPED
+            return await run_slide(config, slide_data_map(results))
+
+        return generate
+
+    def speculative_slide_node(name, config):
+        async def generate(results):
+            cohort = str(results["cohort"])
+            candidates = {
+                slide["name"]
+                for exact_category in ("uptrend", "downtrend")
+                for slide in get_slide_functions(cohort, exact_category)
+            }
+            if name not in candidates:
+                return SKIPPED
+
+            stats = dag.speculation
+            stats["launched"].append(name)
+            task = asyncio.create_task(
+                run_slide_with_usage(config, slide_data_map(results))
+            )
+            try:
+                category = await dag.wait_for("category")
+                plan = get_slide_functions(cohort, category["category"])
+                if name not in {slide["name"] for slide in plan}:
+                    if task.done():
+                        stats["discarded"].append(name)
+                        stats["wasted_tokens"] += total_tokens(task.result()[1])
+                    else:
+                        # Tokens of an in-flight request are never reported back
+                        stats["cancelled"].append(name)
+                    return SKIPPED
+
+                result, usage_metadata = await task
+                stats["kept_tokens"] += total_tokens(usage_metadata)
+                return result
+            finally:
+                # Also when the category failed or this node was cancelled mid-wait
+                if not task.done():
+                    task.cancel()
+
+        return generate
+
+    async def slides(results):
+        plan = get_slide_functions(str(results["cohort"]), results["category"]["category"])
+        return {
+            slide["name"]: results[f"slide:{slide['name']}"]
+            for slide in plan
+            if results[f"slide:{slide['name']}"] is not SKIPPED
+        }
+
+    async def reasoning_node(name, chain, results):
+        try:
+            return await run_with_deadline(
+                name,
+                lambda: chain(
+                    other_analysis=results["slides"],
+                    preprocessed_input=results["preprocess"]["new_response"],
+                ),
+            )
+        except TimeoutError as e:
+            # Same shape as a failed slide, the rest of the report still ships
+            return {"error": str(e)}
+
+    async def quick_action(results):
+        return await reasoning_node("quick_action", quick_action_reasoning_chain, results)
+
+    async def closing_statement(results):
+        return await reasoning_node("closing_statement", closing_statement_chain, results)
+
+    async def report_before_guidelines(results):
+        return merge_final_report(
+            results["slides"], results["quick_action"], results["closing_statement"]
+        )
+
+    async def report(results):
+        return await return_updated_report_checking_guidelines(
+            results["report_before_guidelines"], guidelines=guidelines
+        )
+
+    early_cohort = cohort_from_inputs(
+        quicksight_data, ignite_api_data, zylo_v6_data, msp_data
+    )
+
+    dag.add("preprocess", preprocess)
+    dag.add("cohort", cohort, deps=[] if early_cohort else ["preprocess"])
+    dag.add("category", category, deps=["preprocess"])
+    for name, config in slide_configs.items():
+        if speculative and "category" in slide_deps(name):
+            node = speculative_slide_node(name, config)
+        else:
+            node = slide_node(name, config)
+        dag.add(f"slide:{name}", node, deps=slide_deps(name, speculative))
+    dag.add(
+        "slides",
+        slides,
+        deps=["cohort", "category"] + [f"slide:{name}" for name in slide_configs],
+    )
+    dag.add("quick_action", quick_action, deps=["preprocess", "slides"])
+    dag.add("closing_statement", closing_statement, deps=["preprocess", "slides"])
+    dag.add(
+        "report_before_guidelines",
+        report_before_guidelines,
+        deps=["slides", "quick_action", "closing_statement"],
+    )
+    dag.add("report", report, deps=["report_before_guidelines"])
+    return dag
+
+
+def persisting(store: RunStore, on_node_done=None):
+    """Wrap on_node_done so every finished node is also written to the run store"""
+
+    def callback(name, result, seconds):
+        store.save_stage(name, result, skipped=result is SKIPPED)
+        if on_node_done is not None:
+            on_node_done(name, result, seconds)
+
+    return callback
+
+
+def finish_run(dag: PipelineDAG, results: Dict[str, Any], store: RunStore) -> Dict[str, Any]:
+    results["run_id"] = store.run_id
+    results["timings"] = dag.timings
+    results["critical_path"] = dag.critical_path()
+    results["llm_governor"] = governor.metrics()
+    results["latency"] = latency_tracker.stats()
+    results["usage"] = dag.usage.report()
+    results["llm_cache"] = get_response_cache().stats()
+    results["model_routing"] = routing_stats.stats()
+    store.save_run(
+        {
+            "run_id": store.run_id,
+            "timings": dag.timings,
+            "critical_path": results["critical_path"],
+            "failed_slides": failed_slide_names(results["slides"]),
+            "usage": results["usage"]["total"],
+        }
+    )
+    store.save_usage(results["usage"])
+    return results
+
+
+async def run_report_pipeline(
+    ignite_api_data,
+    quicksight_data,
+    zylo_v6_data,
+    zylo_v6_post_content=None,
+    msp_data="",
+    guidelines=None,
+    speculative=False,
+    on_node_done=None,
+    run_id=None,
+) -> Dict[str, Any]:
+    """
+    Run preprocess -> cohort/category -> slides -> reasoning -> guidelines as a DAG.
+    Every stage is persisted under results["run_id"] (see regenerate_slides).
+    Returns every node's result plus the per-node timings, the critical path, the
+    per-chain latency / timeout / hedge counts, every chain call's tokens, latency,
+    retries and cost (results["usage"], also stored as run.usage.json), and the
+    token accounting of the speculative branch when speculative=True.
+    """
+    store = RunStore(run_id)
+    store.save_inputs(
+        {
+            "ignite_api_data": ignite_api_data,
+            "quicksight_data": quicksight_data,
+            "zylo_v6_data": zylo_v6_data,
+            "zylo_v6_post_content": zylo_v6_post_content,
+            "msp_data": msp_data,
+            "guidelines": guidelines,
+        }
+    )
+    dag = build_report_pipeline(
+        ignite_api_data,
+        quicksight_data,
+        zylo_v6_data,
+        zylo_v6_post_content,
+        msp_data,
+        guidelines,
+        speculative=speculative,
+        on_node_done=persisting(store, on_node_done),
+    )
+    token = run_usage_var.set(dag.usage)
+    try:
+        results = await dag.run()
+    finally:
+        run_usage_var.reset(token)
+    finish_run(dag, results, store)
+    if speculative:
+        results["speculation"] = dag.speculation
+        logger.info(f"Speculative slides: {dag.speculation}")
+    return results
+
+
+async def regenerate_slides(
+    run_id,
+    slide_names=None,
+    guidelines=None,
+    on_node_done=None,
+) -> Dict[str, Any]:
+    """
+    Rerun only the given slides of a stored run (default: the ones that failed),
+    reusing its preprocessed input, cohort, category and every other slide, then
+    rerun the reasoning and guidelines stages that depend on them.
+    Returns the same shape as run_report_pipeline and updates the stored run.
+    results["usage"] covers the whole run: the stored calls plus the regenerated ones.
+    """
+    store = RunStore(run_id)
+    inputs = store.load_inputs()
+    guidelines = guidelines or inputs["guidelines"]
+
+    slide_stages = [f"slide:{name}" for name in get_all_slide_configs()]
+    stored = store.load_stages(["preprocess", "cohort", "category", "slides", *slide_stages])
+    if slide_names is None:
+        slide_names = failed_slide_names(stored.get("slides", {}))
+    if not slide_names:
+        raise ValueError(f"Run '{run_id}' has no failed slides to regenerate")
+
+    seed = {stage: stored[stage] for stage in ("preprocess", "cohort", "category")}
+    for stage in slide_stages:
+        if stage.removeprefix("slide:") in slide_names:
+            continue
+        # Slides never stored were not part of the plan
+        result = stored.get(stage, SKIPPED_MARKER)
+        seed[stage] = SKIPPED if result == SKIPPED_MARKER else result
+
+    logger.info(f"Regenerating {slide_names} of run {run_id}")
+    store.log_regeneration(list(slide_names))
+    dag = build_report_pipeline(
+        inputs["ignite_api_data"],
+        inputs["quicksight_data"],
+        inputs["zylo_v6_data"],
+        inputs["zylo_v6_post_content"],
+        inputs["msp_data"],
+        guidelines,
+        on_node_done=persisting(store, on_node_done),
+    )
+    # finish_run rewrites run.usage.json, it must keep the run's earlier calls
+    for record in store.load_usage().get("calls", []):
+        dag.usage.record(record)
+    # Regenerated slides must not come back identical from the response cache
+    token = run_usage_var.set(dag.usage)
+    bypass_token = bypass_cache_var.set(True)
+    try:
+        results = await dag.run(seed=seed)
+    finally:
+        bypass_cache_var.reset(bypass_token)
+        run_usage_var.reset(token)
+    results["regenerated"] = list(slide_names)
+    return finish_run(dag, results, store)
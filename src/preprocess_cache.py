@@ -0,0 +1,184 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+from pathlib import Path
+
+from core.chains.registry import chain_registry
+from core.model_routing import model_label
+from core.pydantic_class.preprocess_structure import BusinessSnapshot
+from src import input_parsers
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("cache") / "preprocess"
+
+# Bump to drop every entry, changes to the inputs of the key below already do
+PREPROCESS_CACHE_VERSION = "2"
+
+# The extraction chains preprocess_chain runs
+PREPROCESS_CHAINS = (
+    "business_profile",
+    "social_stats",
+    "post_requests",
+    "delivery_dates",
+    "post_content",
+)
+
+
+def normalize_input(text):
+    """Normalize pasted input so whitespace-only differences hit the same entry"""
+    if not text:
+        return ""
+    lines = str(text).replace("\r\n", "\n").replace("\r", "\n").strip().split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def prompt_version():
+    """Hash of every preprocessing prompt template, so prompt edits invalidate the cache"""
+    digest = hashlib.sha256()
+    for name in PREPROCESS_CHAINS:
+        for message in chain_registry.spec(name)["prompt"].messages:
+            digest.update(message.prompt.template.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def short_hash(value):
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def schema_version():
+    """Hash of the BusinessSnapshot schema and the schema each extraction chain requests"""
+    schemas = {"BusinessSnapshot": BusinessSnapshot.model_json_schema()}
+    for name in PREPROCESS_CHAINS:
+        schema = chain_registry.spec(name)["schema"]
+        schemas[name] = schema.model_json_schema() if schema is not None else None
+    return short_hash(schemas)
+
+
+def model_version():
+    """Hash of the models (in route order) and the API endpoint each extraction chain uses"""
+    models = {}
+    for name in PREPROCESS_CHAINS:
+        models[name] = [
+            {
+                "model": model_label(llm),
+                "temperature": llm.temperature,
+                "base_url": llm.openai_api_base or os.getenv("OPENAI_BASE_URL"),
+            }
+            for llm in chain_registry.spec(name)["route"]
+        ]
+    return short_hash(models)
+
+
+def parser_version():
+    """Hash of the local parsers and process_data, which shape the cached result"""
+    # Imported here, src.preprocess_data_for_report imports this module
+    from src.preprocess_data_for_report import process_data
+
+    return short_hash([inspect.getsource(input_parsers), inspect.getsource(process_data)])
+
+
+class PreprocessCache:
+    """
+    On-disk, content-addressed cache for return_preprocess_data results.
+    Entries are JSON files named by the key hash, file mtime is the LRU clock.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=256, max_bytes=64 * 1024**2):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.version = ":".join(
+            (
+                PREPROCESS_CACHE_VERSION,
+                prompt_version(),
+                schema_version(),
+                model_version(),
+                parser_version(),
+            )
+        )
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def make_key(
+        self, ignite_api_data, quicksight_data, zylo_v6_data, msp_data, zylo_v6_post_content
+    ):
+        payload = {
+            "version": self.version,
+            "ignite_api_data": normalize_input(ignite_api_data),
+            "quicksight_data": normalize_input(quicksight_data),
+            "zylo_v6_data": normalize_input(zylo_v6_data),
+            "msp_data": normalize_input(msp_data),
+            "zylo_v6_post_content": normalize_input(zylo_v6_post_content),
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return (new_response, social_stats) or None"""
+        path = self.cache_dir / f"{key}.json"
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            # Touch the entry so eviction sees it as recently used
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["new_response"], entry["social_stats"]
+
+    def set(self, key, new_response, social_stats):
+        path = self.cache_dir / f"{key}.json"
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"new_response": new_response, "social_stats": social_stats},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing preprocess cache entry {key}: {str(e)}")
+            return
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until both size bounds hold"""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (
+            len(entries) > self.max_entries or total_bytes > self.max_bytes
+        ):
+            _, size, path = entries.pop(0)
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total_bytes -= size
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+preprocess_cache = None
+
+
+def get_preprocess_cache():
+    global preprocess_cache
+    if preprocess_cache is None:
+        preprocess_cache = PreprocessCache()
+    return preprocess_cache
@@ -1,5 +1,23 @@
 import logging
-from core.chains.preprocess import preprocess_chain, ads_score_chain
+from collections import Counter
+from core.chains.preprocess import preprocess_chain, ads_score_chain, category_chain
+from src.input_parsers import (
+    clean_term,
+    parse_quicksight_table,
+    parse_zylo_delivery_table,
+    parse_zylo_post_content,
+)
+from src.preprocess_cache import get_preprocess_cache
+from src.rule_based_scoring import (
+    TREND_AMBIGUITY_BAND,
+    classify_trend,
+    score_ads_presence,
+)
+
+logger = logging.getLogger(__name__)
+
+# How often each preprocessing path was taken ("<source>_local" vs "<source>_llm")
+preprocess_path_stats = Counter()
 
 
 def process_data(data):
@@ -71,22 +89,6 @@ def process_data(data):
                 return True
         return False
 
-    def clean_term(text):
-        """Standardize terminology"""
-        if text is None:
-            return None
-        replacements = {
-            "OnGoing": "Ongoing Social Media Post",
-            "On Demand": "On-Demand Post",
-            "On-Demand Post": "On-Demand Post",
-            "Ongoing Social Post": "Ongoing Social Media Post",
-            "Ongoing Social Posts": "Ongoing Social Media Post",
-            "On-Demand Posts": "On-Demand Post",
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        return text
-
     # Process social_stats
     processed_stats = {}
     social_stats = data.get("social_stats", {})
@@ -178,57 +180,176 @@ async def return_preprocess_data(
     zylo_v6_data,
     zylo_v6_post_content=None,
     msp_data="",
+    use_cache=True,
 ):
+    """
+    Returns (new_response, social_stats) for the pasted inputs.
+    Identical inputs are served from the on-disk preprocess cache.
+    """
+    if not use_cache:
+        return await build_preprocess_data(
+            ignite_api_data,
+            quicksight_data_declining,
+            zylo_v6_data,
+            zylo_v6_post_content,
+            msp_data,
+        )
+
+    cache = get_preprocess_cache()
+    key = cache.make_key(
+        ignite_api_data,
+        quicksight_data_declining,
+        zylo_v6_data,
+        msp_data,
+        zylo_v6_post_content,
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info(f"Preprocess cache hit {key[:12]} ({cache.stats()})")
+        return cached
+
+    new_response, social_stats = await build_preprocess_data(
+        ignite_api_data,
+        quicksight_data_declining,
+        zylo_v6_data,
+        zylo_v6_post_content,
+        msp_data,
+    )
+    cache.set(key, new_response, social_stats)
+    logger.info(f"Preprocess cache miss {key[:12]} ({cache.stats()})")
+    return new_response, social_stats
+
+
+async def build_preprocess_data(
+    ignite_api_data,
+    quicksight_data_declining,
+    zylo_v6_data,
+    zylo_v6_post_content=None,
+    msp_data="",
+):
+    # Parse the QuickSight table locally, the LLM only sees it if parsing fails
+    local_social_stats = parse_quicksight_table(quicksight_data_declining)
+    llm_quicksight_data = quicksight_data_declining
+    if local_social_stats is not None:
+        preprocess_path_stats["quicksight_local"] += 1
+        llm_quicksight_data = ""
+    elif quicksight_data_declining and quicksight_data_declining.strip():
+        preprocess_path_stats["quicksight_llm"] += 1
+
+    # Same for the Zylo delivery table and post content
+    local_delivery_dates = parse_zylo_delivery_table(zylo_v6_data)
+    llm_zylo_v6_data = zylo_v6_data
+    if local_delivery_dates is not None:
+        preprocess_path_stats["zylo_delivery_local"] += 1
+        llm_zylo_v6_data = ""
+    else:
+        preprocess_path_stats["zylo_delivery_llm"] += 1
+
+    local_post_content = parse_zylo_post_content(zylo_v6_post_content)
+    llm_post_content = zylo_v6_post_content
+    if local_post_content is not False:
+        preprocess_path_stats["post_content_local"] += 1
+        llm_post_content = ""
+    else:
+        preprocess_path_stats["post_content_llm"] += 1
+    logger.info(f"Preprocess path stats: {dict(preprocess_path_stats)}")
+
     response = await preprocess_chain(
         ignite_api_data=ignite_api_data,
-        quick_sight_data=quicksight_data_declining,
-        zylo_v6_data=zylo_v6_data,
+        quick_sight_data=llm_quicksight_data,
+        zylo_v6_data=llm_zylo_v6_data,
         msp_data=msp_data,
-        zylo_v6_post_content=zylo_v6_post_content,
+        zylo_v6_post_content=llm_post_content,
     )
+    if local_social_stats is not None:
+        # Keep anything the model extracted from MSP for metrics the table doesn't have
+        response["social_stats"] = {
+            **response["social_stats"],
+            **{
+                metric: series
+                for metric, series in local_social_stats.items()
+                if series["periods"]
+            },
+        }
+    if local_delivery_dates is not None:
+        response["delivery_dates"] = local_delivery_dates
+    if local_post_content is not False:
+        response["recent_post_content"] = local_post_content
     new_response = process_data(response)
     social_stats = new_response["social_stats"]
     return new_response, social_stats
 
 
-async def identify_cohort(
-    quicksight_data, ignite_api_data, zylo_v6_data, msp_data, social_stats
+async def identify_category(
+    social_stats,
+    weights=None,
+    use_llm_tie_breaker=True,
+    ambiguity_band=TREND_AMBIGUITY_BAND,
 ):
-    cohort = None
+    """
+    Uptrend/downtrend from the weighted numeric classifier.
+    category_chain only runs as a tie-breaker when the score is inside the ambiguity band.
+    """
+    category, score = classify_trend(social_stats, weights=weights)
+    logger.info(f"Trend score {score:+.3f}: {category['category']}")
+    if use_llm_tie_breaker and abs(score) < ambiguity_band:
+        logger.info("Trend score inside ambiguity band, asking category_chain")
+        return await category_chain(social_stats)
+    return category
+
+
+async def ads_presence(social_stats, use_llm=False):
+    """Ads score for cohort resolution, rule-based unless use_llm is set"""
+    if use_llm:
+        return await ads_score_chain(quicksight_data=social_stats)
+    return score_ads_presence(social_stats)
+
+
+def cohort_from_inputs(quicksight_data, ignite_api_data, zylo_v6_data, msp_data):
+    """
+    Cohorts decided purely by which inputs are present ("4", "8" or "0").
+    Returns None when the ads score is needed, i.e. QuickSight data exists.
+    """
     if (not quicksight_data) and ignite_api_data and zylo_v6_data and msp_data:
-        cohort = "4"
+        return "4"
     elif (not quicksight_data) and (not msp_data) and ignite_api_data and zylo_v6_data:
-        cohort = "8"
-    else:
-        if quicksight_data:
-            ads_response = await ads_score_chain(quicksight_data=social_stats)
-            flag = ads_response.get("flag", None)
-            if (not zylo_v6_data) and ignite_api_data and quicksight_data and msp_data:
-                if flag == 0:
-                    cohort = "6b"
-                elif flag == 1:
-                    cohort = "6a"
-                else:
-                    cohort = "6"
-            elif (
-                (not zylo_v6_data)
-                and (not msp_data)
-                and quicksight_data
-                and ignite_api_data
-            ):
-                if flag == 0:
-                    cohort = "7b"
-                elif flag == 1:
-                    cohort = "7a"
-                else:
-                    cohort = "7"
-            elif quicksight_data and ignite_api_data and zylo_v6_data and msp_data:
-                cohort = str(ads_response.get("score", 0))
-            elif (
-                quicksight_data and ignite_api_data and zylo_v6_data and (not msp_data)
-            ):
-                cohort = str(ads_response.get("score", 0))
+        return "8"
+    elif not quicksight_data:
+        return "0"
+    return None
+
+
+async def identify_cohort(
+    quicksight_data,
+    ignite_api_data,
+    zylo_v6_data,
+    msp_data,
+    social_stats,
+    use_llm_ads_score=False,
+):
+    cohort = cohort_from_inputs(quicksight_data, ignite_api_data, zylo_v6_data, msp_data)
+    if cohort is not None:
+        return cohort
+
+    ads_response = await ads_presence(social_stats, use_llm=use_llm_ads_score)
+    flag = ads_response.get("flag", None)
+    if (not zylo_v6_data) and ignite_api_data and quicksight_data and msp_data:
+        if flag == 0:
+            cohort = "6b"
+        elif flag == 1:
+            cohort = "6a"
+        else:
+            cohort = "6"
+    elif (not zylo_v6_data) and (not msp_data) and quicksight_data and ignite_api_data:
+        if flag == 0:
+            cohort = "7b"
+        elif flag == 1:
+            cohort = "7a"
         else:
-            cohort = "0"
+            cohort = "7"
+    elif quicksight_data and ignite_api_data and zylo_v6_data and msp_data:
+        cohort = str(ads_response.get("score", 0))
+    elif quicksight_data and ignite_api_data and zylo_v6_data and (not msp_data):
+        cohort = str(ads_response.get("score", 0))
 
     return cohort
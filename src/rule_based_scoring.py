@@ -0,0 +1,154 @@
+import re
+
+FACEBOOK_ADS_PATTERN = re.compile(r"^facebook_ads?(_|$)")
+GOOGLE_ADS_PATTERN = re.compile(r"^googl?d?e_ads?(_|$)")
+
+
+def period_number(period):
+    """Numeric value of a period from either processed (raw_value) or raw (value) stats"""
+    value = period.get("raw_value", period.get("value"))
+    if value in (None, "", "-", "–"):
+        return None
+    try:
+        return float(str(value).replace(",", "").replace("$", "").replace("%", ""))
+    except ValueError:
+        return None
+
+
+def has_non_zero_value(series):
+    return any(
+        period_number(period) not in (None, 0)
+        for period in series.get("periods", [])
+    )
+
+
+def score_ads_presence(social_stats):
+    """
+    Local implementation of ads_presence_system_prompt over the social_stats dict.
+
+    Score 1: both Facebook Ads and Google Ads fields present
+    Score 2: only Facebook Ads fields, or no ads fields at all
+    Score 5: only Google Ads fields
+    Flag 1 when any ads field has a non-zero, non-null value, else 0.
+
+    Returns a dict in the AdsScore shape.
+    """
+    social_stats = social_stats or {}
+    facebook_fields = [key for key in social_stats if FACEBOOK_ADS_PATTERN.match(key)]
+    google_fields = [key for key in social_stats if GOOGLE_ADS_PATTERN.match(key)]
+
+    if facebook_fields and google_fields:
+        score = 1
+    elif google_fields:
+        score = 5
+    else:
+        score = 2
+
+    active_fields = [
+        key
+        for key in facebook_fields + google_fields
+        if has_non_zero_value(social_stats[key])
+    ]
+    flag = 1 if active_fields else 0
+
+    reason = (
+        f"Facebook Ads fields: {', '.join(facebook_fields) or 'none'}. "
+        f"Google Ads fields: {', '.join(google_fields) or 'none'}. "
+        + (
+            f"Non-zero values found in {', '.join(active_fields)}."
+            if active_fields
+            else "No ads field has a non-zero value."
+        )
+    )
+    return {"score": score, "reason": reason, "flag": flag}
+
+
+# Relative weight of each metric family in the trend score
+TREND_FAMILY_WEIGHTS = {
+    "posts": 1.0,
+    "impressions": 1.5,
+    "ads": 1.0,
+    "google": 1.25,
+}
+
+# Cost metrics improve when they go down
+LOWER_IS_BETTER = ("cpc", "cpm")
+
+# Scores with an absolute value below this are treated as a toss-up
+TREND_AMBIGUITY_BAND = 0.1
+
+
+def metric_family(metric_name):
+    """Map a social_stats key onto one of the TREND_FAMILY_WEIGHTS families"""
+    if FACEBOOK_ADS_PATTERN.match(metric_name) or GOOGLE_ADS_PATTERN.match(metric_name):
+        return "ads"
+    if metric_name.startswith("google"):
+        return "google"
+    if "posts" in metric_name or "post_requests" in metric_name:
+        return "posts"
+    return "impressions"
+
+
+def classify_trend(social_stats, weights=None):
+    """
+    Weighted uptrend/downtrend classifier over the processed social_stats
+    (first_period, last_period and raw_change from process_data).
+
+    Every metric with a first and last value contributes its relative change,
+    clipped to [-1, 1] and sign-flipped for cost metrics, times its family weight.
+    Returns (CategoryIdentification dict, score in [-1, 1]).
+    """
+    weights = {**TREND_FAMILY_WEIGHTS, **(weights or {})}
+    weighted_sum = 0.0
+    weight_total = 0.0
+    movements = []
+    counts = {"increased": 0, "decreased": 0, "unchanged": 0}
+    first_label = last_label = None
+
+    for metric_name, stats in (social_stats or {}).items():
+        first = stats.get("first_period", {})
+        last = stats.get("last_period", {})
+        first_value = first.get("value")
+        last_value = last.get("value")
+        raw_change = stats.get("raw_change")
+        if first_value is None or last_value is None or raw_change is None:
+            continue
+
+        first_label = first_label or first.get("label")
+        last_label = last_label or last.get("label")
+
+        relative = max(-1.0, min(1.0, raw_change / max(abs(first_value), 1.0)))
+        if any(cost in metric_name.lower() for cost in LOWER_IS_BETTER):
+            relative = -relative
+
+        weight = weights.get(metric_family(metric_name), 1.0)
+        weighted_sum += weight * relative
+        weight_total += weight
+
+        if raw_change > 0:
+            counts["increased"] += 1
+        elif raw_change < 0:
+            counts["decreased"] += 1
+        else:
+            counts["unchanged"] += 1
+        movements.append((abs(weight * relative), metric_name, first_value, last_value))
+
+    score = weighted_sum / weight_total if weight_total else 0.0
+    category = "uptrend" if score >= 0 else "downtrend"
+
+    compared = sum(counts.values())
+    period_text = (
+        f" from {first_label} to {last_label}" if first_label and last_label else ""
+    )
+    top_moves = ", ".join(
+        f"{name.replace('_', ' ')} ({first_value:g} to {last_value:g})"
+        for _, name, first_value, last_value in sorted(movements, reverse=True)[:3]
+    )
+    reason = (
+        f"{counts['increased']} of {compared} comparable metrics increased and "
+        f"{counts['decreased']} decreased{period_text} (weighted trend score {score:+.2f})."
+    )
+    if top_moves:
+        reason += f" Largest movements: {top_moves}."
+
+    return {"category": category, "reason_selected": reason}, score
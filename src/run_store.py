@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from core.usage import usage_path_for
+
+logger = logging.getLogger(__name__)
+
+RUNS_DIR = Path("outputs") / "runs"
+INPUTS_FILE = "inputs.json"
+RUN_FILE = "run.json"
+REGENERATIONS_FILE = "regenerations.jsonl"
+
+# Written for slide nodes whose slide is not part of the final plan
+SKIPPED_MARKER = {"__skipped__": True}
+
+
+def new_run_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def stage_filename(stage: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "__", stage) + ".json"
+
+
+def failed_slide_names(slides: Dict[str, Any]) -> List[str]:
+    """Slides whose chain raised or timed out"""
+    return [
+        name
+        for name, result in slides.items()
+        if isinstance(result, dict) and "error" in result
+    ]
+
+
+class RunStore:
+    """
+    Every pipeline stage's output for one report, one JSON file per stage under
+    outputs/runs/<run_id>/, plus the inputs needed to rebuild the pipeline.
+    """
+
+    def __init__(self, run_id=None, root=RUNS_DIR):
+        self.run_id = run_id or new_run_id()
+        self.path = Path(root) / self.run_id
+
+    def exists(self) -> bool:
+        return (self.path / INPUTS_FILE).exists()
+
+    def write(self, filename, data):
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path / f"{filename}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.path / filename)
+
+    def read(self, filename):
+        with open(self.path / filename, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_inputs(self, inputs: Dict[str, Any]):
+        self.write(INPUTS_FILE, inputs)
+
+    def load_inputs(self) -> Dict[str, Any]:
+        if not self.exists():
+            raise FileNotFoundError(f"No stored run '{self.run_id}' in {self.path.parent}")
+        return self.read(INPUTS_FILE)
+
+    def save_stage(self, stage: str, result: Any, skipped: bool = False):
+        try:
+            self.write(stage_filename(stage), SKIPPED_MARKER if skipped else result)
+        except Exception as e:
+            # Persisting is best effort, it must never break report generation
+            logger.error(f"Could not store stage {stage} of run {self.run_id}: {str(e)}")
+
+    def load_stages(self, stages) -> Dict[str, Any]:
+        """Stored results for the given stage names, SKIPPED_MARKER for skipped slides"""
+        loaded = {}
+        for stage in stages:
+            if (self.path / stage_filename(stage)).exists():
+                loaded[stage] = self.read(stage_filename(stage))
+        return loaded
+
+    def save_run(self, summary: Dict[str, Any]):
+        self.write(RUN_FILE, summary)
+
+    def save_usage(self, usage: Dict[str, Any]):
+        """Per-call token, latency and cost records, next to run.json"""
+        self.write(usage_path_for(RUN_FILE).name, usage)
+
+    def load_usage(self) -> Dict[str, Any]:
+        """The stored usage report, empty for runs stored before usage was tracked"""
+        try:
+            return self.read(usage_path_for(RUN_FILE).name)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def log_regeneration(self, slide_names: List[str]):
+        self.path.mkdir(parents=True, exist_ok=True)
+        entry = {"at": datetime.now().isoformat(), "slides": slide_names}
+        with open(self.path / REGENERATIONS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
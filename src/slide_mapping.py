@@ -1,5 +1,5 @@
-import asyncio
 from typing import List, Dict, Any
+from core.latency import run_with_deadline
 from core.chains.general_cohort_chain.slides import (
     slide1_introduction_chain,
     here_is_what_we_delivered_chain,
@@ -127,25 +127,27 @@ def get_slide_functions(cohort: str, exact_category: str) -> List[Dict[str, Any]
     return slides
 
 
-async def run_slide_generation(
-    cohort: str,
-    exact_category: str,
-    ignite_payload: str,
-    quicksight_data: str,
-    zylo_v6_data: str,
-    social_stats="",
-    zylo_v6_data_json=None,  # This comes from the main input
-    zylo_v6_post_content=None,  # This comes from the main input
-    msp_data="",
-) -> Dict[str, Any]:
+def get_all_slide_configs() -> Dict[str, Dict[str, Any]]:
     """
-    Run all slide generation functions based on cohort and category.
+    Every slide config any plan can contain, keyed by slide name.
+    Cohort "1" covers the union of the uptrend and downtrend plans.
     """
+    all_configs = {}
+    for exact_category in ("uptrend", "downtrend"):
+        for config in get_slide_functions("1", exact_category):
+            all_configs.setdefault(config["name"], config)
+    return all_configs
 
-    slide_configs = get_slide_functions(cohort, exact_category)
 
+def build_data_map(
+    ignite_payload,
+    zylo_v6_data,
+    social_stats="",
+    zylo_v6_data_json=None,
+    zylo_v6_post_content=None,
+) -> Dict[str, Any]:
     # MAP DATA: Ensure keys here match the 'requires' list in config
-    data_map = {
+    return {
         "ignite_payload": ignite_payload,
         "quicksight_data": social_stats,
         "zylo_v6_data": zylo_v6_data,
@@ -154,30 +156,24 @@ async def run_slide_generation(
         "zylo_v6_post_content": zylo_v6_post_content,
     }
 
-    tasks = []
-    slide_names = []
-
-    for config in slide_configs:
-        kwargs = {}
-        for param in config["requires"]:
-            if param in data_map:
-                kwargs[param] = data_map[param]
-            else:
-                kwargs[param] = None
-
-        task = config["func"](**kwargs)
-        tasks.append(task)
-        slide_names.append(config["name"])
-
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    output = {}
-    for name, result in zip(slide_names, results):
-        if isinstance(result, Exception):
-            # Print error for debugging
-            print(f"Error generating slide {name}: {str(result)}")
-            output[name] = {"error": str(result)}
-        else:
-            output[name] = result
 
-    return output
+async def run_slide(config: Dict[str, Any], data_map: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a single slide chain under its timeout (hedged past its p95),
+    returning {"error": ...} instead of raising
+    """
+    kwargs = {}
+    for param in config["requires"]:
+        if param in data_map:
+            kwargs[param] = data_map[param]
+        else:
+            kwargs[param] = None
+
+    try:
+        return await run_with_deadline(
+            config["name"], lambda: config["func"](**kwargs)
+        )
+    except Exception as e:
+        # Print error for debugging
+        print(f"Error generating slide {config['name']}: {str(e)}")
+        return {"error": str(e)}
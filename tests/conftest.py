@@ -0,0 +1,4 @@
+import os
+
+# Chain modules create their chat models at import, no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "test")
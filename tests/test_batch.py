@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+from src.batch import BACKENDS, run_batch, safe_job_id
+
+
+def test_safe_job_ids_are_kept():
+    assert safe_job_id("acme_42") == "acme_42"
+    assert safe_job_id("line-3") == "line-3"
+
+
+def test_sanitized_job_ids_do_not_collide():
+    ids = ["a/b", "a b", "a_b", "a:b"]
+    file_ids = [safe_job_id(job_id) for job_id in ids]
+    assert len(set(file_ids)) == len(ids)
+    assert all(file_id.startswith("a_b") for file_id in file_ids)
+    assert safe_job_id("a/b") == safe_job_id("a/b")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_unreadable_job_file_raises(tmp_path, backend):
+    run = run_batch(tmp_path / "missing.jsonl", tmp_path / "out", concurrency=2, backend=backend)
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(asyncio.wait_for(run, timeout=10))
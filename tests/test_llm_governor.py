@@ -0,0 +1,44 @@
+import asyncio
+
+from core.llm_governor import LLMGovernor, TokenBucket
+
+
+async def cancel_while_waiting(coroutine):
+    task = asyncio.ensure_future(coroutine)
+    await asyncio.sleep(0.05)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def test_cancelled_acquire_returns_its_reservation():
+    async def scenario():
+        bucket = TokenBucket(60)
+        bucket.reserve(60)
+        await cancel_while_waiting(bucket.acquire(30))
+        # Only what refilled in the meantime is missing, not the cancelled 30
+        assert bucket.available > -1
+
+    asyncio.run(scenario())
+
+
+def test_call_cancelled_while_waiting_for_tokens_keeps_its_request():
+    async def scenario():
+        governor = LLMGovernor(model_limits={"model": {"rpm": 60, "tpm": 600}}, max_in_flight=4)
+        request_bucket, token_bucket = governor.buckets_for("model")
+        token_bucket.reserve(600)
+
+        async def call():
+            async with governor.admit("model", 300):
+                pass
+
+        await cancel_while_waiting(call())
+        assert request_bucket.available == 60
+        assert governor.metrics()["queue_depth"] == 0
+        # Every slot is free again
+        for _ in range(4):
+            assert governor.slots.acquire(blocking=False)
+
+    asyncio.run(scenario())
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from constants import DEFAULT_QUICKSIGHT_DATA
+from src import preprocess_data_for_report
+from src.input_parsers import parse_quicksight_table
+from src.preprocess_data_for_report import process_data
+from src.rule_based_scoring import TREND_AMBIGUITY_BAND, classify_trend, score_ads_presence
+
+
+@pytest.fixture
+def social_stats():
+    """The sample QuickSight data as identify_cohort receives it"""
+    parsed = parse_quicksight_table(DEFAULT_QUICKSIGHT_DATA)
+    stats = {metric: series for metric, series in parsed.items() if series["periods"]}
+    return process_data({"social_stats": stats})["social_stats"]
+
+
+def without(social_stats, prefix):
+    return {key: value for key, value in social_stats.items() if not key.startswith(prefix)}
+
+
+def test_sample_inputs_have_both_ad_platforms(social_stats):
+    result = score_ads_presence(social_stats)
+    assert (result["score"], result["flag"]) == (1, 1)
+    assert set(result) == {"score", "reason", "flag"}
+
+
+def test_facebook_ads_only(social_stats):
+    result = score_ads_presence(without(social_stats, "google_ads"))
+    assert (result["score"], result["flag"]) == (2, 1)
+
+
+def test_google_ads_only(social_stats):
+    result = score_ads_presence(without(social_stats, "facebook_ads"))
+    assert (result["score"], result["flag"]) == (5, 1)
+
+
+def test_no_ads(social_stats):
+    no_ads = without(without(social_stats, "google_ads"), "facebook_ads")
+    result = score_ads_presence(no_ads)
+    assert (result["score"], result["flag"]) == (2, 0)
+
+
+def test_ads_fields_with_only_zero_values(social_stats):
+    zeroed = {
+        key: {"periods": [{**period, "value": 0, "raw_value": 0} for period in series["periods"]]}
+        if "_ads" in key
+        else series
+        for key, series in social_stats.items()
+    }
+    result = score_ads_presence(zeroed)
+    assert (result["score"], result["flag"]) == (1, 0)
+
+
+def processed(**metrics):
+    """Processed social_stats for monthly series of values, None for a missing month"""
+    labels = ["Aug", "Sep", "Oct"]
+    stats = {
+        metric: {
+            "periods": [
+                {
+                    "period_type": "month",
+                    "period_label": label,
+                    "value": None if value is None else str(value),
+                }
+                for label, value in zip(labels, values)
+            ]
+        }
+        for metric, values in metrics.items()
+    }
+    return process_data({"social_stats": stats})["social_stats"]
+
+
+def test_clear_uptrend():
+    category, score = classify_trend(
+        processed(
+            facebook_impressions=[1000, 1500, 2000],
+            instagram_followers=[200, 220, 260],
+            google_site_clicks=[40, 45, 60],
+        )
+    )
+    assert category["category"] == "uptrend"
+    assert score > TREND_AMBIGUITY_BAND
+    assert "3 of 3 comparable metrics increased" in category["reason_selected"]
+
+
+def test_clear_downtrend():
+    category, score = classify_trend(
+        processed(
+            facebook_impressions=[2000, 1500, 900],
+            instagram_followers=[260, 240, 200],
+            google_site_clicks=[60, 45, 30],
+        )
+    )
+    assert category["category"] == "downtrend"
+    assert score < -TREND_AMBIGUITY_BAND
+
+
+def test_rising_cost_counts_against_the_trend():
+    category, score = classify_trend(
+        processed(facebook_ads_cpc=[1.0, 1.5, 2.0], google_ads_cpm=[5, 8, 10])
+    )
+    assert category["category"] == "downtrend"
+    assert score < -TREND_AMBIGUITY_BAND
+
+
+@pytest.mark.parametrize(
+    "stats",
+    [None, {}, processed(facebook_impressions=[None, None, None], google_ads=[None, 3, None])],
+)
+def test_no_comparable_metrics_scores_zero(stats, monkeypatch):
+    category, score = classify_trend(stats)
+    assert score == 0.0
+    assert "0 of 0 comparable metrics" in category["reason_selected"]
+
+    # A score of 0 is inside the ambiguity band, so the LLM breaks the tie
+    calls = []
+
+    async def tie_breaker(social_stats):
+        calls.append(social_stats)
+        return {"category": "downtrend", "reason_selected": "tie-breaker"}
+
+    monkeypatch.setattr(preprocess_data_for_report, "category_chain", tie_breaker)
+    result = asyncio.run(preprocess_data_for_report.identify_category(stats))
+    assert result["reason_selected"] == "tie-breaker"
+    assert calls == [stats]
+
+
+def test_score_inside_ambiguity_band_goes_to_tie_breaker(monkeypatch):
+    stats = processed(
+        facebook_impressions=[1000, 1000, 1050],
+        instagram_impressions=[1000, 1000, 980],
+    )
+    category, score = classify_trend(stats)
+    assert 0 < abs(score) < TREND_AMBIGUITY_BAND
+
+    async def tie_breaker(social_stats):
+        return {"category": "downtrend", "reason_selected": "tie-breaker"}
+
+    monkeypatch.setattr(preprocess_data_for_report, "category_chain", tie_breaker)
+    result = asyncio.run(preprocess_data_for_report.identify_category(stats))
+    assert result["reason_selected"] == "tie-breaker"
+    no_llm = asyncio.run(
+        preprocess_data_for_report.identify_category(stats, use_llm_tie_breaker=False)
+    )
+    assert no_llm == category
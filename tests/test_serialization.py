@@ -0,0 +1,78 @@
+import pytest
+
+from core import serialization
+from core.serialization import decode, encode, serialize_inputs
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"name": "Sample Bakery", "posts": 12, "ctr": 1.25, "active": True, "owner": None},
+        {"text": "a, b", "quote": 'say "hi"', "path": "a:b", "brackets": "[x]"},
+        {"dash": "- item", "minus": "-5", "hyphen": "well-known", "lone": "-"},
+        {"number": "42", "decimal": "3.50", "exponent": "1e5", "comma": "3,536"},
+        {"null": "null", "true": "true", "false": "false", "empty": "", "space": " x "},
+        {"unicode": "café ☕", "newline": "line 1\nline 2", "tab": "a\tb"},
+        {"key with space": 1, "key,comma": 2, "1st": 3, "": 4},
+    ],
+)
+def test_primitives_round_trip(value):
+    assert decode(encode(value)) == value
+
+
+def test_quoting_keeps_strings_strings():
+    encoded = encode({"a": "42", "b": "null", "c": "x,y", "d": "- x"})
+    assert 'a: "42"' in encoded
+    assert 'b: "null"' in encoded
+    assert 'c: "x,y"' in encoded
+    assert 'd: "- x"' in encoded
+    assert encode({"a": 42, "b": None}) == "a: 42\nb: null"
+
+
+def test_records_are_tabular():
+    periods = [
+        {"period_label": "Aug", "value": "12"},
+        {"period_label": "Sep, 2025", "value": None},
+    ]
+    encoded = encode({"periods": periods})
+    assert encoded.splitlines()[0] == "periods[2]{period_label,value}:"
+    assert decode(encoded) == {"periods": periods}
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"matrix": [[1, 2], [3, 4]], "empty": [], "nested": {"deep": {"deeper": [1, "a"]}}},
+        {"mixed": [1, "two", {"three": 3}, [4, [5, "6"]], None, {}]},
+        {"records": [{"a": 1, "b": [1, 2]}, {"a": 2, "b": []}]},
+        {"uneven": [{"a": 1}, {"b": 2}], "empty_object": {}},
+        [{"a": "x"}, {"a": "y,z"}],
+        [[], [[]], [{}]],
+        ["-", "- a", "a,b", ""],
+    ],
+)
+def test_nested_lists_round_trip(value):
+    assert decode(encode(value)) == value
+
+
+def test_encoding_is_canonical():
+    assert encode({"b": 1, "a": {"d": 2, "c": 3}}) == encode({"a": {"c": 3, "d": 2}, "b": 1})
+
+
+def test_serialize_inputs_leaves_text_alone():
+    input_data = {"quicksight_data": "| Metric | Aug |", "social_stats": {"a": [1, 2]}}
+    assert serialize_inputs(input_data, "toon") == {
+        "quicksight_data": "| Metric | Aug |",
+        "social_stats": "a[2]: 1,2",
+    }
+    assert serialize_inputs(input_data, "repr") is input_data
+    with pytest.raises(ValueError):
+        serialize_inputs(input_data, "yaml")
+
+
+def test_repr_is_the_default_encoding(monkeypatch):
+    monkeypatch.delenv("LLM_INPUT_ENCODING_SOCIAL_STATS", raising=False)
+    monkeypatch.setenv("LLM_INPUT_ENCODING_QUICK_ACTION", "toon")
+    assert serialization.INPUT_ENCODING == "repr"
+    assert serialization.chain_encoding("social_stats") == "repr"
+    assert serialization.chain_encoding("quick_action") == "toon"
@@ -0,0 +1,58 @@
+import tiktoken_ext.openai_public as openai_public
+
+from core import token_budget
+
+
+def test_tokenizer_matches_tiktoken_o200k_base(monkeypatch):
+    # tiktoken's own constructor, reading the vendored file instead of downloading it
+    monkeypatch.setattr(
+        openai_public, "load_tiktoken_bpe", lambda *args, **kwargs: token_budget.load_ranks()
+    )
+    expected = openai_public.o200k_base()
+    encoding = token_budget.get_encoding()
+    assert encoding.name == expected["name"]
+    assert encoding._pat_str == expected["pat_str"]
+    assert encoding._special_tokens == expected["special_tokens"]
+    assert encoding.n_vocab == 200019
+    assert token_budget.count_tokens("hello world") == 2
+
+
+QUICKSIGHT_TABLE = "\n".join(
+    [
+        "| Metric | Week 1 | Week 2 | Week 3 | Week 4 | Week 5 | Week 6 |",
+        "|---|---|---|---|---|---|---|",
+        "| Facebook Posts | 1 | 2 | 3 | 4 | 5 | 6 |",
+        "| Facebook Ads Clicks | 10 | 20 | 30 | 40 | 50 | 60 |",
+        "| Google Ads | 0 | 1 | 1 | 2 | 2 | 3 |",
+    ]
+)
+
+
+def test_table_columns_are_trimmed_oldest_first():
+    text, removed = token_budget.drop_table_columns(QUICKSIGHT_TABLE)
+    lines = text.splitlines()
+    assert removed == 3
+    assert lines[0] == "| Metric | Week 4 | Week 5 | Week 6 |"
+    assert lines[-1] == "| Google Ads | 2 | 2 | 3 |"
+    assert len(lines) == len(QUICKSIGHT_TABLE.splitlines())
+
+    text, removed = token_budget.drop_table_columns(text)
+    assert removed == 1
+    assert token_budget.drop_table_columns(text)[1] == 0
+
+
+def test_quicksight_text_over_budget_keeps_every_metric(monkeypatch):
+    from core.prompts.preprocess import social_stats_prompt
+
+    input_data = {"quicksight_data": QUICKSIGHT_TABLE, "msp_data": ""}
+    tokens = token_budget.prompt_tokens(social_stats_prompt, input_data)
+    monkeypatch.setenv("LLM_TOKEN_BUDGET_SOCIAL_STATS", str(tokens - 5))
+    trimmed = token_budget.enforce_token_budget("social_stats", social_stats_prompt, input_data)
+    lines = trimmed["quicksight_data"].splitlines()
+    assert [line.split("|")[1].strip() for line in lines[2:]] == [
+        "Facebook Posts",
+        "Facebook Ads Clicks",
+        "Google Ads",
+    ]
+    assert lines[0].endswith("| Week 6 |")
+    assert "Week 1" not in lines[0]